@@ -1,3 +1,4 @@
+import asyncio
 import os
 
 from channels.routing import ProtocolTypeRouter, URLRouter
@@ -10,7 +11,7 @@ os.environ.setdefault("DJANGO_SETTINGS_MODULE", "gym.settings")
 
 django_asgi_app = get_asgi_application()
 
-application = ProtocolTypeRouter({
+router = ProtocolTypeRouter({
     "http": django_asgi_app,
 
     "websocket": AuthMiddlewareStack(
@@ -18,4 +19,34 @@ application = ProtocolTypeRouter({
             gymapp.routing.websocket_urlpatterns
         )
     ),
-})
\ No newline at end of file
+})
+
+
+from gym.services import zk_listener
+
+# ClientSync worker-ს (ZK_SYNC_IN_PROCESS) listener-ის lock-ის მფლობელი უშვებს
+
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+
+        if message["type"] == "lifespan.startup":
+            # listener სერვერის event loop-ში task-ად (ან standby, თუ lock სხვა პროცესს აქვს)
+            zk_listener.attach(asyncio.get_running_loop())
+            await send({"type": "lifespan.startup.complete"})
+
+        elif message["type"] == "lifespan.shutdown":
+            zk_listener.stop()
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def application(scope, receive, send):
+    if scope["type"] == "lifespan":
+        await lifespan(receive, send)
+        return
+
+    # daphne lifespan-ს არ აგზავნის - მაშინ პირველივე კავშირზე
+    zk_listener.attach(asyncio.get_running_loop())
+    await router(scope, receive, send)
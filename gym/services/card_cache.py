@@ -0,0 +1,205 @@
+"""
+ბარათის ნომერი -> კლიენტის მონაცემები (listener-ის in-memory ინდექსი).
+
+Tap-ზე ბაზას აღარ მივმართავთ: ინდექსი ივსება listener-ის სტარტზე
+(warm) და ახლდება Client/ClientMembership-ის post_save/post_delete
+სიგნალებით (იხ. gymapp/signals.py). სიგნალი მხოლოდ იმ პროცესში მუშაობს,
+სადაც ჩაწერა მოხდა, ამიტომ ისინი CardCacheChange-შიც წერენ და listener
+სხვა worker-ების ცვლილებებს poll_changes()-ით კითხულობს.
+"""
+import threading
+import time
+from collections import namedtuple
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+
+# tuple-ის ქვეკლასია, ამიტომ ჩანაწერზე დამატებითი dict არ იქმნება
+CardEntry = namedtuple(
+    "CardEntry",
+    ["client_id", "first_name", "last_name", "photo", "start_date", "end_date", "has_membership", "thumb"],
+)
+
+_lock = threading.Lock()
+
+_by_card = {}
+_card_by_client = {}
+
+warmed_at = None
+
+# ბოლო დამუშავებული CardCacheChange.id
+_last_change = 0
+
+# ამ პროცესში CardCacheChange-ის ბოლო გასუფთავება (monotonic)
+_pruned_at = 0.0
+
+
+def _photo_url(name):
+    from gymapp.models import Client
+
+    if not name:
+        return ""
+    return Client._meta.get_field("photo").storage.url(name)
+
+
+def build_entry(client_id, first_name, last_name, photo, membership=None, thumb=""):
+    """
+    membership -> (start_date, end_date) ან None
+    thumb - thumbnail-ის ფაილის სახელი (URL/data URI tap-ზე იქმნება, იხ. thumbnails.py)
+    """
+    if membership is None:
+        return CardEntry(client_id, first_name, last_name, _photo_url(photo), "", "", False, thumb or "")
+
+    start_date, end_date = membership
+    return CardEntry(
+        client_id, first_name, last_name, _photo_url(photo),
+        str(start_date), str(end_date), True, thumb or "",
+    )
+
+
+def _load(client_filter=None):
+    from gymapp.models import Client, ClientMembership
+
+    clients = Client.objects.exclude(card_number="")
+    cms = ClientMembership.objects.filter(status="active")
+    if client_filter is not None:
+        clients = clients.filter(**client_filter)
+        cms = cms.filter(**{f"client__{k}": v for k, v in client_filter.items()})
+
+    active = {
+        client_id: (start_date, end_date)
+        for client_id, start_date, end_date in cms.values_list("client_id", "start_date", "end_date")
+    }
+
+    rows = clients.values_list("id", "card_number", "first_name", "last_name", "photo", "photo_thumb")
+
+    return [
+        (card, build_entry(client_id, first_name, last_name, photo, active.get(client_id), thumb))
+        for client_id, card, first_name, last_name, photo, thumb in rows
+    ]
+
+
+def warm():
+    """
+    მთლიანი ინდექსის აგება ორი query-თ.
+    """
+    from gymapp.models import CardCacheChange
+
+    global _by_card, _card_by_client, warmed_at, _last_change
+
+    # ამ id-მდე ცვლილებები ახალ ჩატვირთვაში უკვე ჩანს
+    last_change = CardCacheChange.objects.order_by("-id").values_list("id", flat=True).first() or 0
+
+    by_card = {}
+    card_by_client = {}
+    for card, entry in _load():
+        by_card[card] = entry
+        card_by_client[entry.client_id] = card
+
+    with _lock:
+        _by_card = by_card
+        _card_by_client = card_by_client
+        warmed_at = time.monotonic()
+        _last_change = max(_last_change, last_change)
+
+    CardCacheChange.objects.filter(id__lte=last_change).delete()
+
+    print("card cache warmed:", len(by_card))
+    return len(by_card)
+
+
+def is_stale():
+    ttl = getattr(settings, "CARD_CACHE_TTL", 300)
+    return warmed_at is None or (ttl and time.monotonic() - warmed_at > ttl)
+
+
+def lookup(card):
+    """
+    აბრუნებს CardEntry-ს ან None-ს (უცნობი ბარათი).
+    """
+    if warmed_at is None:
+        warm()
+    return _by_card.get(card)
+
+
+def _drop(client_id):
+    card = _card_by_client.pop(client_id, None)
+    entry = _by_card.get(card)
+    if entry is not None and entry.client_id == client_id:
+        del _by_card[card]
+
+
+def forget_client(client_id):
+    with _lock:
+        _drop(client_id)
+
+
+def refresh_client(client_id):
+    """
+    ერთი კლიენტის ჩანაწერის განახლება (მათ შორის ბარათის ნომრის შეცვლა).
+    """
+    if warmed_at is None:
+        return
+
+    loaded = _load({"id": client_id})
+
+    with _lock:
+        _drop(client_id)
+        for card, entry in loaded:
+            _by_card[card] = entry
+            _card_by_client[client_id] = card
+
+
+def record_change(client_id):
+    """
+    ცვლილება ჟურნალში (სიგნალიდან, ჩაწერის ტრანზაქციაში). ძველ ჩანაწერებს
+    ნებისმიერი პროცესი შლის, წუთში ერთხელ - listener-ის გარეშეც (zk_sync_worker,
+    manage.py ბრძანებები) ცხრილი არ იზრდება.
+    """
+    from gymapp.models import CardCacheChange
+
+    global _pruned_at
+
+    CardCacheChange.objects.create(client_id=client_id)
+
+    now = time.monotonic()
+    if now - _pruned_at < 60:
+        return
+    _pruned_at = now
+
+    # listener ჟურნალს ყოველ წამს კითხულობს, გამოტოვებულს კი შემდეგი warm() ფარავს
+    keep = max(getattr(settings, "CARD_CACHE_TTL", 300), 60)
+    CardCacheChange.objects.filter(created_at__lt=timezone.now() - timedelta(seconds=keep)).delete()
+
+
+def poll_changes(limit=1000):
+    """
+    სხვა პროცესებში შეცვლილი კლიენტების განახლება. აბრუნებს ჩანაწერების რაოდენობას.
+    """
+    from gymapp.models import CardCacheChange
+
+    global _last_change
+
+    if warmed_at is None:
+        return 0
+
+    rows = list(
+        CardCacheChange.objects.filter(id__gt=_last_change)
+        .order_by("id")
+        .values_list("id", "client_id")[:limit]
+    )
+    if not rows:
+        return 0
+
+    # წაშლილ კლიენტს refresh_client ინდექსიდან შლის
+    for client_id in {client_id for _, client_id in rows}:
+        refresh_client(client_id)
+
+    _last_change = rows[-1][0]
+    return len(rows)
+
+
+def size():
+    return len(_by_card)
@@ -0,0 +1,154 @@
+"""
+ბოლო card_event-ების რგოლური ბუფერი (CardConsumer-ის reconnect-ისთვის).
+
+handle_card ყოველ event-ს seq ნომერს ანიჭებს. ბრაუზერი ბოლოს ნანახ
+seq-ს (და epoch-ს) კავშირისას გადმოსცემს და გამოტოვებულ event-ებს ერთ
+ფრეიმად იღებს: JSON, ან msgpack (?format=msgpack).
+
+epoch პროცესის გაშვების დროა - სერვერის რესტარტის შემდეგ seq თავიდან
+იწყება, ამიტომ სხვა epoch-ზე მთელი ბუფერი იგზავნება.
+
+რამდენიმე პროცესზე (CARD_EVENT_STORE) ბუფერი SQLite ფაილშიც იწერება და
+consumer-ები replay-ს იქიდან კითხულობენ.
+"""
+import json
+import sqlite3
+import threading
+import time
+from collections import deque
+
+import msgpack
+from django.conf import settings
+
+
+epoch = int(time.time() * 1000)
+
+_lock = threading.Lock()
+_buffer = deque(maxlen=getattr(settings, "CARD_EVENT_BUFFER", 500))
+_seq = 0
+
+# CARD_EVENT_STORE - SQLite ფაილი, რომ სხვა daphne პროცესის consumer-მაც
+# დაინახოს ბუფერი (იხ. sqlite_channel_layer.py)
+_local = threading.local()
+_store_epoch_cleared = False
+
+
+def _store():
+    path = getattr(settings, "CARD_EVENT_STORE", None)
+    if not path:
+        return None
+
+    db = getattr(_local, "db", None)
+    if db is None:
+        db = sqlite3.connect(str(path), timeout=5, isolation_level=None)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=OFF")
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS card_events "
+            "(seq INTEGER PRIMARY KEY, epoch INTEGER NOT NULL, data BLOB NOT NULL)"
+        )
+        _local.db = db
+    return db
+
+
+def _store_write(stored):
+    global _store_epoch_cleared
+
+    db = _store()
+    if db is None:
+        return
+
+    # ახალი epoch - წინა გაშვების seq-ები აღარ ვარგა
+    if not _store_epoch_cleared:
+        db.execute("DELETE FROM card_events WHERE epoch != ?", (epoch,))
+        _store_epoch_cleared = True
+
+    db.execute(
+        "INSERT OR REPLACE INTO card_events (seq, epoch, data) VALUES (?, ?, ?)",
+        (stored["seq"], epoch, msgpack.packb(stored, use_bin_type=True)),
+    )
+    db.execute("DELETE FROM card_events WHERE seq <= ?", (stored["seq"] - _buffer.maxlen,))
+
+
+def record(data, photo=None):
+    """
+    data-ს seq/epoch/ts-ს უმატებს და ასლს ბუფერში ინახავს. აბრუნებს seq-ს.
+    photo - ბუფერში data URI-ის ნაცვლად შესანახი ბმული (მეხსიერება, replay-ის ზომა).
+    """
+    global _seq
+
+    with _lock:
+        _seq += 1
+        data["seq"] = _seq
+        data["epoch"] = epoch
+        data["ts"] = round(time.time(), 3)
+
+        stored = dict(data)
+        if photo is not None:
+            stored["photo"] = photo
+        _buffer.append(stored)
+
+        try:
+            _store_write(stored)
+        except sqlite3.Error as ex:
+            print("card event store error:", ex)
+
+        return _seq
+
+
+def _snapshot():
+    """
+    (epoch, ბოლო seq, event-ები) - საერთო store-იდან, თუ კონფიგურირებულია.
+    """
+    db = _store()
+    if db is None:
+        with _lock:
+            return epoch, _seq, list(_buffer)
+
+    rows = db.execute("SELECT epoch, data FROM card_events ORDER BY seq").fetchall()
+    if not rows:
+        return epoch, 0, []
+    events = [msgpack.unpackb(data, raw=False) for _, data in rows]
+    return rows[-1][0], events[-1]["seq"], events
+
+
+def since(last_seq=None, client_epoch=None):
+    """
+    last_seq-ის შემდეგ მოსული event-ები (ძველიდან ახლისკენ).
+    """
+    return _since(last_seq, client_epoch)[2]
+
+
+def _since(last_seq, client_epoch):
+    current_epoch, latest, events = _snapshot()
+
+    if client_epoch is not None and client_epoch != current_epoch:
+        return current_epoch, latest, events
+    if last_seq is None:
+        return current_epoch, latest, []
+    return current_epoch, latest, [event for event in events if event["seq"] > last_seq]
+
+
+def replay_frame(last_seq=None, client_epoch=None):
+    current_epoch, latest, events = _since(last_seq, client_epoch)
+
+    # ბუფერიდან უკვე ამოვარდნილი event-ებიც გამოტოვა
+    truncated = bool(events) and last_seq is not None and client_epoch == current_epoch \
+        and events[0]["seq"] > last_seq + 1
+
+    return {
+        "type": "replay",
+        "epoch": current_epoch,
+        "seq": latest,
+        "truncated": truncated,
+        "events": events,
+    }
+
+
+def encode(frame, fmt="json"):
+    """
+    აბრუნებს (text_data, bytes_data) - ერთ-ერთი None-ია.
+    """
+    if fmt == "msgpack":
+        return None, msgpack.packb(frame, use_bin_type=True)
+    return json.dumps(frame, separators=(",", ":")), None
@@ -0,0 +1,205 @@
+"""
+CheckIn-ების write-behind რიგი listener-ისთვის.
+
+Tap-ზე ჩანაწერი მხოლოდ რიგში იდება, ცალკე ნაკადი კი ბაზაში წერს
+bulk_create-ით ყოველ CHECKIN_FLUSH_INTERVAL_MS მილიწამში ან როცა
+CHECKIN_BATCH_SIZE ჩანაწერი დაგროვდება. პროცესის დასრულებისას (atexit)
+დარჩენილი ჩანაწერები იწერება.
+"""
+import atexit
+import queue
+import threading
+import time
+
+from django.conf import settings
+from django.db import OperationalError, close_old_connections, transaction
+from django.utils import timezone
+
+
+_queue = queue.Queue()
+_lock = threading.Lock()
+_thread = None
+_stopping = threading.Event()
+
+# flush-ის სტატისტიკა (იხ. /zk/stats/)
+stats = {
+    "flushes": 0,
+    "rows": 0,
+    "last_batch": 0,
+    "last_flush_ms": None,
+    "max_flush_ms": 0.0,
+    "errors": 0,
+    # "database is locked"-ის გამო ლოდინში გატარებული დრო
+    "lock_wait_ms": 0.0,
+    # ჩანაწერები, რომლებიც ცალ-ცალკეც ვერ ჩაიწერა (მაგ. კლიენტი წაიშალა)
+    "dropped": 0,
+    "last_error": None,
+}
+
+
+def _interval():
+    return getattr(settings, "CHECKIN_FLUSH_INTERVAL_MS", 500) / 1000
+
+
+def _batch_size():
+    return getattr(settings, "CHECKIN_BATCH_SIZE", 50)
+
+
+def enqueue(client_id, created_at=None, device="", door=None):
+    """
+    CheckIn რიგში, tap-ის დროით. ბაზას არ ეხება.
+    """
+    _ensure_thread()
+    _queue.put({
+        "client_id": client_id,
+        "created_at": created_at or timezone.now(),
+        "device": device,
+        "door": door,
+    })
+
+
+def pending():
+    return _queue.qsize()
+
+
+def _drain(batch, limit):
+    while len(batch) < limit:
+        try:
+            batch.append(_queue.get_nowait())
+        except queue.Empty:
+            break
+
+
+def _write(batch):
+    from gymapp import report_cache, rollups
+    from gymapp.models import CheckIn
+
+    started = time.perf_counter()
+    checkins = [CheckIn(**row) for row in batch]
+    with transaction.atomic():
+        CheckIn.objects.bulk_create(checkins)
+        rollups.add_checkins(checkins)
+        report_cache.bump("checkin")
+
+    stats["flushes"] += 1
+    stats["rows"] += len(batch)
+    stats["last_batch"] = len(batch)
+    stats["last_flush_ms"] = round((time.perf_counter() - started) * 1000, 3)
+    stats["max_flush_ms"] = max(stats["max_flush_ms"], stats["last_flush_ms"])
+
+
+def _write_with_retry(batch):
+    delay = 0.05
+    while True:
+        try:
+            _write(batch)
+            return
+        except OperationalError as ex:
+            # "database is locked" - ვცდით ისევ, ჩანაწერები არ იკარგება
+            stats["errors"] += 1
+            print("checkin flush error:", ex)
+            if _stopping.is_set() and delay > 2:
+                raise
+            time.sleep(delay)
+            stats["lock_wait_ms"] += delay * 1000
+            delay = min(delay * 2, 5)
+
+
+def _write_batch(batch):
+    """
+    batch-ის ჩაწერა; სხვა შეცდომისას (არა "database is locked") - თითო
+    ჩანაწერი ცალკე, რომ ერთმა ცუდმა მწკრივმა დანარჩენები არ დაკარგოს.
+    """
+    try:
+        _write_with_retry(batch)
+        return
+    except Exception as ex:
+        stats["errors"] += 1
+        stats["last_error"] = str(ex)
+        print("checkin batch error:", len(batch), ex)
+
+    if len(batch) == 1:
+        stats["dropped"] += 1
+        print("checkin dropped:", batch[0])
+        return
+
+    for row in batch:
+        _write_batch([row])
+
+
+def _run():
+    interval = _interval()
+    limit = _batch_size()
+
+    while not _stopping.is_set():
+        try:
+            first = _queue.get(timeout=interval)
+        except queue.Empty:
+            continue
+
+        batch = [first]
+        deadline = time.monotonic() + interval
+
+        while len(batch) < limit:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(_queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+
+        try:
+            _write_batch(batch)
+        except Exception as ex:
+            # ნაკადი არ უნდა გაჩერდეს - შემდეგი batch-ები ჩვეულებრივ იწერება
+            print("checkin writer error:", ex)
+        finally:
+            for _ in batch:
+                _queue.task_done()
+            close_old_connections()
+
+
+def _ensure_thread():
+    global _thread
+
+    if _thread is not None and _thread.is_alive():
+        return
+
+    with _lock:
+        if _thread is not None and _thread.is_alive():
+            return
+        _stopping.clear()
+        _thread = threading.Thread(target=_run, name="checkin-writer", daemon=True)
+        _thread.start()
+
+
+def flush():
+    """
+    რიგში დარჩენილის სინქრონული ჩაწერა (მაგ. shutdown-ზე). ნაკადის
+    მიმდინარე batch-საც ელოდება.
+    """
+    limit = _batch_size()
+    while True:
+        batch = []
+        _drain(batch, limit)
+        if not batch:
+            break
+        try:
+            _write_batch(batch)
+        finally:
+            for _ in batch:
+                _queue.task_done()
+
+    if _thread is not None and _thread.is_alive():
+        _queue.join()
+
+
+def shutdown():
+    _stopping.set()
+    if _thread is not None:
+        _thread.join(timeout=_interval() * 2 + 1)
+    flush()
+
+
+atexit.register(shutdown)
@@ -0,0 +1,116 @@
+"""
+კონტროლერის ბრძანებები ნებისმიერი worker-იდან.
+
+DeviceSession-ს (კონტროლერთან კავშირს) მხოლოდ listener-ის lock-ის მფლობელი
+პროცესი ხსნის. run() მფლობელში ბრძანებას მაშინვე ასრულებს, სხვა worker-ში
+კი DeviceCommand-ად წერს და შედეგს ელოდება - მფლობელის listener რიგს
+ყოველ ZK_COMMAND_POLL_INTERVAL წამში კითხულობს (zk_listener._command_runner).
+ვადაგასული ბრძანება (მაგ. კარის გაღება წუთის წინ) აღარ სრულდება.
+"""
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from gym.services import device_sync, transaction_backfill, zk_device
+
+
+class DeviceCommandError(Exception):
+    pass
+
+
+def _open_door(device=None, door=None, seconds=4):
+    zk_device.open_door(device=device, door=door, seconds=seconds)
+
+
+def _push(upserts=(), deletes=(), device=None):
+    device_sync.push(upserts=[tuple(row) for row in upserts], deletes=deletes, device=device)
+
+
+def _fields(record):
+    # simulated Record / pyzkaccess-ის მოდელი
+    return record.fields() if hasattr(record, "fields") else dict(record.dict)
+
+
+def _read_table(table, device=None):
+    records = zk_device.get_session(device).call(zk_device.PRIORITY_SYNC, zk_device.read_table, table)
+    return [_fields(record) for record in records]
+
+
+COMMANDS = {
+    "open_door": _open_door,
+    "push": _push,
+    "read_table": _read_table,
+    "reconcile": device_sync.reconcile,
+    "backfill": transaction_backfill.backfill,
+}
+
+
+def run(command, timeout=None, **kwargs):
+    """
+    ბრძანების შესრულება (ამ პროცესში ან lock-ის მფლობელში). შეცდომაზე - DeviceCommandError.
+    """
+    if zk_device.sessions_allowed:
+        try:
+            return COMMANDS[command](**kwargs)
+        except Exception as ex:
+            raise DeviceCommandError(str(ex)) from ex
+
+    from gymapp.models import DeviceCommand
+
+    timeout = timeout or getattr(settings, "ZK_COMMAND_TIMEOUT", 120)
+    row = DeviceCommand.objects.create(
+        command=command, args=kwargs, expires_at=timezone.now() + timedelta(seconds=timeout),
+    )
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        time.sleep(0.05)
+        status, result, error = DeviceCommand.objects.filter(pk=row.pk).values_list(
+            "status", "result", "error"
+        ).get()
+        if status == "done":
+            row.delete()
+            return result
+        if status == "failed":
+            row.delete()
+            raise DeviceCommandError(error)
+
+    # მფლობელს ჯერ არ აუღია - აღარც აიღებს
+    DeviceCommand.objects.filter(pk=row.pk, status="pending").delete()
+    raise DeviceCommandError(f"{command}: listener-ის პროცესმა {timeout} წამში არ უპასუხა")
+
+
+def claim():
+    """
+    მფლობელში: შესასრულებელი ბრძანებების id-ები (status -> running). ვადაგასულები იშლება.
+    """
+    from gymapp.models import DeviceCommand
+
+    now = timezone.now()
+
+    # გამგზავნმა შედეგი ვერ წაიკითხა (გაითიშა)
+    DeviceCommand.objects.filter(expires_at__lt=now - timedelta(minutes=5)).delete()
+
+    ids = []
+    for pk in DeviceCommand.objects.filter(status="pending", expires_at__gt=now).values_list("pk", flat=True):
+        if DeviceCommand.objects.filter(pk=pk, status="pending").update(status="running"):
+            ids.append(pk)
+    return ids
+
+
+def execute(pk):
+    from gymapp.models import DeviceCommand
+
+    row = DeviceCommand.objects.get(pk=pk)
+    try:
+        result = COMMANDS[row.command](**row.args)
+    except Exception as ex:
+        print("device command error:", row.command, ex)
+        DeviceCommand.objects.filter(pk=pk).update(status="failed", error=str(ex) or type(ex).__name__)
+        return
+
+    row.status = "done"
+    row.result = result
+    row.save(update_fields=["status", "result"])
@@ -0,0 +1,227 @@
+"""
+ClientSync რიგის კონტროლერებზე გადატანა ჯგუფურად.
+
+ყველა მომლოდინე ჩანაწერი ერთ სესიაში იგზავნება: User და UserAuthorize
+ცხრილებში upsert/delete თითო ბრძანებით ყოველ ZK_SYNC_BATCH_SIZE
+იუზერზე, ბაზაში კი სტატუსები ერთი UPDATE-ით იწერება თითო action-ზე.
+ბრძანებებს შორის კარის გაღება (PRIORITY_DOOR) რიგს გაუსწრებს.
+წარუმატებელი ჩანაწერი ხელახლა retry_delay()-ის შემდეგ იგზავნება.
+"""
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from gym.services import zk_device
+
+
+DEFAULT_PASSWORD = "3467"
+
+
+def apply_batch(zk, upserts, deletes):
+    """
+    upserts - [(pin, card), ...], deletes - [pin, ...]
+    """
+    if upserts:
+        zk.upsert("User", [
+            {"card": card, "pin": pin, "password": DEFAULT_PASSWORD, "super_authorize": False}
+            for pin, card in upserts
+        ])
+        zk.upsert("UserAuthorize", [
+            {"pin": pin, "doors": (True, True, True, True), "timezone_id": 1}
+            for pin, _ in upserts
+        ])
+
+    if deletes:
+        zk.delete("User", [{"pin": pin} for pin in deletes])
+        zk.delete("UserAuthorize", [{"pin": pin} for pin in deletes])
+
+
+def _sessions(device=None):
+    # იუზერები ყველა კონტროლერზე უნდა იყოს, თუ კონკრეტული არ არის მითითებული
+    if device is None:
+        return zk_device.all_sessions()
+    return [zk_device.get_session(device)]
+
+
+def push(upserts=(), deletes=(), device=None):
+    upserts = list(upserts)
+    deletes = list(deletes)
+    for session in _sessions(device):
+        session.call(zk_device.PRIORITY_SYNC, apply_batch, upserts, deletes)
+
+
+def _batches(items, size):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def _mark_failed(chunk, ex):
+    from gymapp.models import ClientSync
+
+    now = timezone.now()
+    groups = {}
+    for r in chunk:
+        groups.setdefault((r.action, r.attempts + 1), []).append(r.id)
+
+    for (action, attempts), ids in groups.items():
+        ClientSync.objects.filter(id__in=ids, action=action).update(
+            status="error",
+            error=str(ex),
+            attempts=attempts,
+            next_attempt_at=now + retry_delay(attempts),
+        )
+
+
+def retry_delay(attempts):
+    """
+    attempts-ე წარუმატებელი მცდელობის შემდეგ ლოდინი: 5, 10, 20, ... წამი ZK_SYNC_RETRY_MAX-მდე
+    """
+    base = getattr(settings, "ZK_SYNC_RETRY_BASE", 5)
+    limit = getattr(settings, "ZK_SYNC_RETRY_MAX", 300)
+    return timedelta(seconds=min(base * 2 ** (max(attempts, 1) - 1), limit))
+
+
+def due_filter(now=None):
+    now = now or timezone.now()
+    return Q(next_attempt_at__isnull=True) | Q(next_attempt_at__lte=now)
+
+
+def sync_pending(batch_size=None, device=None, due_only=False):
+    """
+    pending/error ClientSync ჩანაწერების გაგზავნა. აბრუნებს სტატისტიკას.
+    due_only=True-ზე backoff-ში მყოფი ჩანაწერები გამოიტოვება (sync worker).
+    """
+    from gymapp.models import ClientSync
+    from gymapp import sync_outbox
+
+    started = time.perf_counter()
+    batch_size = batch_size or getattr(settings, "ZK_SYNC_BATCH_SIZE", 50)
+
+    # outbox-ში კლიენტზე მაქსიმუმ ერთი ღია ჩანაწერია (gymapp/sync_outbox.py)
+    rows = ClientSync.objects.select_related("client").filter(status__in=sync_outbox.OPEN_STATUSES)
+    if due_only:
+        rows = rows.filter(due_filter())
+    rows = list(rows.order_by("id"))
+
+    done = {"add": [], "delete": []}
+    errors = 0
+
+    for chunk in _batches(rows, batch_size):
+        upserts = [(str(r.client_id), r.client.card_number) for r in chunk if r.action == "add"]
+        deletes = [str(r.client_id) for r in chunk if r.action == "delete"]
+
+        try:
+            push(upserts, deletes, device=device)
+        except Exception as ex:
+            print("device sync error:", ex)
+            errors += len(chunk)
+            _mark_failed(chunk, ex)
+        else:
+            for r in chunk:
+                done[r.action].append(r.id)
+
+    # action-ის პირობა: გაგზავნის დროს outbox-მა ჩანაწერი შეიძლება შეცვალა
+    now = timezone.now()
+    for action, ids in done.items():
+        if ids:
+            ClientSync.objects.filter(id__in=ids, action=action).update(
+                status="done", error="", synced_at=now, attempts=0, next_attempt_at=None
+            )
+
+    pruned = sync_outbox.prune_history()
+
+    synced = len(done["add"]) + len(done["delete"])
+    seconds = time.perf_counter() - started
+    result = {
+        "rows": len(rows),
+        "users": synced + errors,
+        "done": synced,
+        "errors": errors,
+        "pruned": pruned,
+        "seconds": round(seconds, 3),
+        "users_per_sec": round(synced / seconds, 1) if seconds and synced else 0,
+    }
+    print("device sync:", result)
+    return result
+
+
+# =========================
+# სრული შეჯერება (reconcile): ბაზა vs კონტროლერის ცხრილები
+# =========================
+def read_users(zk):
+    """
+    pin -> (card, super_authorize) და UserAuthorize-ის pin-ები, თითო წაკითხვით.
+    """
+    users = {u.pin: (u.card or "", bool(u.super_authorize)) for u in zk.read_table("User")}
+    authorized = {a.pin for a in zk.read_table("UserAuthorize")}
+    return users, authorized
+
+
+def desired_users():
+    """
+    აქტიური აბონემენტის მქონე კლიენტები: pin (client id) -> card
+    """
+    from gymapp.models import Client
+
+    rows = Client.objects.filter(memberships__status="active").distinct().values_list("id", "card_number")
+    return {str(client_id): card or "" for client_id, card in rows}
+
+
+def _same_card(a, b):
+    # კონტროლერი ცარიელ ბარათს "0"-ად ინახავს
+    return (a or "0") == (b or "0")
+
+
+def diff(desired, users, authorized, keep=()):
+    adds = []
+    changes = []
+    for pin, card in desired.items():
+        if pin not in users:
+            adds.append((pin, card))
+        elif not _same_card(users[pin][0], card) or pin not in authorized:
+            changes.append((pin, card))
+
+    removes = [
+        pin for pin in set(users) | authorized
+        if pin not in desired and pin not in keep and not users.get(pin, ("", False))[1]
+    ]
+    return adds, changes, sorted(removes)
+
+
+def reconcile(device=None, batch_size=None, dry_run=False):
+    """
+    კონტროლერზე მხოლოდ სხვაობა იგზავნება: ახალი, შეცვლილი ბარათი და წასაშლელი.
+    """
+    started = time.perf_counter()
+    batch_size = batch_size or getattr(settings, "ZK_SYNC_BATCH_SIZE", 50)
+    keep = {str(pin) for pin in getattr(settings, "ZK_RECONCILE_KEEP_PINS", ())}
+
+    desired = desired_users()
+    result = {"desired": len(desired), "devices": []}
+
+    for session in _sessions(device):
+        users, authorized = session.call(zk_device.PRIORITY_SYNC, read_users)
+        adds, changes, removes = diff(desired, users, authorized, keep)
+
+        if not dry_run:
+            upserts = adds + changes
+            for chunk in _batches(upserts, batch_size):
+                session.call(zk_device.PRIORITY_SYNC, apply_batch, chunk, [])
+            for chunk in _batches(removes, batch_size):
+                session.call(zk_device.PRIORITY_SYNC, apply_batch, [], chunk)
+
+        result["devices"].append({
+            "device": session.name,
+            "on_device": len(users),
+            "adds": len(adds),
+            "changes": len(changes),
+            "removes": len(removes),
+        })
+
+    result["dry_run"] = dry_run
+    result["seconds"] = round(time.perf_counter() - started, 3)
+    print("device reconcile:", result)
+    return result
@@ -0,0 +1,79 @@
+"""
+ფაილზე დაფუძნებული lock ერთ ჰოსტზე (fcntl / Windows-ზე msvcrt).
+
+OS lock-ს პროცესის დასრულებისას (მათ შორის crash-ზე) თვითონ ხსნის,
+ამიტომ ლოდინში მყოფი პროცესი მფლობელის გარდაცვალების შემდეგ
+acquire()-ით იკავებს - ძველი ფაილის ხელით წაშლა არ სჭირდება.
+"""
+import os
+import threading
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+
+class HostLock:
+
+    def __init__(self, path):
+        self.path = str(path)
+        self._file = None
+        self._mutex = threading.Lock()
+
+    @property
+    def held(self):
+        return self._file is not None
+
+    def acquire(self):
+        """
+        დაუბლოკავად. True - lock ამ პროცესს ეკუთვნის (უკვე ეკუთვნოდა).
+        """
+        with self._mutex:
+            if self._file is not None:
+                return True
+
+            f = open(self.path, "a+")
+            try:
+                if fcntl is not None:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                else:
+                    f.seek(0)
+                    msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+            except OSError:
+                f.close()
+                return False
+
+            # დიაგნოსტიკისთვის - ვინ ფლობს
+            f.seek(0)
+            f.truncate()
+            f.write(str(os.getpid()))
+            f.flush()
+
+            self._file = f
+            return True
+
+    def release(self):
+        with self._mutex:
+            f, self._file = self._file, None
+            if f is None:
+                return
+            try:
+                if fcntl is not None:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+                else:
+                    f.seek(0)
+                    msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+            finally:
+                f.close()
+
+    def owner(self):
+        """
+        მფლობელი პროცესის pid ფაილიდან (ან None).
+        """
+        try:
+            with open(self.path) as f:
+                return int(f.read().strip() or 0) or None
+        except (OSError, ValueError):
+            return None
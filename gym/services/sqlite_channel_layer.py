@@ -0,0 +1,319 @@
+"""
+Channel layer საერთო SQLite ფაილზე: რამდენიმე daphne პროცესი ერთ ჰოსტზე
+Redis-ის გარეშე (Windows-ზეც - Unix socket არ გვჭირდება).
+
+    CHANNEL_LAYERS = {
+        "default": {
+            "BACKEND": "gym.services.sqlite_channel_layer.SQLiteChannelLayer",
+            "CONFIG": {"path": BASE_DIR / "channels.sqlite3"},
+        }
+    }
+
+შეტყობინებები msgpack-ით ინახება messages ცხრილში. new_channel()-ის
+არხები პროცესის პრეფიქსს ატარებს ("specific.<პროცესი>!<შემთხვევითი>"),
+ამიტომ პროცესში ერთი reader ყველა თავის არხს ერთი query-თ კითხულობს და
+ლოკალურ asyncio რიგებში ანაწილებს. ბაზას PRAGMA data_version-ით ამოწმებს
+(ცხრილის წაკითხვის გარეშე): შეტყობინების შემდეგ poll_interval-ით, უსაქმოდ
+კი ინტერვალი ორმაგდება max_poll_interval-მდე. ამავე პროცესის send
+reader-ს მაშინვე აღვიძებს.
+
+ყველა SQLite ოპერაცია ერთ ფონურ ნაკადში სრულდება - event loop არ იბლოკება.
+ბაზა დროებითი მონაცემებისთვისაა (WAL, synchronous=OFF).
+"""
+import asyncio
+import os
+import random
+import sqlite3
+import string
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import msgpack
+from channels.exceptions import ChannelFull
+from channels.layers import BaseChannelLayer
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    channel TEXT NOT NULL,
+    expires REAL NOT NULL,
+    data BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS messages_channel ON messages (channel, id);
+CREATE TABLE IF NOT EXISTS groups (
+    group_name TEXT NOT NULL,
+    channel TEXT NOT NULL,
+    expires REAL NOT NULL,
+    PRIMARY KEY (group_name, channel)
+);
+"""
+
+
+def _random(length=12):
+    return "".join(random.choices(string.ascii_letters + string.digits, k=length))
+
+
+class SQLiteChannelLayer(BaseChannelLayer):
+
+    extensions = ["groups", "flush"]
+
+    def __init__(self, path="channels.sqlite3", expiry=60, group_expiry=86400, capacity=100,
+                 channel_capacity=None, poll_interval=0.005, max_poll_interval=0.1, **kwargs):
+        super().__init__(expiry=expiry, capacity=capacity, channel_capacity=channel_capacity)
+        self.channel_capacity = self.compile_capacities(self.channel_capacity)
+
+        self.path = str(path)
+        self.group_expiry = group_expiry
+        self.poll_interval = poll_interval
+        self.max_poll_interval = max(max_poll_interval, poll_interval)
+
+        # ამ პროცესის არხების პრეფიქსი
+        self.client_prefix = f"{os.getpid()}.{_random(8)}"
+
+        self._db = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite-layer")
+        self._data_version = None
+        # ამავე პროცესის ჩანაწერს data_version ვერ ხედავს
+        self._local_write = False
+        self._last_cleanup = 0.0
+
+        # process-specific არხები: channel -> asyncio.Queue (reader ავსებს)
+        self._queues = {}
+        self._reader = None
+        self._reader_loop = None
+        self._reader_lock = threading.Lock()
+        self._reader_wake = None
+
+    # =========================
+    # SQLite (მხოლოდ executor-ის ნაკადში)
+    # =========================
+    def _conn(self):
+        if self._db is None:
+            db = sqlite3.connect(self.path, timeout=10, isolation_level=None, check_same_thread=False)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=OFF")
+            db.executescript(SCHEMA)
+            self._db = db
+        return self._db
+
+    async def _run(self, fn, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, fn, *args)
+
+    def _insert(self, rows):
+        """
+        rows - [(channel, data), ...]. აბრუნებს სავსე არხების სიას (არ ჩაიწერა).
+        """
+        db = self._conn()
+        now = time.time()
+        full = []
+
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            for channel, data in rows:
+                count = db.execute(
+                    "SELECT COUNT(*) FROM messages WHERE channel = ? AND expires > ?", (channel, now)
+                ).fetchone()[0]
+                if count >= self.get_capacity(channel):
+                    full.append(channel)
+                    continue
+                db.execute(
+                    "INSERT INTO messages (channel, expires, data) VALUES (?, ?, ?)",
+                    (channel, now + self.expiry, data),
+                )
+                if self._is_local(channel):
+                    self._local_write = True
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        return full
+
+    def _group_channels(self, group):
+        return [
+            row[0] for row in self._conn().execute(
+                "SELECT channel FROM groups WHERE group_name = ? AND expires > ?", (group, time.time())
+            )
+        ]
+
+    def _group_send(self, group, data):
+        return self._insert([(channel, data) for channel in self._group_channels(group)])
+
+    def _take(self, pattern, exact=False, limit=None):
+        """
+        არხის (ან პრეფიქსის) შეტყობინებების ამოღება და წაშლა, id-ის რიგით.
+        """
+        db = self._conn()
+        now = time.time()
+        where = "channel = ?" if exact else "channel LIKE ?"
+
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            rows = db.execute(
+                f"SELECT id, channel, data FROM messages WHERE {where} AND expires > ? ORDER BY id"
+                + (f" LIMIT {int(limit)}" if limit else ""),
+                (pattern, now),
+            ).fetchall()
+            if rows:
+                db.execute(
+                    f"DELETE FROM messages WHERE {where} AND id <= ?", (pattern, rows[-1][0])
+                )
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+
+        self._cleanup(now)
+        return [(channel, data) for _, channel, data in rows]
+
+    def _changed(self):
+        # data_version იცვლება, როცა სხვა კავშირი ბაზაში წერს
+        version = self._conn().execute("PRAGMA data_version").fetchone()[0]
+        changed = version != self._data_version or self._local_write
+        self._data_version = version
+        self._local_write = False
+        return changed
+
+    def _cleanup(self, now):
+        if now - self._last_cleanup < 30:
+            return
+        self._last_cleanup = now
+        db = self._conn()
+        db.execute("DELETE FROM messages WHERE expires <= ?", (now,))
+        db.execute("DELETE FROM groups WHERE expires <= ?", (now,))
+
+    # =========================
+    # Channel layer API
+    # =========================
+    async def send(self, channel, message):
+        assert isinstance(message, dict), "message is not a dict"
+        self.valid_channel_name(channel)
+
+        full = await self._run(self._insert, [(channel, msgpack.packb(message, use_bin_type=True))])
+        self._wake_reader()
+        if full:
+            raise ChannelFull(channel)
+
+    def _is_local(self, channel):
+        return f"{self.client_prefix}!" in channel
+
+    async def new_channel(self, prefix="specific."):
+        return f"{prefix}{self.client_prefix}!{_random()}"
+
+    async def receive(self, channel):
+        self.valid_channel_name(channel)
+
+        if self._is_local(channel):
+            self._ensure_reader()
+            return await self._queues.setdefault(channel, asyncio.Queue()).get()
+
+        # სხვა (არა process-specific) არხი: პირდაპირ ბაზიდან
+        delay = self.poll_interval
+        while True:
+            rows = await self._run(self._take, channel, True, 1)
+            if rows:
+                return msgpack.unpackb(rows[0][1], raw=False)
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.max_poll_interval)
+
+    def _ensure_reader(self):
+        loop = asyncio.get_running_loop()
+        with self._reader_lock:
+            if self._reader is not None and not self._reader.done() and self._reader_loop is loop:
+                return
+            self._reader_loop = loop
+            self._reader_wake = asyncio.Event()
+            self._reader = loop.create_task(self._read_loop())
+
+    def _wake_reader(self):
+        # ამავე პროცესის არხში ჩაწერა - reader-ი backoff-ს არ ელოდება
+        if not self._local_write or self._reader_wake is None:
+            return
+        loop = self._reader_loop
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            self._reader_wake.set()
+        elif loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(self._reader_wake.set)
+
+    async def _read_loop(self):
+        pattern = f"%{self.client_prefix}!%"
+        wake = self._reader_wake
+        delay = self.poll_interval
+        # data_version-ის გარდა ცხრილსაც დროდადრო ვკითხულობთ (მაგ. ვადაგასული კავშირი)
+        full_check_at = time.monotonic() + 1
+
+        while True:
+            changed = await self._run(self._changed)
+            if changed or time.monotonic() >= full_check_at:
+                full_check_at = time.monotonic() + 1
+                rows = await self._run(self._take, pattern)
+                for channel, data in rows:
+                    self._queues.setdefault(channel, asyncio.Queue()).put_nowait(
+                        msgpack.unpackb(data, raw=False)
+                    )
+                if rows:
+                    delay = self.poll_interval
+                    continue
+
+            # უსაქმოდ ინტერვალი იზრდება: 5ms, 10ms, ... max_poll_interval
+            try:
+                await asyncio.wait_for(wake.wait(), delay)
+                delay = self.poll_interval
+            except asyncio.TimeoutError:
+                delay = min(delay * 2, self.max_poll_interval)
+            wake.clear()
+
+    async def flush(self):
+        def _flush():
+            db = self._conn()
+            db.execute("DELETE FROM messages")
+            db.execute("DELETE FROM groups")
+
+        self._queues = {}
+        await self._run(_flush)
+
+    async def close(self):
+        if self._reader is not None:
+            self._reader.cancel()
+            self._reader = None
+
+    # =========================
+    # ჯგუფები
+    # =========================
+    async def group_add(self, group, channel):
+        self.valid_group_name(group)
+        self.valid_channel_name(channel)
+
+        def _add():
+            self._conn().execute(
+                "INSERT OR REPLACE INTO groups (group_name, channel, expires) VALUES (?, ?, ?)",
+                (group, channel, time.time() + self.group_expiry),
+            )
+
+        await self._run(_add)
+
+    async def group_discard(self, group, channel):
+        self.valid_group_name(group)
+        self.valid_channel_name(channel)
+
+        def _discard():
+            self._conn().execute(
+                "DELETE FROM groups WHERE group_name = ? AND channel = ?", (group, channel)
+            )
+
+        await self._run(_discard)
+        self._queues.pop(channel, None)
+
+    async def group_send(self, group, message):
+        assert isinstance(message, dict), "message is not a dict"
+        self.valid_group_name(group)
+
+        # სავსე არხები (გათიშული ეკრანი) ჩუმად გამოიტოვება, როგორც სხვა layer-ებში
+        await self._run(self._group_send, group, msgpack.packb(message, use_bin_type=True))
+        self._wake_reader()
@@ -0,0 +1,166 @@
+"""
+ClientSync რიგის მუდმივი დამმუშავებელი.
+
+outbox (gymapp/sync_outbox.py) commit-ზე wake()-ით აღვიძებს, სხვა
+პროცესიდან შეცვლილ რიგს კი ZK_SYNC_POLL_INTERVAL წამში ერთხელ ამოწმებს.
+გაგზავნა device_sync.sync_pending(due_only=True)-ით ხდება, ანუ
+წარუმატებელი ჩანაწერები backoff-ის ვადამდე არ მეორდება.
+
+გაშვება: ან სერვერის პროცესში ნაკადად (ZK_SYNC_IN_PROCESS = True) -
+მხოლოდ listener-ის lock-ის მფლობელში (zk_listener._launch), ან ცალკე -
+manage.py zk_sync_worker. სხვა worker-ის wake() მფლობელამდე არ აღწევს,
+მფლობელი რიგს ZK_SYNC_POLL_INTERVAL-ში მაინც ამოწმებს.
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import Count, Min, Q
+from django.utils import timezone
+
+from gym.services import device_sync
+
+
+_wake = threading.Event()
+_stopping = threading.Event()
+_lock = threading.Lock()
+_thread = None
+
+# /syncpartial/ ღილაკი: შემდეგ გაშვებაზე backoff-ის იგნორირება
+_force = False
+
+stats = {
+    "runs": 0,
+    "done": 0,
+    "errors": 0,
+    "last_run": None,
+    "last_error": None,
+}
+
+
+def _interval():
+    return getattr(settings, "ZK_SYNC_POLL_INTERVAL", 2)
+
+
+def wake(force=False):
+    global _force
+    if force:
+        _force = True
+    _wake.set()
+
+
+def is_running():
+    return _thread is not None and _thread.is_alive()
+
+
+def request_run():
+    """
+    /syncpartial/: ამ პროცესის worker-ს wake(force=True). სხვა პროცესში (lock-ის
+    მფლობელი ან manage.py zk_sync_worker) force არ აღწევს, ამიტომ backoff-ში
+    მყოფ ჩანაწერებს ვადა ახლავე ეწევა - შემდეგ poll-ზე გაიგზავნება.
+    """
+    from gymapp.models import ClientSync
+    from gymapp import sync_outbox
+
+    if is_running():
+        wake(force=True)
+        return
+
+    now = timezone.now()
+    ClientSync.objects.filter(
+        status__in=sync_outbox.OPEN_STATUSES, next_attempt_at__gt=now
+    ).update(next_attempt_at=now)
+
+
+def has_due():
+    from gymapp.models import ClientSync
+    from gymapp import sync_outbox
+
+    return (
+        ClientSync.objects.filter(status__in=sync_outbox.OPEN_STATUSES)
+        .filter(device_sync.due_filter())
+        .exists()
+    )
+
+
+def run_once(force=False):
+    result = device_sync.sync_pending(due_only=not force)
+
+    stats["runs"] += 1
+    stats["done"] += result["done"]
+    stats["errors"] += result["errors"]
+    stats["last_run"] = timezone.now()
+    return result
+
+
+def run_forever():
+    global _force
+
+    while not _stopping.is_set():
+        _wake.wait(_interval())
+        _wake.clear()
+        if _stopping.is_set():
+            break
+
+        force, _force = _force, False
+        try:
+            if force or has_due():
+                run_once(force=force)
+        except Exception as ex:
+            # ბაზის ან კონტროლერის შეცდომა worker-ს არ აჩერებს
+            stats["last_error"] = str(ex)
+            print("sync worker error:", ex)
+            time.sleep(_interval())
+        finally:
+            close_old_connections()
+
+
+def start():
+    global _thread
+
+    if is_running():
+        return
+
+    with _lock:
+        if is_running():
+            return
+        _stopping.clear()
+        _thread = threading.Thread(target=run_forever, name="zk-sync-worker", daemon=True)
+        _thread.start()
+
+    # გაშვებამდე დაგროვებული რიგი
+    wake()
+
+
+def stop():
+    _stopping.set()
+    _wake.set()
+
+
+def queue_status():
+    """
+    რიგის სიღრმე და lag: რამდენ ხანს ელოდება ყველაზე ძველი ჩანაწერი.
+    """
+    from gymapp.models import ClientSync
+    from gymapp import sync_outbox
+
+    now = timezone.now()
+    summary = ClientSync.objects.filter(status__in=sync_outbox.OPEN_STATUSES).aggregate(
+        pending=Count("id", filter=Q(status="pending")),
+        error=Count("id", filter=Q(status="error")),
+        due=Count("id", filter=device_sync.due_filter(now)),
+        oldest=Min("queued_at"),
+        next_retry=Min("next_attempt_at"),
+    )
+    oldest = summary["oldest"]
+
+    return {
+        "pending": summary["pending"],
+        "error": summary["error"],
+        "depth": summary["pending"] + summary["error"],
+        "due": summary["due"],
+        "lag_seconds": round((now - oldest).total_seconds(), 1) if oldest else 0,
+        "next_retry_at": summary["next_retry"],
+        "worker": {"running": is_running(), **stats},
+    }
@@ -0,0 +1,201 @@
+"""
+Tap -> ეკრანი: ეტაპების დრო და listener-ის მეტრიკები (იხ. /zk/metrics/).
+
+handle_card ყოველ ეტაპზე trace-ში წერს დროს (time.time(), რომ სხვა
+პროცესის consumer-შიც შედარებადი იყოს):
+
+    polled    - poll_events()-მა event დააბრუნა
+    looked_up - ბარათი ნაპოვნია card_cache-ში
+    enqueued  - CheckIn რიგშია (checkin_writer)
+    sent      - group_send დასრულდა
+    delivered - CardConsumer.card_event-მა websocket-ში გაგზავნა (თითო ეკრანზე)
+
+თითო ეტაპის ხანგრძლივობა (წინა ეტაპიდან) და სრული tap_to_screen
+ჰისტოგრამებში იწერება.
+"""
+import threading
+import time
+from collections import deque
+
+
+STAGES = ("looked_up", "enqueued", "sent")
+
+# ჰისტოგრამის ზედა საზღვრები მილიწამებში
+BUCKETS_MS = (0.25, 0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+# events/sec-ის ფანჯარა (წამებში)
+RATE_WINDOW = 60
+
+_lock = threading.Lock()
+
+_histograms = {}
+_recent = deque()
+
+counters = {
+    "events": 0,
+    "delivered": 0,
+}
+
+# თითო კონტროლერის poll-loop: გამოკითხვები და უსაქმოდ (sleep-ში) გატარებული დრო
+devices = {}
+
+errors = {}
+
+started_at = time.time()
+
+
+def _new_histogram():
+    return {"count": 0, "sum_ms": 0.0, "max_ms": 0.0, "buckets": [0] * (len(BUCKETS_MS) + 1)}
+
+
+def observe(name, seconds):
+    ms = seconds * 1000
+    i = 0
+    while i < len(BUCKETS_MS) and ms > BUCKETS_MS[i]:
+        i += 1
+
+    with _lock:
+        h = _histograms.get(name)
+        if h is None:
+            h = _histograms[name] = _new_histogram()
+        h["count"] += 1
+        h["sum_ms"] += ms
+        h["max_ms"] = max(h["max_ms"], ms)
+        h["buckets"][i] += 1
+
+
+def error(kind):
+    with _lock:
+        errors[kind] = errors.get(kind, 0) + 1
+
+
+def _device(name):
+    d = devices.get(name)
+    if d is None:
+        d = devices[name] = {"polls": 0, "poll_seconds": 0.0, "idle_seconds": 0.0}
+    return d
+
+
+def poll(device, seconds):
+    with _lock:
+        d = _device(device)
+        d["polls"] += 1
+        d["poll_seconds"] += seconds
+
+
+def idle(device, seconds):
+    with _lock:
+        _device(device)["idle_seconds"] += seconds
+
+
+def start_trace(polled=None):
+    return {"polled": polled or time.time()}
+
+
+def mark(trace, stage):
+    trace[stage] = time.time()
+
+
+def event_done(trace):
+    """
+    listener-ის მხარე: group_send-მდე ეტაპები.
+    """
+    now = time.time()
+
+    # გამოტოვებული ეტაპი (მაგ. enqueued უცნობ ბარათზე) წინას ემატება
+    previous = trace["polled"]
+    for stage in STAGES:
+        if stage in trace:
+            observe(stage, trace[stage] - previous)
+            previous = trace[stage]
+    observe("tap_to_send", trace.get("sent", now) - trace["polled"])
+
+    with _lock:
+        counters["events"] += 1
+        _recent.append(now)
+        while _recent and _recent[0] < now - RATE_WINDOW:
+            _recent.popleft()
+
+
+def delivered(trace):
+    """
+    consumer-ის მხარე: თითო ეკრანზე მიწოდება.
+    """
+    if not trace or "polled" not in trace:
+        return
+
+    # trace რამდენიმე consumer-ს შორის საერთოა, ამიტომ არ ვცვლით
+    # group_send შეტყობინებას აკოპირებს, ამიტომ აქ "sent" არ ჩანს:
+    # delivered = ბოლო ეტაპიდან (looked_up/enqueued) ეკრანამდე
+    now = time.time()
+    observe("delivered", now - max(trace.values()))
+    observe("tap_to_screen", now - trace["polled"])
+
+    with _lock:
+        counters["delivered"] += 1
+
+
+def _percentile(h, q):
+    # ბაკეტის ზედა საზღვარი, რომელშიც q-ური პროცენტილი ხვდება
+    if not h["count"]:
+        return None
+    target = h["count"] * q
+    seen = 0
+    for i, n in enumerate(h["buckets"]):
+        seen += n
+        if seen >= target:
+            return BUCKETS_MS[i] if i < len(BUCKETS_MS) else h["max_ms"]
+    return h["max_ms"]
+
+
+def snapshot():
+    now = time.time()
+
+    with _lock:
+        while _recent and _recent[0] < now - RATE_WINDOW:
+            _recent.popleft()
+
+        uptime = now - started_at
+        window = min(RATE_WINDOW, uptime) or 1
+
+        histograms = {}
+        for name, h in _histograms.items():
+            histograms[name] = {
+                "count": h["count"],
+                "avg_ms": round(h["sum_ms"] / h["count"], 3) if h["count"] else None,
+                "max_ms": round(h["max_ms"], 3),
+                "p50_ms": _percentile(h, 0.5),
+                "p95_ms": _percentile(h, 0.95),
+                "p99_ms": _percentile(h, 0.99),
+                "buckets": dict(zip([f"le_{b}" for b in BUCKETS_MS] + ["inf"], h["buckets"])),
+            }
+
+        return {
+            "uptime_seconds": round(uptime, 1),
+            "events_per_sec": round(len(_recent) / window, 3),
+            "counters": dict(counters),
+            "devices": {
+                name: {
+                    "polls": d["polls"],
+                    "avg_poll_ms": round(d["poll_seconds"] / d["polls"] * 1000, 3) if d["polls"] else None,
+                    "idle_seconds": round(d["idle_seconds"], 3),
+                    "idle_ratio": round(d["idle_seconds"] / uptime, 3) if uptime else None,
+                }
+                for name, d in devices.items()
+            },
+            "errors": dict(errors),
+            "histograms": histograms,
+        }
+
+
+def reset():
+    global started_at
+
+    with _lock:
+        _histograms.clear()
+        _recent.clear()
+        errors.clear()
+        devices.clear()
+        for key in counters:
+            counters[key] = 0
+        started_at = time.time()
@@ -0,0 +1,151 @@
+"""
+კლიენტის ფოტოს პატარა ასლი ("Clients Pictures/thumbs/") ბარათის ეკრანისთვის.
+
+Thumbnail იქმნება Client-ის შენახვისას (gymapp/signals.py) ან არსებული
+ფოტოებისთვის manage.py generate_thumbnails-ით და Client.photo_thumb-ში
+ინახება. card_event-ში მიდის თვითონ სურათი data URI-ად
+(CLIENT_THUMB_INLINE), რომ სახე სახელთან ერთად გამოჩნდეს.
+"""
+import base64
+import os
+import threading
+from collections import OrderedDict
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+
+
+THUMB_DIR = "Clients Pictures/thumbs/"
+
+_inline = OrderedDict()
+_inline_lock = threading.Lock()
+
+
+def _storage():
+    from gymapp.models import Client
+    return Client._meta.get_field("photo_thumb").storage
+
+
+def thumb_name(photo_name):
+    stem = os.path.splitext(os.path.basename(photo_name))[0]
+    return f"{THUMB_DIR}{stem}.jpg"
+
+
+def render(photo_file):
+    """
+    ფოტო -> JPEG bytes, გრძელი მხარე CLIENT_THUMB_SIZE პიქსელი.
+    """
+    from PIL import Image, ImageOps
+
+    size = getattr(settings, "CLIENT_THUMB_SIZE", 500)
+    quality = getattr(settings, "CLIENT_THUMB_QUALITY", 75)
+
+    with Image.open(photo_file) as image:
+        # ტელეფონით გადაღებული ფოტოს ორიენტაცია EXIF-შია
+        image = ImageOps.exif_transpose(image)
+        image = image.convert("RGB")
+        image.thumbnail((size, size))
+
+        out = BytesIO()
+        image.save(out, "JPEG", quality=quality, optimize=True)
+        return out.getvalue()
+
+
+def make_thumbnail(client):
+    """
+    client.photo-ს thumbnail-ის შექმნა/გადაწერა. აბრუნებს thumbnail-ის სახელს ან "".
+    ბაზაში არ წერს - ამას გამომძახებელი აკეთებს (update-ით, სიგნალის გარეშე).
+    """
+    storage = _storage()
+
+    if not client.photo:
+        if client.photo_thumb:
+            remove(client.photo_thumb.name)
+        return ""
+
+    name = thumb_name(client.photo.name)
+
+    with client.photo.storage.open(client.photo.name, "rb") as photo_file:
+        data = render(photo_file)
+
+    remove(name)
+    saved = storage.save(name, ContentFile(data))
+
+    if client.photo_thumb and client.photo_thumb.name != saved:
+        remove(client.photo_thumb.name)
+
+    return saved
+
+
+def remove(name):
+    storage = _storage()
+    if name and storage.exists(name):
+        storage.delete(name)
+    forget_inline(name)
+
+
+def is_current(client):
+    """
+    thumbnail არსებობს და მიმდინარე ფოტოსია.
+    """
+    if not client.photo:
+        return not client.photo_thumb
+    return (
+        bool(client.photo_thumb)
+        and client.photo_thumb.name == thumb_name(client.photo.name)
+        and _storage().exists(client.photo_thumb.name)
+    )
+
+
+def url(name):
+    return _storage().url(name) if name else ""
+
+
+def data_uri(name):
+    """
+    thumbnail-ის data URI, მეხსიერებაში ბოლო CLIENT_THUMB_INLINE_CACHE ცალი.
+    """
+    if not name:
+        return ""
+
+    with _inline_lock:
+        cached = _inline.get(name)
+        if cached is not None:
+            _inline.move_to_end(name)
+            return cached
+
+    try:
+        with _storage().open(name, "rb") as f:
+            data = f.read()
+    except OSError:
+        return ""
+
+    if len(data) > getattr(settings, "CLIENT_THUMB_INLINE_MAX_BYTES", 80_000):
+        return ""
+
+    value = "data:image/jpeg;base64," + base64.b64encode(data).decode("ascii")
+
+    with _inline_lock:
+        _inline[name] = value
+        while len(_inline) > getattr(settings, "CLIENT_THUMB_INLINE_CACHE", 256):
+            _inline.popitem(last=False)
+    return value
+
+
+def forget_inline(name):
+    with _inline_lock:
+        _inline.pop(name, None)
+
+
+def payload_photo(thumb, photo):
+    """
+    card_event-ის "photo": thumbnail (data URI ან URL), თუ არ არის - სრული ფოტოს URL.
+    """
+    if thumb:
+        if getattr(settings, "CLIENT_THUMB_INLINE", True):
+            inline = data_uri(thumb)
+            if inline:
+                return inline
+        return url(thumb)
+    return photo
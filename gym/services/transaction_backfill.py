@@ -0,0 +1,141 @@
+"""
+კონტროლერის Transaction ცხრილის ინკრემენტული იმპორტი CheckIn-ებად.
+
+DeviceLogCursor ინახავს ბოლოს იმპორტირებული ჩანაწერის დროს: კონტროლერიდან
+ვკითხულობთ მხოლოდ წაუკითხავ ჩანაწერებს (unread), pin-ებს ერთი query-თ
+ვამოწმებთ და CheckIn-ებს bulk_create-ით ვწერთ მოწყობილობის დროით.
+trim=True-ზე იმპორტირებული ჩანაწერები კონტროლერიდან იშლება.
+
+unread-ით წაკითხვა კონტროლერის წაკითხვის მაჩვენებელს მაშინვე წევს, ბაზის
+commit-მდე. ამიტომ წაკითხვის წინ cursor.reading ინიშნება და commit-თან
+ერთად იხსნება: თუ წინა იმპორტი შუაში შეწყდა, შემდეგი მთელ ცხრილს კითხულობს
+(last_time და dedup ფანჯარა უკვე იმპორტირებულს გამოტოვებს).
+"""
+import bisect
+import time
+from datetime import timedelta
+from zoneinfo import ZoneInfo
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from gym.services import zk_device
+
+
+def read_transactions(zk, full=False):
+    return zk.read_table("Transaction", unread=not full)
+
+
+def delete_transactions(zk, records):
+    zk.delete("Transaction", records)
+
+
+def _device_tz():
+    return ZoneInfo(getattr(settings, "ZK_DEVICE_TIMEZONE", settings.TIME_ZONE))
+
+
+def _existing_times(client_ids, since, until):
+    """
+    client_id -> დალაგებული CheckIn-ის დროები (listener-ის მიერ უკვე ჩაწერილი)
+    """
+    from gymapp.models import CheckIn
+
+    existing = {}
+    rows = CheckIn.objects.filter(
+        client_id__in=client_ids,
+        created_at__gte=since,
+        created_at__lte=until,
+    ).values_list("client_id", "created_at").order_by("created_at")
+
+    for client_id, created_at in rows:
+        existing.setdefault(client_id, []).append(created_at)
+    return existing
+
+
+def _is_duplicate(times, moment, window):
+    if not times:
+        return False
+    i = bisect.bisect_left(times, moment - window)
+    return i < len(times) and times[i] <= moment + window
+
+
+def backfill(device=None, full=False, trim=False):
+    from gymapp import report_cache, rollups
+    from gymapp.models import CheckIn, Client, DeviceLogCursor
+
+    started = time.perf_counter()
+
+    session = zk_device.get_session(device)
+    cursor, _ = DeviceLogCursor.objects.get_or_create(device=session.name)
+
+    if cursor.reading:
+        print("transaction backfill: previous import did not commit, reading full table", session.name)
+        full = True
+    if not full:
+        DeviceLogCursor.objects.filter(pk=cursor.pk).update(reading=True)
+
+    records = session.call(zk_device.PRIORITY_SYNC, read_transactions, full)
+
+    tz = _device_tz()
+    window = timedelta(seconds=getattr(settings, "ZK_BACKFILL_DEDUP_SECONDS", 60))
+
+    candidates = []
+    for record in records:
+        pin = (record.pin or "").strip()
+        if not pin.isdigit() or pin == "0" or record.time is None:
+            continue
+
+        moment = record.time
+        if timezone.is_naive(moment):
+            moment = timezone.make_aware(moment, tz)
+
+        # იგივე წამის ჩანაწერებს dedup ფანჯარა ფილტრავს
+        if cursor.last_time and moment < cursor.last_time:
+            continue
+
+        candidates.append((int(pin), moment, record.door))
+
+    known = set(
+        Client.objects.filter(id__in={pin for pin, _, _ in candidates}).values_list("id", flat=True)
+    )
+    candidates = [c for c in candidates if c[0] in known]
+
+    new_rows = []
+    if candidates:
+        since = min(c[1] for c in candidates) - window
+        until = max(c[1] for c in candidates) + window
+        existing = _existing_times(known, since, until)
+
+        for client_id, moment, door in sorted(candidates, key=lambda c: c[1]):
+            times = existing.setdefault(client_id, [])
+            if _is_duplicate(times, moment, window):
+                continue
+            bisect.insort(times, moment)
+            new_rows.append(CheckIn(client_id=client_id, created_at=moment, device=session.name, door=door))
+
+    with transaction.atomic():
+        CheckIn.objects.bulk_create(new_rows)
+        rollups.add_checkins(new_rows)
+        report_cache.bump("checkin")
+
+        if candidates:
+            cursor.last_time = max(c[1] for c in candidates)
+        cursor.imported += len(new_rows)
+        cursor.reading = False
+        cursor.save()
+
+    if trim and records:
+        session.call(zk_device.PRIORITY_SYNC, delete_transactions, records)
+
+    result = {
+        "device": session.name,
+        "read": len(records),
+        "imported": len(new_rows),
+        "skipped": len(records) - len(new_rows),
+        "trimmed": len(records) if trim else 0,
+        "last_time": cursor.last_time,
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+    print("transaction backfill:", result)
+    return result
@@ -0,0 +1,299 @@
+"""
+კონტროლერთან წვდომის backend-ები (ZK_DEVICES-ში "backend").
+
+    pullsdk   - რეალური კონტროლერი pyzkaccess-ით (PULL SDK DLL, Windows)
+    simulated - პროცესშივე მოდელირებული კონტროლერი: User/UserAuthorize/
+                Transaction ცხრილები მეხსიერებაში, ხელოვნური დაყოვნება
+                (latency_ms, jitter_ms, row_ms) და შეცდომები (failure_rate,
+                connect_failure_rate). ტაპები simulated_controller(name).tap()-ით.
+
+სესიის (zk_device.DeviceSession) ბრძანებები მხოლოდ DeviceBackend-ის
+მეთოდებს იყენებს, ამიტომ listener, სინქრონიზაცია და Transaction-ის
+იმპორტი ორივეზე ერთნაირად მუშაობს.
+"""
+import random
+import threading
+from abc import ABC, abstractmethod
+import time
+from collections import deque
+
+from django.utils import timezone
+
+
+TABLES = ("User", "UserAuthorize", "Transaction")
+
+
+class DeviceBackend(ABC):
+    """
+    ჩანაწერები (read_table, poll_events) ატრიბუტებიანი ობიექტებია:
+    User(pin, card, password, super_authorize), UserAuthorize(pin, timezone_id, doors),
+    Transaction(pin, card, door, time), event(card, pin, door, time).
+    upsert/delete ჩანაწერებს dict-ებად იღებს.
+
+    ABC: მეთოდის გარეშე backend შექმნისთანავე ვარდება (TypeError), BACKENDS-ში
+    კი - მოდულის import-ზე, და არა სესიის ნაკადში, სადაც შეცდომა კავშირის
+    გაწყვეტას ჰგავს და reconnect-ის ციკლს იწვევს.
+    """
+
+    def disconnect(self):
+        pass
+
+    @abstractmethod
+    def open_door(self, door, seconds):
+        ...
+
+    @abstractmethod
+    def poll_events(self):
+        ...
+
+    @abstractmethod
+    def read_table(self, table, unread=False):
+        ...
+
+    @abstractmethod
+    def upsert(self, table, records):
+        ...
+
+    @abstractmethod
+    def delete(self, table, records):
+        ...
+
+
+# =========================
+# PULL SDK (pyzkaccess)
+# =========================
+class PullSDKBackend(DeviceBackend):
+
+    def __init__(self, device):
+        # pyzkaccess მხოლოდ ამ backend-ს სჭირდება
+        from pyzkaccess import ZKAccess, ZK100, ZK200, ZK400
+
+        models = {"ZK100": ZK100, "ZK200": ZK200, "ZK400": ZK400}
+        connstr = (
+            f"protocol=TCP,ipaddress={device['ip']},port={device.get('port', 4370)},"
+            f"timeout=4000,passwd="
+        )
+        self.zk = ZKAccess(connstr=connstr, device_model=models[device.get("model", "ZK200")])
+
+    def disconnect(self):
+        self.zk.disconnect()
+
+    def open_door(self, door, seconds):
+        # door - მოწყობილობის ნომერი (1-დან), doors[] კი 0-დან იწყება
+        self.zk.doors[door - 1].relays.switch_on(seconds)
+
+    def poll_events(self):
+        """
+        ერთი refresh() მთელ მოწყობილობაზე - ყველა კარის ახალი event-ები.
+        """
+        log = self.zk.events
+        if not log.refresh():
+            return []
+
+        events = list(log)
+        # event log-ის deque თავისით არ იწმინდება
+        log.clear()
+        return events
+
+    def _model(self, table):
+        from pyzkaccess import tables
+        return getattr(tables, table)
+
+    def read_table(self, table, unread=False):
+        qs = self.zk.table(table)
+        if unread:
+            qs = qs.unread()
+        return list(qs)
+
+    def upsert(self, table, records):
+        model = self._model(table)
+        self.zk.table(table).upsert([model(**record) for record in records])
+
+    def delete(self, table, records):
+        self.zk.table(table).delete(list(records))
+
+
+# =========================
+# სიმულირებული კონტროლერი
+# =========================
+class Record:
+
+    def __init__(self, **fields):
+        self.__dict__.update(fields)
+
+    def fields(self):
+        return dict(self.__dict__)
+
+    def __repr__(self):
+        return f"Record({self.__dict__})"
+
+
+class DeviceError(Exception):
+    pass
+
+
+class SimulatedController:
+    """
+    კონტროლერის მდგომარეობა. კავშირის გაწყვეტას (backend-ის თავიდან
+    შექმნას) გადაურჩება, როგორც ნამდვილი მოწყობილობის მეხსიერება.
+    """
+
+    def __init__(self, name, options=None):
+        options = options or {}
+        self.name = name
+
+        self.latency = options.get("latency_ms", 5) / 1000
+        self.jitter = options.get("jitter_ms", 2) / 1000
+        self.row_cost = options.get("row_ms", 0.05) / 1000
+        self.failure_rate = options.get("failure_rate", 0.0)
+        self.connect_failure_rate = options.get("connect_failure_rate", 0.0)
+        self.random = random.Random(options.get("seed"))
+
+        self.lock = threading.Lock()
+        self.users = {}
+        self.authorize = {}
+        self.transactions = []
+        self.read_position = 0
+        self.events = deque()
+        self.door_openings = []
+
+        self.stats = {"calls": 0, "failures": 0, "rows": 0, "taps": 0}
+
+    # ბრძანების "ქსელი": დაყოვნება და შემთხვევითი შეცდომა
+    def io(self, rows=0):
+        with self.lock:
+            delay = self.latency + self.random.uniform(0, self.jitter) + rows * self.row_cost
+            failed = self.random.random() < self.failure_rate
+            self.stats["calls"] += 1
+            self.stats["rows"] += rows
+            if failed:
+                self.stats["failures"] += 1
+
+        time.sleep(delay)
+        if failed:
+            raise DeviceError(f"{self.name}: simulated failure")
+
+    def connect(self):
+        time.sleep(self.latency)
+        with self.lock:
+            if self.random.random() < self.connect_failure_rate:
+                raise DeviceError(f"{self.name}: simulated connect failure")
+
+    def tap(self, card, door=1, moment=None):
+        """
+        ბარათის მიდება: event listener-ისთვის და ჩანაწერი Transaction ცხრილში.
+        """
+        moment = moment or timezone.localtime().replace(tzinfo=None, microsecond=0)
+        with self.lock:
+            pin = next((u.pin for u in self.users.values() if u.card == str(card)), "0")
+            self.events.append(Record(card=str(card), pin=pin, door=door, time=moment))
+            self.transactions.append(Record(card=str(card), pin=pin, door=door, time=moment))
+            self.stats["taps"] += 1
+
+    def table(self, table):
+        if table == "User":
+            return self.users
+        if table == "UserAuthorize":
+            return self.authorize
+        raise KeyError(table)
+
+
+def _matches(row, criteria):
+    return all(getattr(row, key, None) == value for key, value in criteria.items())
+
+
+class SimulatedBackend(DeviceBackend):
+
+    def __init__(self, device):
+        self.controller = simulated_controller(device["name"])
+        self.controller.connect()
+
+    def open_door(self, door, seconds):
+        self.controller.io()
+        with self.controller.lock:
+            self.controller.door_openings.append((door, seconds, time.time()))
+
+    def poll_events(self):
+        c = self.controller
+        c.io()
+        with c.lock:
+            events = list(c.events)
+            c.events.clear()
+        return events
+
+    def read_table(self, table, unread=False):
+        c = self.controller
+        with c.lock:
+            if table == "Transaction":
+                start = c.read_position if unread else 0
+                rows = c.transactions[start:]
+                c.read_position = len(c.transactions)
+            else:
+                rows = list(c.table(table).values())
+        c.io(len(rows))
+        return [Record(**row.fields()) for row in rows]
+
+    def upsert(self, table, records):
+        c = self.controller
+        records = list(records)
+        c.io(len(records))
+        with c.lock:
+            rows = c.table(table)
+            for record in records:
+                rows[str(record["pin"])] = Record(**{**record, "pin": str(record["pin"])})
+
+    def delete(self, table, records):
+        c = self.controller
+        criteria = [r.fields() if isinstance(r, Record) else dict(r) for r in records]
+        c.io(len(criteria))
+        with c.lock:
+            if table == "Transaction":
+                c.transactions = [
+                    row for row in c.transactions if not any(_matches(row, crit) for crit in criteria)
+                ]
+                c.read_position = min(c.read_position, len(c.transactions))
+                return
+
+            rows = c.table(table)
+            for crit in criteria:
+                for pin in [pin for pin, row in rows.items() if _matches(row, crit)]:
+                    del rows[pin]
+
+
+_controllers = {}
+_controllers_lock = threading.Lock()
+
+
+def simulated_controller(name, options=None):
+    """
+    name-ის სიმულირებული კონტროლერი (ერთი პროცესზე). options პირველ
+    გამოძახებაზე ZK_DEVICES-ის ჩანაწერიდან იკითხება.
+    """
+    with _controllers_lock:
+        controller = _controllers.get(name)
+        if controller is None:
+            if options is None:
+                from gym.services import zk_device
+                options = zk_device.get_device(name)
+            controller = _controllers[name] = SimulatedController(name, options)
+        return controller
+
+
+BACKENDS = {
+    "pullsdk": PullSDKBackend,
+    "simulated": SimulatedBackend,
+}
+
+# დაუსრულებელი backend import-ზევე ჩანს, არა პირველ ბრძანებაზე სესიის ნაკადში
+for _name, _cls in BACKENDS.items():
+    if _cls.__abstractmethods__:
+        raise TypeError(f"ZK backend {_name} lacks: {', '.join(sorted(_cls.__abstractmethods__))}")
+
+
+def connect(device):
+    backend = device.get("backend", "pullsdk")
+    try:
+        cls = BACKENDS[backend]
+    except KeyError:
+        raise KeyError(f"unknown ZK backend: {backend}")
+    return cls(device)
@@ -0,0 +1,231 @@
+"""
+ZK კონტროლერებთან მუდმივი სესიები (თითო მოწყობილობაზე ერთი).
+
+ყველა ბრძანება (კარის გაღება, event-ების გამოკითხვა, იუზერების
+სინქრონიზაცია) ერთ რიგში დგება და სესიის ნაკადი მათ პრიორიტეტის
+მიხედვით ასრულებს:
+
+    PRIORITY_DOOR   - კარის რელე
+    PRIORITY_EVENTS - listener-ის poll
+    PRIORITY_SYNC   - User/UserAuthorize/Transaction ცხრილები
+
+ასე listener-ის stop()/sleep()/start() აღარ გვჭირდება და კარის გაღებას
+მაქსიმუმ ერთი მიმდინარე ბრძანების დასრულება უწევს ლოდინი.
+
+თავად კავშირი backend-ია (gym/services/zk_backends.py): რეალური PULL SDK
+ან სიმულირებული კონტროლერი, მოწყობილობის "backend" პარამეტრის მიხედვით.
+
+სესიას მხოლოდ listener-ის lock-ის მფლობელი პროცესი ხსნის (sessions_allowed).
+"""
+import itertools
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from django.conf import settings
+
+from gym.services import zk_backends
+
+
+PRIORITY_DOOR = 0
+PRIORITY_EVENTS = 1
+PRIORITY_SYNC = 2
+
+PRIORITY_NAMES = {
+    PRIORITY_DOOR: "door",
+    PRIORITY_EVENTS: "events",
+    PRIORITY_SYNC: "sync",
+}
+
+
+class DeviceSession:
+
+    def __init__(self, device):
+        self.device = device
+        self.name = device["name"]
+        self.ip = device.get("ip")
+        self.backend = device.get("backend", "pullsdk")
+
+        self.zk = None
+
+        self._queue = queue.PriorityQueue()
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._thread = None
+
+        # ბრძანების დრო რიგში ჩადგომიდან დასრულებამდე, პრიორიტეტების მიხედვით
+        self.stats = {
+            name: {"count": 0, "errors": 0, "total_ms": 0.0, "max_ms": 0.0}
+            for name in PRIORITY_NAMES.values()
+        }
+        self.connects = 0
+
+    def submit(self, priority, fn, *args):
+        """
+        fn(zk, *args) სესიის ნაკადში შესრულდება (zk - DeviceBackend). აბრუნებს Future-ს.
+        """
+        self._ensure_thread()
+
+        future = Future()
+        self._queue.put((priority, next(self._seq), time.perf_counter(), fn, args, future))
+        return future
+
+    def call(self, priority, fn, *args, timeout=None):
+        return self.submit(priority, fn, *args).result(timeout=timeout)
+
+    def pending(self):
+        return self._queue.qsize()
+
+    def _ensure_thread(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(
+                target=self._run, name=f"zk-session-{self.name}", daemon=True
+            )
+            self._thread.start()
+
+    def _connection(self):
+        if self.zk is None:
+            self.zk = zk_backends.connect(self.device)
+            self.connects += 1
+        return self.zk
+
+    def _drop(self):
+        zk, self.zk = self.zk, None
+        if zk is not None:
+            try:
+                zk.disconnect()
+            except Exception as ex:
+                print("zk disconnect error:", ex)
+
+    def _record(self, priority, queued, failed):
+        row = self.stats[PRIORITY_NAMES[priority]]
+        elapsed = (time.perf_counter() - queued) * 1000
+        row["count"] += 1
+        row["total_ms"] += elapsed
+        row["max_ms"] = max(row["max_ms"], elapsed)
+        if failed:
+            row["errors"] += 1
+
+    def _run(self):
+        while True:
+            priority, _, queued, fn, args, future = self._queue.get()
+
+            if fn is None:
+                self._drop()
+                return
+
+            if not future.set_running_or_notify_cancel():
+                continue
+
+            try:
+                result = fn(self._connection(), *args)
+            except Exception as ex:
+                # კავშირი შეიძლება გაწყდა - შემდეგი ბრძანება თავიდან დაუკავშირდება
+                self._drop()
+                self._record(priority, queued, True)
+                future.set_exception(ex)
+            else:
+                self._record(priority, queued, False)
+                future.set_result(result)
+
+    def close(self):
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put((PRIORITY_SYNC + 1, next(self._seq), time.perf_counter(), None, (), None))
+
+    def get_stats(self):
+        return {
+            "name": self.name,
+            "ip": self.ip,
+            "backend": self.backend,
+            "connected": self.zk is not None,
+            "connects": self.connects,
+            "pending": self.pending(),
+            "commands": {
+                name: {
+                    "count": row["count"],
+                    "errors": row["errors"],
+                    "avg_ms": round(row["total_ms"] / row["count"], 3) if row["count"] else None,
+                    "max_ms": round(row["max_ms"], 3),
+                }
+                for name, row in self.stats.items()
+            },
+        }
+
+
+def devices():
+    """
+    settings.ZK_DEVICES: [{"name", "backend", "ip", "port", "model", "doors"}, ...]
+    doors - მოწყობილობის კარების ნომრები (1-დან), რომლებსაც ვუსმენთ.
+    """
+    configured = getattr(settings, "ZK_DEVICES", None)
+    if configured:
+        return configured
+    return [{"name": "main", "ip": settings.ipSettings, "doors": [1]}]
+
+
+def get_device(name=None):
+    configured = devices()
+    if name is None:
+        return configured[0]
+    for device in configured:
+        if device["name"] == name:
+            return device
+    raise KeyError(f"unknown ZK device: {name}")
+
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+# False - web worker, რომელიც listener-ის lock-ს არ ფლობს (zk_listener.start()).
+# კონტროლერთან კავშირს ასეთი პროცესი არ ხსნის, ბრძანებებს მფლობელს
+# უგზავნის (gym/services/device_commands.py). manage.py ბრძანებებში True რჩება.
+sessions_allowed = True
+
+
+class NotSessionOwner(RuntimeError):
+    pass
+
+
+def get_session(name=None):
+    if not sessions_allowed:
+        raise NotSessionOwner("ამ პროცესს listener-ის lock არ აქვს - გამოიყენეთ device_commands.run()")
+
+    device = get_device(name)
+
+    with _sessions_lock:
+        session = _sessions.get(device["name"])
+        if session is None:
+            session = _sessions[device["name"]] = DeviceSession(device)
+        return session
+
+
+def all_sessions():
+    return [get_session(device["name"]) for device in devices()]
+
+
+# =========================
+# ბრძანებები (სესიის ნაკადში სრულდება, პირველი არგუმენტი zk)
+# =========================
+def switch_on_door(zk, door=1, seconds=4):
+    zk.open_door(door, seconds)
+
+
+def poll_events(zk):
+    return zk.poll_events()
+
+
+def read_table(zk, table, unread=False):
+    return zk.read_table(table, unread=unread)
+
+
+def open_door(device=None, door=None, seconds=4):
+    if door is None:
+        door = (get_device(device).get("doors") or [1])[0]
+    timeout = getattr(settings, "ZK_DOOR_TIMEOUT", 5)
+    get_session(device).call(PRIORITY_DOOR, switch_on_door, door, seconds, timeout=timeout)
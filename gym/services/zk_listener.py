@@ -1,124 +1,215 @@
 import os
-from gym.settings import ipSettings
+import asyncio
 import threading
-from pyzkaccess import ZKAccess
+from collections import OrderedDict
 from asgiref.sync import async_to_sync
+from channels.db import database_sync_to_async
 from channels.layers import get_channel_layer
+from django.conf import settings
 import time
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "gym.settings")
 
 from gymapp.models import *
+from gym.services import card_cache, card_events, checkin_writer, device_commands, host_lock, sync_worker, tap_metrics, thumbnails, zk_device
 
 running = False
+task = None
 thread = None
 
-ip = ipSettings
+# stop()/start()-ის შემდეგ ძველი task რომ არ გაგრძელდეს
+generation = 0
 
-def listener():
-    time.sleep(2)
+# ASGI სერვერის (daphne) event loop, იხ. attach()
+loop = None
 
-    global running
+# კონტროლერს ჰოსტზე მხოლოდ ერთი პროცესი უსმენს (ZK_LISTENER_LOCK). დანარჩენები
+# standby ნაკადში ელოდებიან და მფლობელის გათიშვისას იკავებენ.
+owner_lock = host_lock.HostLock(
+    getattr(settings, "ZK_LISTENER_LOCK", os.path.join(settings.BASE_DIR, "zk_listener.lock"))
+)
+standby = None
+_standby_stop = threading.Event()
 
-    connstr = f"""protocol=TCP,ipaddress={ip},port=4370,timeout=4000,passwd="""
-    zk = ZKAccess(connstr)
+# tap -> websocket: ჯამური დრო და CPU (იხ. /zk/stats/)
+stats = {
+    "events": 0,
+    "latency_total": 0.0,
+    "cpu_total": 0.0,
+    "debounced": 0,
+}
 
-    channel_layer = get_channel_layer()
+# card -> ბოლო მიღებული ("ok") ტაპის დრო (monotonic), ძველიდან ახლისკენ დალაგებული
+_recent_taps = OrderedDict()
 
-    while running:
-        print("listeningggg")
 
-        for event in zk.doors[0].events.poll(timeout=1):
+def _active(my_generation):
+    return running and my_generation == generation
 
-            card = event.card
 
-            if not card or card == "0":
-                continue
+def _debounced(card, now=None):
+    """
+    True თუ იგივე ბარათი ZK_TAP_DEBOUNCE_SECONDS-ში უკვე მიღებულია (ორმაგი
+    ტაპი, ბარათის მიჭერა). ვადაგასული ჩანაწერები რიგის თავიდან იშლება.
+    """
+    window = getattr(settings, "ZK_TAP_DEBOUNCE_SECONDS", 10)
+    if window <= 0:
+        return False
 
-            print("CARD:", card)
+    now = time.monotonic() if now is None else now
 
-            try:
-                client = Client.objects.get(card_number=card)
-                membership = client.memberships.filter(status="active").first()
-                if membership:
-                    active_memnarship = ClientMembership.objects.get(client=client, status="active")
-                if not membership:
-                    data = {
-                        "status": "no_membership",
-                        "name": client.first_name,
-                        "lastname": client.last_name,
-                        "photo": client.photo.url if client.photo else "",
-                    }
-
-                else:
-
-                    # CheckIn ჩაწერა
-                    CheckIn.objects.create(client=client)
-
-                    data = {
-                        "status": "ok",
-                        "name": client.first_name,
-                        "lastname": client.last_name,
-                        "photo": client.photo.url if client.photo else "",
-                        "card":card,
-                        "start_date":str(active_memnarship.start_date),
-                        "end_date":str(active_memnarship.end_date),
-                    }
-
-            except Client.DoesNotExist:
-
-                data = {
-                    "status": "unknown_card",
-                    "name": "",
-                    "lastname": "",
-                    "photo": ""
-                }
-
-            async_to_sync(channel_layer.group_send)(
-                "cards",
-                {
-                    "type": "card_event",
-                    "data": data
-                }
-            )
+    while _recent_taps:
+        if now - next(iter(_recent_taps.values())) < window:
+            break
+        _recent_taps.popitem(last=False)
 
-    zk.disconnect()
+    return card in _recent_taps
 
 
-def process_card(card, channel_layer):
-    print("CARD:", card)
+def _remember_tap(card, now=None):
+    _recent_taps[card] = time.monotonic() if now is None else now
+    _recent_taps.move_to_end(card)
+
+
+async def listener():
+    my_generation = generation
 
     try:
-        client = Client.objects.get(card_number=card)
-        membership = client.memberships.filter(status="active").first()
-        if membership:
-            active_memnarship = ClientMembership.objects.get(client=client, status="active")
-        if not membership:
-
-            data = {
-                "status": "no_membership",
-                "name": client.first_name,
-                "lastname": client.last_name,
-                "photo": client.photo.url if client.photo else "",
-            }
+        await asyncio.sleep(2)
+
+        channel_layer = get_channel_layer()
+
+        await database_sync_to_async(card_cache.warm)()
+
+        # თითო კონტროლერს თავისი worker (და თავისი სესიის ნაკადი)
+        await asyncio.gather(
+            _cache_refresher(my_generation),
+            _command_runner(my_generation),
+            *(
+                device_worker(device, channel_layer, my_generation)
+                for device in zk_device.devices()
+            ),
+        )
+
+        await database_sync_to_async(checkin_writer.flush)()
+    finally:
+        # stop() -> start() შემთხვევაში lock ახალ listener-ს რჩება
+        if my_generation == generation:
+            if getattr(settings, "ZK_SYNC_IN_PROCESS", True):
+                sync_worker.stop()
+            owner_lock.release()
+
+
+async def _cache_refresher(my_generation):
+    while _active(my_generation):
+        try:
+            if card_cache.is_stale():
+                await database_sync_to_async(card_cache.warm)()
+            else:
+                # სხვა worker-ებში შენახული გადახდები/ბარათები
+                await database_sync_to_async(card_cache.poll_changes)()
+        except Exception as ex:
+            print("card cache error:", ex)
+            tap_metrics.error("card_cache")
+        await asyncio.sleep(1)
+
+
+async def _command_runner(my_generation):
+    """
+    სხვა worker-ების კონტროლერის ბრძანებები (DeviceCommand). თითო ბრძანება
+    ცალკე ნაკადში - გრძელმა /sync/-მა კარის გაღება არ უნდა დააყოვნოს.
+    """
+    interval = getattr(settings, "ZK_COMMAND_POLL_INTERVAL", 0.2)
+    execute = database_sync_to_async(device_commands.execute, thread_sensitive=False)
+
+    while _active(my_generation):
+        try:
+            for pk in await database_sync_to_async(device_commands.claim)():
+                asyncio.ensure_future(execute(pk))
+        except Exception as ex:
+            print("device command error:", ex)
+            tap_metrics.error("device_command")
+        await asyncio.sleep(interval)
+
+
+async def device_worker(device, channel_layer, my_generation):
+    name = device["name"]
+    doors = set(device.get("doors") or ())
+
+    # მოწყობილობასთან ყველა მოთხოვნა საერთო სესიის ნაკადში სრულდება
+    session = zk_device.get_session(name)
+    poll_interval = getattr(settings, "ZK_POLL_INTERVAL", 0.3)
+
+    while _active(my_generation):
+        poll_started = time.perf_counter()
+        try:
+            events = await asyncio.wrap_future(
+                session.submit(zk_device.PRIORITY_EVENTS, zk_device.poll_events)
+            )
 
-        else:
+        except Exception as ex:
+            print("zk listener error:", name, ex)
+            tap_metrics.error("poll")
+            await asyncio.sleep(5)
+            continue
 
-            # CheckIn ჩაწერა
-            CheckIn.objects.create(client=client)
+        polled = time.time()
+        tap_metrics.poll(name, time.perf_counter() - poll_started)
 
-            data = {
-                "status": "ok",
-                "name": client.first_name,
-                "lastname": client.last_name,
-                "photo": client.photo.url if client.photo else "",
-                "card":card,
-                "start_date":str(active_memnarship.start_date),
-                "end_date":str(active_memnarship.end_date),
-            }
+        if not events:
+            tap_metrics.idle(name, poll_interval)
+            await asyncio.sleep(poll_interval)
+            continue
 
-    except Client.DoesNotExist:
-        print("Client.DoesNotExist:")
+        for event in events:
+
+            card = event.card
+
+            if not card or card == "0":
+                continue
+
+            if doors and event.door not in doors:
+                continue
+
+            # ერთი ბარათის შეცდომამ worker არ უნდა გააჩეროს
+            try:
+                await handle_card(card, channel_layer, device=name, door=event.door, polled=polled)
+            except Exception as ex:
+                print("handle card error:", name, card, ex)
+                tap_metrics.error("handle_card")
+
+
+def _photo_link(entry):
+    if entry is None:
+        return ""
+    return thumbnails.url(entry.thumb) or entry.photo
+
+
+async def handle_card(card, channel_layer, device="", door=None, polled=None, group="cards", record=True):
+    """
+    group/record - zk_loadgen-ისთვის: სინთეტიკური ტაპები რეცეფციის ეკრანებსა
+    და replay ბუფერში არ უნდა მოხვდეს.
+    """
+    # თითო ტაპზე print ცხელ გზაზე ძვირია (zk_loadgen ათასობით ტაპს აგზავნის) -
+    # რაოდენობები /zk/stats/-სა და /zk/metrics/-შია
+    log = getattr(settings, "ZK_TAP_LOG", False)
+    if log:
+        print("CARD:", card, device, door)
+
+    started = time.perf_counter()
+    cpu_started = time.process_time()
+    trace = tap_metrics.start_trace(polled)
+
+    if card_cache.warmed_at is None:
+        await database_sync_to_async(card_cache.warm)()
+
+    # ბაზის ნაცვლად in-memory ინდექსი
+    entry = card_cache.lookup(card)
+    tap_metrics.mark(trace, "looked_up")
+
+    if entry is None:
+        if log:
+            print("Client.DoesNotExist:", card)
         data = {
             "status": "unknown_card",
             "name": "",
@@ -126,31 +217,199 @@ def process_card(card, channel_layer):
             "photo": ""
         }
 
-    async_to_sync(channel_layer.group_send)(
-        "cards",
-        {
-            "type": "card_event",
-            "data": data
+    elif not entry.has_membership:
+
+        data = {
+            "status": "no_membership",
+            "name": entry.first_name,
+            "lastname": entry.last_name,
+            "photo": thumbnails.payload_photo(entry.thumb, entry.photo),
+            "photo_url": entry.photo,
+        }
+
+    elif _debounced(card):
+
+        # განმეორებითი ტაპი: CheckIn აღარ იწერება, მაგრამ ეკრანი პასუხს იღებს (თუ
+        # პირველი ტაპი ვერ ნახა - reconnect, დახურული დიალოგი). ფოტო - ბმულით, replay-ს გარეშე
+        if log:
+            print("debounced:", card)
+        stats["debounced"] += 1
+
+        data = {
+            "status": "ok",
+            "debounced": True,
+            "name": entry.first_name,
+            "lastname": entry.last_name,
+            "photo": _photo_link(entry),
+            "card": card,
+            "start_date": entry.start_date,
+            "end_date": entry.end_date,
         }
-    )
+
+    else:
+
+        # CheckIn რიგში, ბაზაში ჯგუფურად ჩაიწერება (checkin_writer)
+        _remember_tap(card)
+        checkin_writer.enqueue(entry.client_id, device=device, door=door)
+        tap_metrics.mark(trace, "enqueued")
+
+        data = {
+            "status": "ok",
+            "name": entry.first_name,
+            "lastname": entry.last_name,
+            # thumbnail (data URI) - სახე სახელთან ერთად, დამატებითი მოთხოვნის გარეშე
+            "photo": thumbnails.payload_photo(entry.thumb, entry.photo),
+            "photo_url": entry.photo,
+            "card":card,
+            "start_date":entry.start_date,
+            "end_date":entry.end_date,
+        }
+
+    data["device"] = device
+    data["door"] = door
+
+    # reconnect-ის replay-ისთვის (gym/services/card_events.py)
+    if record and not data.get("debounced"):
+        card_events.record(data, photo=_photo_link(entry))
+
+    try:
+        await channel_layer.group_send(
+            group,
+            {
+                "type": "card_event",
+                "data": data,
+                "trace": trace,
+            }
+        )
+    except Exception:
+        tap_metrics.error("group_send")
+        raise
+
+    tap_metrics.mark(trace, "sent")
+    tap_metrics.event_done(trace)
+
+    stats["events"] += 1
+    stats["latency_total"] += time.perf_counter() - started
+    stats["cpu_total"] += time.process_time() - cpu_started
+
+
+def process_card(card, channel_layer):
+    """
+    sync კოდიდან გამოსაძახებლად (მაგ. imitate).
+    """
+    if loop is not None and loop.is_running():
+        asyncio.run_coroutine_threadsafe(handle_card(card, channel_layer), loop).result()
+    else:
+        async_to_sync(handle_card)(card, channel_layer)
+
+
+def get_stats():
+    events = stats["events"]
+    return {
+        "running": running,
+        "owner": owner_lock.held,
+        "standby": standby is not None and standby.is_alive(),
+        "lock_owner_pid": owner_lock.owner(),
+        "events": events,
+        "avg_latency_ms": round(stats["latency_total"] / events * 1000, 3) if events else None,
+        "avg_cpu_ms": round(stats["cpu_total"] / events * 1000, 3) if events else None,
+        "debounced": stats["debounced"],
+        "checkin_queue": checkin_writer.pending(),
+        "checkin_writer": checkin_writer.stats,
+        # სესიები მხოლოდ მფლობელშია
+        "devices": [session.get_stats() for session in zk_device.all_sessions()] if zk_device.sessions_allowed else [],
+    }
+
+
+def _spawn():
+    global task
+    task = asyncio.ensure_future(listener())
+
+
+def attach(server_loop):
+    """
+    ASGI აპლიკაცია (gym/asgi.py) გადმოგვცემს თავის loop-ს და listener
+    იმავე loop-ში task-ად ეშვება.
+    """
+    global loop
+
+    if loop is server_loop:
+        return
+
+    loop = server_loop
+    start()
+
 
 def start():
+    """
+    listener-ის გაშვება, თუ ამ პროცესმა lock აიღო. თუ არა - standby.
+    """
+    if running or (standby is not None and standby.is_alive()):
+        return
+
+    if owner_lock.acquire():
+        _launch()
+        return
+
+    print("zk listener: lock-ს ფლობს პროცესი", owner_lock.owner(), "- standby")
+    # კონტროლერის ბრძანებები - მფლობელის გავლით (device_commands)
+    zk_device.sessions_allowed = False
+    _start_standby()
+
+
+def _launch():
 
     print("started")
-    global running, thread
+    global running, thread, generation
 
     if running:
         return
 
     running = True
-    thread = threading.Thread(target=listener, daemon=True)
+    generation += 1
+    zk_device.sessions_allowed = True
+
+    # ClientSync-ს კონტროლერზე იგივე პროცესი აგზავნის, რომელიც მას უსმენს -
+    # სხვა worker-ები DeviceSession-ს არ ხსნიან
+    if getattr(settings, "ZK_SYNC_IN_PROCESS", True):
+        sync_worker.start()
+
+    if loop is not None and loop.is_running():
+        loop.call_soon_threadsafe(_spawn)
+        return
+
+    # ASGI loop არ გვაქვს (მაგ. runserver/WSGI) - ცალკე ნაკადი საკუთარი loop-ით
+    thread = threading.Thread(target=asyncio.run, args=(listener(),), daemon=True)
     thread.start()
 
 
+def _start_standby():
+    global standby
+
+    _standby_stop.clear()
+    standby = threading.Thread(target=_standby_loop, name="zk-listener-standby", daemon=True)
+    standby.start()
+
+
+def _standby_loop():
+    retry = getattr(settings, "ZK_LISTENER_LOCK_RETRY", 5)
+
+    while not _standby_stop.wait(retry):
+        if owner_lock.acquire():
+            print("zk listener: lock გათავისუფლდა, listener ამ პროცესში ეშვება")
+            _launch()
+            return
+
+
 def stop():
     print("stopped")
     # imitate()
     global running
+    _standby_stop.set()
+
+    if not running:
+        owner_lock.release()
+    # გაშვებული listener lock-ს დასრულებისას (flush-ის შემდეგ) ათავისუფლებს
     running = False
 
 
@@ -158,4 +417,3 @@ def imitate():
     print("imitate")
     channel_layer = get_channel_layer()
     process_card("3041",channel_layer)
-
@@ -44,6 +44,22 @@ INSTALLED_APPS = [
 
 ASGI_APPLICATION = "gym.asgi.application"
 
+# /api/clients/, /api/payments/, /api/checkins/ - cursor pagination (gymapp/pagination.py).
+# API_PAGE_COUNT - პასუხში ჯამური count (?count=0 თიშავს ერთ მოთხოვნაზე)
+API_PAGE_SIZE = 50
+API_MAX_PAGE_SIZE = 500
+API_PAGE_COUNT = True
+
+# /api/reports/summary/ - შედეგი ამდენ წამს ინახება (ჩაწერა მაშინვე აუქმებს, იხ.
+# gymapp/report_cache.py). სხვა პროცესის ჩაწერა მაქსიმუმ ამ დაგვიანებით ჩანს.
+SUMMARY_CACHE_TTL = 10
+
+# /api/reports/ ანგარიშები (payments, membership_sales, card_payments_report,
+# active_clients_report): შედეგები ფილტრების მიხედვით, LRU REPORT_CACHE_SIZE ჩანაწერი.
+# ჩაწერა მაშინვე აუქმებს; TTL - სხვა პროცესის ჩაწერისთვის. /api/reports/cache_stats/
+REPORT_CACHE_TTL = 300
+REPORT_CACHE_SIZE = 128
+
 
 CHANNEL_LAYERS = {
     "default": {
@@ -51,6 +67,17 @@ CHANNEL_LAYERS = {
     }
 }
 
+# რამდენიმე daphne პროცესისთვის (Redis-ის გარეშე) - საერთო SQLite ფაილი.
+# CARD_EVENT_STORE-იც დააყენეთ, რომ reconnect-ის replay ყველა პროცესში მუშაობდეს.
+# გაზომვა: manage.py channel_layer_bench
+# CHANNEL_LAYERS = {
+#     "default": {
+#         "BACKEND": "gym.services.sqlite_channel_layer.SQLiteChannelLayer",
+#         "CONFIG": {"path": BASE_DIR / "channels.sqlite3"},
+#     }
+# }
+# CARD_EVENT_STORE = BASE_DIR / "channels.sqlite3"
+
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -148,6 +175,82 @@ MEDIA_ROOT = BASE_DIR / "media"
 ipSettings = "172.26.0.245"
 # ipSettings = "192.168.10.225"
 
+# კონტროლერები და კარები (კარის ნომერი 1-დან). თითოეულს ცალკე worker და სესია აქვს.
+# backend: "pullsdk" (pyzkaccess) ან "simulated" (gym/services/zk_backends.py,
+# უკონტროლეროდ გასაშვებად და გასაზომად)
+ZK_DEVICES = [
+    {"name": "main", "backend": "pullsdk", "ip": ipSettings, "port": 4370, "model": "ZK200", "doors": [1]},
+    # {"name": "second", "backend": "pullsdk", "ip": "172.26.0.246", "port": 4370, "model": "ZK200", "doors": [1, 2]},
+    # {"name": "sim", "backend": "simulated", "doors": [1],
+    #  "latency_ms": 5, "jitter_ms": 2, "row_ms": 0.05, "failure_rate": 0.01, "connect_failure_rate": 0},
+]
+
+# listener-ს ჰოსტზე ერთი პროცესი ფლობს (ASGI lifespan-ზე ან პირველ კავშირზე ეშვება).
+# სხვა worker-ები lock-ს ყოველ ZK_LISTENER_LOCK_RETRY წამში ამოწმებენ და მფლობელის
+# გათიშვისას იკავებენ. manage.py ბრძანებები listener-ს არ უშვებს.
+ZK_LISTENER_LOCK = BASE_DIR / "zk_listener.lock"
+ZK_LISTENER_LOCK_RETRY = 5
+
+# listener-ის ბარათების ინდექსის სრული გადატვირთვა (წამებში), 0 - არასდროს.
+# სხვა worker-ების ცვლილებებს listener ყოველ წამს CardCacheChange-დან კითხულობს.
+CARD_CACHE_TTL = 300
+
+# listener-ის გამოკითხვის ინტერვალი, როცა ახალი event არ არის (წამებში)
+ZK_POLL_INTERVAL = 0.3
+
+# თითო ტაპის print (დიაგნოსტიკისთვის). რაოდენობები ისედაც /zk/stats/-სა და /zk/metrics/-შია
+ZK_TAP_LOG = False
+
+# იგივე ბარათის განმეორებითი ტაპი ამ ფანჯარაში (წამებში) CheckIn-ს აღარ ქმნის, 0 - გამორთულია
+ZK_TAP_DEBOUNCE_SECONDS = 10
+
+# კარის გაღების ბრძანების მაქსიმალური ლოდინი სესიის რიგში (წამებში)
+ZK_DOOR_TIMEOUT = 5
+
+# lock-ის არმფლობელი worker-ების კონტროლერის ბრძანებები (კარი, /sync/, ...) DeviceCommand-ით
+# მფლობელს ეგზავნება: მფლობელი რიგს ყოველ ZK_COMMAND_POLL_INTERVAL წამში ამოწმებს,
+# გამგზავნი შედეგს მაქსიმუმ ZK_COMMAND_TIMEOUT წამს ელოდება (კარს - ZK_DOOR_TIMEOUT)
+ZK_COMMAND_POLL_INTERVAL = 0.2
+ZK_COMMAND_TIMEOUT = 120
+
+# ClientSync-ის გაგზავნისას ერთ ბრძანებაში რამდენი იუზერი წავიდეს
+ZK_SYNC_BATCH_SIZE = 50
+
+# ClientSync worker: სერვერის პროცესში ნაკადად ეშვება - მხოლოდ ZK_LISTENER_LOCK-ის
+# მფლობელში (სხვა worker-ები კონტროლერთან კავშირს არ ხსნიან). თუ manage.py
+# zk_sync_worker ცალკე გაქვთ გაშვებული, დააყენეთ False.
+ZK_SYNC_IN_PROCESS = True
+# რიგის შემოწმება სხვა პროცესიდან შეცვლილი ჩანაწერებისთვის (წამებში)
+ZK_SYNC_POLL_INTERVAL = 2
+# წარუმატებელი გაგზავნის განმეორება: 5, 10, 20, ... წამი, მაქსიმუმ 300
+ZK_SYNC_RETRY_BASE = 5
+ZK_SYNC_RETRY_MAX = 300
+
+# გაგზავნილი (done) ClientSync ჩანაწერების შენახვის ვადა დღეებში
+CLIENT_SYNC_HISTORY_DAYS = 30
+
+# /sync/ (reconcile) ამ pin-ებს კონტროლერიდან არ წაშლის (მაგ. პერსონალის ბარათები)
+ZK_RECONCILE_KEEP_PINS = []
+
+# Transaction ცხრილის იმპორტი (manage.py zk_backfill): კონტროლერის საათის სარტყელი და
+# ფანჯარა, რომელშიც იგივე კლიენტის არსებული CheckIn დუბლიკატად ითვლება
+ZK_DEVICE_TIMEZONE = TIME_ZONE
+ZK_BACKFILL_DEDUP_SECONDS = 60
+
+# ბარათის ეკრანის ფოტო: thumbnail-ის ზომა (გრძელი მხარე, px - index.html-ის #photo 500x500) და JPEG ხარისხი.
+# CLIENT_THUMB_INLINE - card_event-ში data URI-ად (ცალკე HTTP მოთხოვნის გარეშე)
+CLIENT_THUMB_SIZE = 500
+CLIENT_THUMB_QUALITY = 75
+CLIENT_THUMB_INLINE = True
+
+# ბოლო card_event-ების რაოდენობა მეხსიერებაში (ეკრანის reconnect-ის replay)
+CARD_EVENT_BUFFER = 500
+
+# listener-ის CheckIn-ები ბაზაში ჯგუფურად იწერება:
+# ან ყოველ N მილიწამში, ან როცა M ჩანაწერი დაგროვდება
+CHECKIN_FLUSH_INTERVAL_MS = 500
+CHECKIN_BATCH_SIZE = 50
+
 
 
 LOGIN_URL = "/login/"
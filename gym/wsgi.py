@@ -14,3 +14,11 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'gym.settings')
 
 application = get_wsgi_application()
+
+# WSGI-ში event loop არ გვაქვს, listener საკუთარ ნაკადში ეშვება.
+# რამდენიმე worker-იდან კონტროლერს მხოლოდ ZK_LISTENER_LOCK-ის მფლობელი უსმენს
+# (ის უშვებს ClientSync worker-საც, იხ. zk_listener._launch)
+from gym.services import zk_listener
+
+zk_listener.start()
+
@@ -7,6 +7,7 @@ from .models import (
     Payment,
     CheckIn,
     ClientSync,
+    DeviceLogCursor,
 )
 
 
@@ -199,14 +200,14 @@ class PaymentAdmin(admin.ModelAdmin):
 
 @admin.register(CheckIn)
 class CheckInAdmin(admin.ModelAdmin):
-    list_display = ("id", "client", "created_at")
+    list_display = ("id", "client", "created_at", "device", "door")
     search_fields = (
         "client__first_name",
         "client__last_name",
         "client__phone",
         "client__card_number",
     )
-    list_filter = ("created_at",)
+    list_filter = ("created_at", "device", "door")
     autocomplete_fields = ("client",)
     ordering = ("-created_at",)
     date_hierarchy = "created_at"
@@ -226,4 +227,11 @@ class ClientSyncAdmin(admin.ModelAdmin):
     autocomplete_fields = ("client",)
     readonly_fields = ("created_at", "synced_at")
     ordering = ("-created_at",)
-    date_hierarchy = "created_at"
\ No newline at end of file
+    date_hierarchy = "created_at"
+
+
+@admin.register(DeviceLogCursor)
+class DeviceLogCursorAdmin(admin.ModelAdmin):
+    list_display = ("id", "device", "last_time", "imported", "reading", "updated_at")
+    readonly_fields = ("updated_at",)
+    ordering = ("device",)
@@ -7,5 +7,10 @@ class GymappConfig(AppConfig):
 
     def ready(self):
         import gymapp.signals
-        from gym.services.zk_listener import start
-        start()
+        from django.db.models.signals import post_migrate
+
+        from gymapp import search
+
+        # კლიენტების ძებნის ინდექსი (FTS5) - migrate-ის შემდეგ
+        post_migrate.connect(search.ensure_index, sender=self)
+        # listener-ს ASGI (gym/asgi.py) ან WSGI (gym/wsgi.py) აპლიკაცია უშვებს
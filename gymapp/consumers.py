@@ -1,6 +1,18 @@
 import json
+from urllib.parse import parse_qs
+
+from asgiref.sync import sync_to_async
 from channels.generic.websocket import AsyncWebsocketConsumer
 
+from gym.services import card_events, tap_metrics
+
+
+def _int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
 
 class CardConsumer(AsyncWebsocketConsumer):
 
@@ -13,6 +25,15 @@ class CardConsumer(AsyncWebsocketConsumer):
 
         await self.accept()
 
+        # ?last_seq=&epoch=&format=msgpack - გამოტოვებული event-ები ერთ ფრეიმად.
+        # group_add replay-მდეა, ამიტომ event არ იკარგება (დუბლიკატს ბრაუზერი seq-ით ფილტრავს)
+        query = parse_qs(self.scope.get("query_string", b"").decode())
+        self.format = (query.get("format") or ["json"])[0]
+        await self.send_replay(
+            _int((query.get("last_seq") or [None])[0]),
+            _int((query.get("epoch") or [None])[0]),
+        )
+
     async def disconnect(self, close_code):
 
         await self.channel_layer.group_discard(
@@ -20,8 +41,27 @@ class CardConsumer(AsyncWebsocketConsumer):
             self.channel_name
         )
 
+    async def receive(self, text_data=None, bytes_data=None):
+        # {"type": "replay", "last_seq": N, "epoch": E}
+        try:
+            message = json.loads(text_data or "{}")
+        except ValueError:
+            return
+
+        if message.get("type") == "replay":
+            await self.send_replay(_int(message.get("last_seq")), _int(message.get("epoch")))
+
+    async def send_replay(self, last_seq, epoch):
+        # CARD_EVENT_STORE-ით replay SQLite ფაილს კითხულობს - event loop-ის გარეთ
+        frame = await sync_to_async(card_events.replay_frame, thread_sensitive=False)(last_seq, epoch)
+        text_data, bytes_data = card_events.encode(frame, self.format)
+        await self.send(text_data=text_data, bytes_data=bytes_data)
+
     async def card_event(self, event):
 
         await self.send(
             text_data=json.dumps(event["data"])
-        )
\ No newline at end of file
+        )
+
+        # tap -> ეკრანი (trace-ს handle_card ამატებს)
+        tap_metrics.delivered(event.get("trace"))
@@ -0,0 +1,176 @@
+"""
+კლიენტის ზუსტი ძებნა ბარათით, პირადი ნომრით ან ტელეფონით (ClientIdentifier).
+
+მნიშვნელობები ერთ ფორმამდე დაიყვანება:
+    ბარათი   - Excel-ის ".0" და ჰარები იშლება, ციფრებს წინა ნულები (კონტროლერი
+               ბარათს რიცხვად ინახავს)
+    პ/ნ      - ".0" და ჰარები იშლება, დიდი ასოებით
+    ტელეფონი - მხოლოდ ციფრები, ბოლო 9 (+995 / 995 / 0 პრეფიქსის გარეშე)
+
+ცხრილს Client-ის post_save სიგნალი ანახლებს (gymapp/signals.py).
+"""
+import re
+
+from django.db import IntegrityError, transaction
+
+from .models import Client, ClientIdentifier
+
+
+UNIQUE_KINDS = ("card", "pass")
+
+
+def _strip_excel(value):
+    text = re.sub(r"\s+", "", str(value or ""))
+    if text.endswith(".0"):
+        text = text[:-2]
+    return text
+
+
+def normalize_card(value):
+    text = _strip_excel(value)
+    if text.isdigit():
+        return text.lstrip("0") or "0"
+    return text.upper()
+
+
+def normalize_pass(value):
+    return _strip_excel(value).upper()
+
+
+def normalize_phone(value):
+    digits = re.sub(r"\D", "", str(value or ""))
+    return digits[-9:] if len(digits) > 9 else digits
+
+
+NORMALIZE = {
+    "card": normalize_card,
+    "pass": normalize_pass,
+    "phone": normalize_phone,
+}
+
+
+def identifiers_for(card_number, pass_id, phone):
+    values = {
+        "card": normalize_card(card_number) if card_number else "",
+        "pass": normalize_pass(pass_id) if pass_id else "",
+        "phone": normalize_phone(phone),
+    }
+    # "0" - ცარიელი ბარათი (device_sync._same_card)
+    return {kind: value for kind, value in values.items() if value and value != "0"}
+
+
+def owner(kind, value, exclude=None):
+    """
+    უნიკალური იდენტიფიკატორის მფლობელი კლიენტის id (ან None).
+    """
+    qs = ClientIdentifier.objects.filter(kind=kind, value=NORMALIZE[kind](value))
+    if exclude is not None:
+        qs = qs.exclude(client_id=exclude)
+    return qs.values_list("client_id", flat=True).first()
+
+
+def sync_client(client):
+    """
+    client-ის იდენტიფიკატორების გადაწერა. სხვა კლიენტის უკვე დაკავებული
+    ბარათი/პ.ნ. გამოიტოვება (აბრუნებს გამოტოვებულ kind-ებს).
+    """
+    wanted = identifiers_for(client.card_number, client.passId, client.phone)
+    current = dict(
+        ClientIdentifier.objects.filter(client=client).values_list("kind", "value")
+    )
+    if current == wanted:
+        return []
+
+    ClientIdentifier.objects.filter(client=client).exclude(
+        kind__in=[kind for kind, value in wanted.items() if current.get(kind) == value]
+    ).delete()
+
+    skipped = []
+    for kind, value in wanted.items():
+        if current.get(kind) == value:
+            continue
+        # ცნობილი კონფლიქტი (API ასეთ მნიშვნელობას არ იღებს) - ყოველ save-ზე არ იბეჭდება
+        if kind in UNIQUE_KINDS and owner(kind, value, exclude=client.pk) is not None:
+            skipped.append(kind)
+            continue
+        try:
+            with transaction.atomic():
+                ClientIdentifier.objects.create(client=client, kind=kind, value=value)
+        except IntegrityError:
+            print("identifier conflict:", client.pk, kind, value)
+            skipped.append(kind)
+    return skipped
+
+
+def duplicates():
+    """
+    (kind, value) -> კლიენტების id-ები (ძველიდან ახლისკენ) ერთი და იმავე ბარათით/პ.ნ.-ით.
+    """
+    values = {}
+    for client_id, card_number, pass_id in (
+        Client.objects.order_by("id").values_list("id", "card_number", "passId").iterator()
+    ):
+        for kind, value in identifiers_for(card_number, pass_id, "").items():
+            values.setdefault((kind, value), []).append(client_id)
+    return {key: ids for key, ids in values.items() if len(ids) > 1}
+
+
+def give_pass(value, keep_id):
+    """
+    პ/ნ value რჩება keep_id კლიენტს, დანარჩენებს passId ეშლება (კომენტარში ეწერება).
+    აბრუნებს გასუფთავებული კლიენტების id-ებს.
+    """
+    cleared = []
+    with transaction.atomic():
+        for client in Client.objects.filter(passId__isnull=False).exclude(pk=keep_id):
+            if normalize_pass(client.passId) != value:
+                continue
+            note = f"პ/ნ {client.passId} გადავიდა კლიენტზე #{keep_id} (დუბლიკატი)"
+            client.comment = f"{client.comment}\n{note}".strip()
+            client.passId = None
+            client.save(update_fields=["passId", "comment"])
+            cleared.append(client.pk)
+
+        # post_save-მა ძველი მფლობელის იდენტიფიკატორი უკვე წაშალა
+        sync_client(Client.objects.get(pk=keep_id))
+    return cleared
+
+
+
+    # value__startswith SQLite-ზე LIKE-ია და ინდექსს ვერ იყენებს - დიაპაზონი იყენებს
+    return qs.filter(value__gte=value, value__lt=value + "\uffff")
+
+
+def find(card="", phone="", limit=10):
+    """
+    აბრუნებს (კლიენტი, კანდიდატები): ჯერ ზუსტი ძებნა, მერე პრეფიქსით.
+    ერთზე მეტი დამთხვევისას კლიენტი None-ია და კანდიდატები ჩამოთვლილია.
+    """
+    if card:
+        lookups = [("card", normalize_card(card)), ("pass", normalize_pass(card))]
+    elif phone:
+        lookups = [("phone", normalize_phone(phone))]
+    else:
+        return None, []
+
+    lookups = [(kind, value) for kind, value in lookups if value]
+
+    for kind, value in lookups:
+        ids = list(
+            ClientIdentifier.objects.filter(kind=kind, value=value)
+            .values_list("client_id", flat=True)[:limit]
+        )
+        if ids:
+            break
+    else:
+        ids = []
+        for kind, value in lookups:
+            ids += _prefix(ClientIdentifier.objects.filter(kind=kind), value).values_list(
+                "client_id", flat=True
+            )[:limit]
+
+    ids = list(dict.fromkeys(ids))
+    if len(ids) == 1:
+        return Client.objects.get(pk=ids[0]), []
+
+    return None, list(Client.objects.filter(pk__in=ids).order_by("last_name", "first_name"))
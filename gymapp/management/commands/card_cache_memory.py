@@ -0,0 +1,42 @@
+import tracemalloc
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+
+from gym.services import card_cache
+
+
+class Command(BaseCommand):
+    help = "ზომავს listener-ის ბარათების ინდექსის მეხსიერებას N სინთეტიკურ კლიენტზე"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--clients", type=int, default=100_000)
+
+    def handle(self, *args, **options):
+
+        n = options["clients"]
+        start = date(2026, 1, 1)
+
+        tracemalloc.start()
+        before = tracemalloc.take_snapshot()
+
+        by_card = {}
+        card_by_client = {}
+        for i in range(1, n + 1):
+            membership = (start, start + timedelta(days=30)) if i % 3 else None
+            card = str(1_000_000 + i)
+            by_card[card] = card_cache.build_entry(
+                i, f"სახელი{i}", f"გვარი{i}", f"Clients Pictures/{i}.jpg", membership
+            )
+            card_by_client[i] = card
+
+        after = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+
+        total = sum(s.size_diff for s in after.compare_to(before, "filename"))
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{n} კლიენტი: {total / 1024 / 1024:.1f} MiB, {total / n:.0f} ბაიტი კლიენტზე"
+            )
+        )
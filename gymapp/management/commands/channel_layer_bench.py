@@ -0,0 +1,186 @@
+import asyncio
+import multiprocessing
+import os
+import tempfile
+import time
+
+from channels.layers import InMemoryChannelLayer
+from django.core.management.base import BaseCommand
+
+from gym.services.sqlite_channel_layer import SQLiteChannelLayer
+
+
+GROUP = "bench"
+
+
+def percentile(values, q):
+    if not values:
+        return None
+    ordered = sorted(values)
+    i = min(len(ordered) - 1, max(0, round(q * len(ordered)) - 1))
+    return ordered[i]
+
+
+def ms(value):
+    return "-" if value is None else f"{value * 1000:.2f}"
+
+
+async def receive_all(layer, channel, count, latencies, timeout):
+    # გაგზავნის დრო შეტყობინებაშია (time.time - სხვა პროცესშიც შესადარებელია)
+    for _ in range(count):
+        message = await asyncio.wait_for(layer.receive(channel), timeout)
+        latencies.append(time.time() - message["sent"])
+
+
+def remote_receiver(path, count, ready, result, timeout):
+    """
+    ცალკე პროცესის მიმღები (მეორე daphne-ს მსგავსად).
+    """
+    async def run():
+        layer = SQLiteChannelLayer(path=path)
+        channel = await layer.new_channel()
+        await layer.group_add(GROUP, channel)
+        ready.set()
+
+        latencies = []
+        try:
+            await receive_all(layer, channel, count, latencies, timeout)
+        except asyncio.TimeoutError:
+            pass
+        await layer.group_discard(GROUP, channel)
+        await layer.close()
+        return latencies
+
+    result.put(asyncio.run(run()))
+
+
+class Command(BaseCommand):
+    help = (
+        "channel layer-ების შედარება: InMemoryChannelLayer და SQLiteChannelLayer - "
+        "group_send-ის გამტარუნარიანობა და მიწოდების დაყოვნება (p50/p99)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--messages", type=int, default=2000, help="group_send-ების რაოდენობა")
+        parser.add_argument("--receivers", type=int, default=3, help="ეკრანები (მიმღები არხები) ჯგუფში")
+        parser.add_argument("--rate", type=float, default=0,
+                            help="group_send წამში (0 - რაც შეიძლება სწრაფად)")
+        parser.add_argument("--path", default=None, help="SQLite ფაილი (ნაგულისხმევად დროებითი)")
+        parser.add_argument("--cross-process", action="store_true",
+                            help="SQLite-ზე ერთი მიმღები ცალკე პროცესში")
+        parser.add_argument("--timeout", type=float, default=10)
+
+    async def bench(self, layer, options, remote=None):
+        count = options["messages"]
+        receivers = options["receivers"]
+        timeout = options["timeout"]
+
+        # capacity არ უნდა შეზღუდოს გაზომვა
+        layer.capacity = max(layer.capacity, count + 1)
+
+        channels = []
+        for _ in range(receivers):
+            channel = await layer.new_channel()
+            await layer.group_add(GROUP, channel)
+            channels.append(channel)
+
+        latencies = []
+        tasks = [
+            asyncio.ensure_future(receive_all(layer, channel, count, latencies, timeout))
+            for channel in channels
+        ]
+
+        interval = 1 / options["rate"] if options["rate"] else 0
+        started = time.perf_counter()
+        for i in range(count):
+            await layer.group_send(GROUP, {"type": "card_event", "i": i, "sent": time.time()})
+            if interval:
+                await asyncio.sleep(interval)
+        sent = time.perf_counter() - started
+
+        done, pending = await asyncio.wait(tasks, timeout=timeout)
+        for task in pending:
+            task.cancel()
+        delivered = time.perf_counter() - started
+
+        remote_latencies = []
+        if remote is not None:
+            # flush-მდე - თორემ მეორე პროცესის წაუკითხავიც წაიშლება
+            process, result = remote
+            remote_latencies = await asyncio.get_running_loop().run_in_executor(
+                None, result.get, True, timeout
+            )
+            process.join()
+
+        for channel in channels:
+            await layer.group_discard(GROUP, channel)
+        await layer.flush()
+        await layer.close()
+
+        return {
+            "sent": sent,
+            "delivered": delivered,
+            "latencies": latencies,
+            "remote": remote_latencies,
+            "expected": count * receivers,
+        }
+
+    def report(self, name, result, options):
+        count = options["messages"]
+        latencies = result["latencies"]
+        received = len(latencies)
+
+        self.stdout.write(self.style.SUCCESS(name))
+        self.stdout.write(
+            f"  group_send: {count / result['sent']:.0f} წამში, "
+            f"მიწოდება: {received / result['delivered']:.0f} შეტყობინება წამში "
+            f"({received}/{result['expected']})"
+        )
+        self.stdout.write(
+            f"  დაყოვნება ms: p50 {ms(percentile(latencies, 0.5))}  "
+            f"p99 {ms(percentile(latencies, 0.99))}  max {ms(max(latencies, default=None))}"
+        )
+        if options["cross_process"] and result["remote"] is not None and name.startswith("SQLite"):
+            remote = result["remote"]
+            self.stdout.write(
+                f"  სხვა პროცესი: {len(remote)}/{count}, ms p50 {ms(percentile(remote, 0.5))}  "
+                f"p99 {ms(percentile(remote, 0.99))}"
+            )
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f"{options['messages']} group_send, {options['receivers']} მიმღები"
+            + (f", {options['rate']:.0f}/წმ" if options["rate"] else "")
+        )
+
+        result = asyncio.run(self.bench(InMemoryChannelLayer(), options))
+        self.report("InMemoryChannelLayer", result, options)
+
+        tmpdir = None
+        path = options["path"]
+        if path is None:
+            tmpdir = tempfile.TemporaryDirectory()
+            path = os.path.join(tmpdir.name, "channels.sqlite3")
+
+        try:
+            remote = None
+            if options["cross_process"]:
+                ready = multiprocessing.Event()
+                queue = multiprocessing.Queue()
+                process = multiprocessing.Process(
+                    target=remote_receiver,
+                    args=(path, options["messages"], ready, queue, options["timeout"]),
+                )
+                process.start()
+                if not ready.wait(options["timeout"]):
+                    process.terminate()
+                    self.stderr.write("მეორე პროცესი ვერ ჩაირთო")
+                else:
+                    remote = (process, queue)
+
+            layer = SQLiteChannelLayer(path=path)
+            result = asyncio.run(self.bench(layer, options, remote))
+            self.report("SQLiteChannelLayer", result, options)
+        finally:
+            if tmpdir is not None:
+                tmpdir.cleanup()
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+
+from gym.services import thumbnails
+from gymapp.models import Client
+
+
+class Command(BaseCommand):
+    help = "არსებული ფოტოების thumbnail-ების შექმნა (Clients Pictures/thumbs/)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--force", action="store_true", help="არსებულის გადაწერაც")
+
+    def handle(self, *args, **options):
+
+        created = skipped = failed = 0
+
+        clients = Client.objects.exclude(photo="").exclude(photo__isnull=True).only("id", "photo", "photo_thumb")
+
+        for client in clients.iterator(chunk_size=500):
+            if not options["force"] and thumbnails.is_current(client):
+                skipped += 1
+                continue
+
+            try:
+                name = thumbnails.make_thumbnail(client)
+            except Exception as ex:
+                failed += 1
+                self.stdout.write(self.style.WARNING(f"{client.id}: {ex}"))
+                continue
+
+            # update - სიგნალები (და ხელახალი გენერაცია) არ გაეშვება
+            Client.objects.filter(pk=client.pk).update(photo_thumb=name or None)
+            created += 1
+
+        self.stdout.write(
+            self.style.SUCCESS(f"შეიქმნა {created}, უკვე იყო {skipped}, შეცდომა {failed}")
+        )
@@ -8,6 +8,7 @@ from django.db import transaction
 from openpyxl import load_workbook
 
 from gymapp.models import *
+from gymapp.translit import translit_to_georgian
 
 
 HEADER_MAP = {
@@ -50,30 +51,6 @@ GENDER_MAP = {
 }
 
 
-TRANSLIT_SINGLE = {
-    "a": "ა", "b": "ბ", "g": "გ", "d": "დ", "e": "ე", "v": "ვ", "z": "ზ",
-    "i": "ი", "k": "კ", "l": "ლ", "m": "მ", "n": "ნ", "o": "ო", "p": "პ",
-    "r": "რ", "s": "ს", "t": "ტ", "u": "უ", "f": "ფ", "q": "ქ", "y": "ყ",
-    "c": "კ", "w": "ვ", "x": "ხ", "h": "ჰ",
-    "T": "თ", "S": "შ", "Z": "ძ", "W": "ჭ", "R": "ღ",
-}
-
-
-def translit_to_georgian(text):
-    if not text:
-        return ""
-
-    s = str(text).strip()
-    result = ""
-
-    for ch in s:
-        if ch == "'":
-            continue
-        result += TRANSLIT_SINGLE.get(ch, ch)
-
-    return result
-
-
 def clean_str(value):
     if value is None:
         return ""
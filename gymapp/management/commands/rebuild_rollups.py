@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from gymapp import rollups
+
+
+class Command(BaseCommand):
+    help = "შემოსავლისა და დასწრების დღიური ჯამების (DailyRevenue, DailyAttendance) თავიდან დათვლა"
+
+    def handle(self, *args, **options):
+        revenue_rows, attendance_rows = rollups.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f"შემოსავალი: {revenue_rows} მწკრივი, დასწრება: {attendance_rows} მწკრივი"
+        ))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from gymapp import search
+from gymapp.models import Client
+
+
+class Command(BaseCommand):
+    help = "კლიენტების ძებნის FTS ინდექსის (client_search) თავიდან აგება, მაგ. bulk_create-ის შემდეგ"
+
+    def handle(self, *args, **options):
+        if connection.vendor != "sqlite":
+            raise CommandError("FTS ინდექსი მხოლოდ SQLite-ზეა")
+
+        rows = Client.objects.values_list(
+            "id", "first_name", "last_name", "phone", "card_number", "passId"
+        ).iterator()
+
+        with transaction.atomic():
+            count = search.rebuild(rows)
+
+        self.stdout.write(self.style.SUCCESS(f"ინდექსში ჩაიწერა {count} კლიენტი"))
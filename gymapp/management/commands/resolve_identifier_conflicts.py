@@ -0,0 +1,53 @@
+from django.core.management.base import BaseCommand
+
+from gymapp import identifiers
+
+
+class Command(BaseCommand):
+    help = (
+        "ერთი და იმავე ბარათის/პირადი ნომრის მქონე კლიენტების ჩამოთვლა; "
+        "--keep-ით პ/ნ ერთ კლიენტს რჩება, დანარჩენებს ეშლება"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--keep", choices=("oldest", "newest"),
+            help="რომელ კლიენტს დარჩეს პ/ნ (ამის გარეშე მხოლოდ სია)",
+        )
+        parser.add_argument("--value", action="append", default=[], help="მხოლოდ ეს პ/ნ (შეიძლება რამდენჯერმე)")
+        parser.add_argument("--dry-run", action="store_true", help="მხოლოდ ჩვენება, ბაზა არ იცვლება")
+
+    def handle(self, *args, **options):
+        wanted = {identifiers.normalize_pass(v) for v in options["value"]}
+        conflicts = identifiers.duplicates()
+        if wanted:
+            conflicts = {key: ids for key, ids in conflicts.items() if key[1] in wanted}
+
+        if not conflicts:
+            self.stdout.write(self.style.SUCCESS("დუბლიკატები არ არის"))
+            return
+
+        keep = options["keep"]
+        for (kind, value), ids in sorted(conflicts.items()):
+            line = f"{kind} {value}: კლიენტები {', '.join(f'#{i}' for i in ids)}"
+
+            if kind != "pass":
+                # ბარათი unique ველია და ცარიელი მხოლოდ ერთს შეიძლება ჰქონდეს
+                self.stdout.write(self.style.WARNING(f"{line} - ბარათი ხელით შეცვალეთ"))
+                continue
+            if keep is None:
+                self.stdout.write(line)
+                continue
+
+            keep_id = ids[0] if keep == "oldest" else ids[-1]
+            if options["dry_run"]:
+                self.stdout.write(f"{line} -> დარჩება #{keep_id}")
+                continue
+
+            cleared = identifiers.give_pass(value, keep_id)
+            self.stdout.write(self.style.SUCCESS(
+                f"{line} -> დარჩა #{keep_id}, წაიშალა: {', '.join(f'#{i}' for i in cleared)}"
+            ))
+
+        if keep is None:
+            self.stdout.write("გადასაწყვეტად: --keep oldest|newest [--value პ/ნ] [--dry-run]")
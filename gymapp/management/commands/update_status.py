@@ -1,8 +1,8 @@
 from django.core.management.base import BaseCommand
 from django.utils import timezone
 
+from gymapp import sync_outbox
 from gymapp.models import ClientMembership
-from gymapp.models import ClientSync
 
 
 
@@ -29,25 +29,18 @@ class Command(BaseCommand):
 
             if expired:
 
+                # ZKT-დან წასაშლელ task-ს post_save სიგნალი ქმნის (gymapp/sync_outbox.py)
                 cm.status = "expired"
                 cm.save(update_fields=["status"])
 
-                # ZKT-დან წასაშლელი task
-                exists = ClientSync.objects.filter(
-                    client=cm.client,
-                    action="delete",
-                    status="pending"
-                ).exists()
-
-                if not exists:
-                    ClientSync.objects.create(
-                        client=cm.client,
-                        action="delete",
-                        status="pending"
-                    )
-
                 updated += 1
 
+        # status-ით აქტიური, მაგრამ ვადაგასული/ჯერ დაუწყებელი აბონემენტები
+        # კონტროლერზეც დღევანდელი მდგომარეობით უნდა იყოს (gymapp/sync_outbox.py)
+        sync_outbox.resync(
+            ClientMembership.objects.filter(status="active").values_list("client_id", flat=True)
+        )
+
         self.stdout.write(
             self.style.SUCCESS(f"შემოწმდა {cms.count()} აბონემენტი. ვადაგასული გახდა {updated}")
         )
\ No newline at end of file
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from gym.services import transaction_backfill, zk_device
+
+
+class Command(BaseCommand):
+    help = "კონტროლერის Transaction ცხრილიდან ახალი ჩანაწერების CheckIn-ებად იმპორტი"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--device", help="ZK_DEVICES-ის name (ნაგულისხმევად ყველა)")
+        parser.add_argument("--full", action="store_true", help="მთლიანი ცხრილის წაკითხვა unread-ის ნაცვლად")
+        parser.add_argument("--trim", action="store_true", help="იმპორტის შემდეგ ჩანაწერების წაშლა კონტროლერიდან")
+
+    def handle(self, *args, **options):
+
+        names = [options["device"]] if options["device"] else [d["name"] for d in zk_device.devices()]
+
+        for name in names:
+            result = transaction_backfill.backfill(device=name, full=options["full"], trim=options["trim"])
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"{result['device']}: წაკითხული {result['read']}, იმპორტირებული {result['imported']}, "
+                    f"წაშლილი {result['trimmed']}, ბოლო დრო {result['last_time']} ({result['seconds']} წმ)"
+                )
+            )
@@ -0,0 +1,315 @@
+import asyncio
+import contextlib
+import io
+import random
+import threading
+import time
+from datetime import timedelta
+
+from channels.layers import get_channel_layer
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, close_old_connections, transaction
+from django.utils import timezone
+
+from gym.services import card_cache, checkin_writer, tap_metrics, zk_listener
+from gymapp import identifiers, search
+from gymapp.models import CheckIn, Client, ClientMembership, ClientSync, Membership
+
+
+# სინთეტიკური კლიენტების ბარათები: LGA - აქტიური, LGE - ვადაგასული, LGL - ვიზიტებიანი
+PREFIXES = {
+    "known": "LGA",
+    "expired": "LGE",
+    "limited": "LGL",
+}
+UNKNOWN_PREFIX = "LGX"
+
+DEFAULT_MIX = "known=70,unknown=10,expired=10,limited=10"
+
+# ცალკე ჯგუფი: საერთო channel layer-ით (SQLite) სინთეტიკური ტაპები რეცეფციის
+# ეკრანებს ("cards") არ უნდა მიუვიდეს
+LOADGEN_GROUP = "loadgen.cards"
+
+
+def parse_mix(value):
+    mix = {}
+    for part in value.split(","):
+        kind, _, weight = part.partition("=")
+        kind = kind.strip()
+        if kind not in PREFIXES and kind != "unknown":
+            raise CommandError(f"უცნობი ტიპი --mix-ში: {kind}")
+        mix[kind] = float(weight)
+    return mix
+
+
+def parse_burst(value):
+    # "წამი:ტაპები:ხანგრძლივობა", მაგ. 20:60:5 - მე-20 წამზე 60 ტაპი 5 წამში (ვარჯიშის დასრულება)
+    try:
+        at, count, spread = value.split(":")
+        return float(at), int(count), float(spread)
+    except ValueError:
+        raise CommandError(f"--burst ფორმატი: წამი:ტაპები:ხანგრძლივობა ({value})")
+
+
+def percentile(values, q):
+    if not values:
+        return None
+    ordered = sorted(values)
+    i = min(len(ordered) - 1, max(0, round(q * len(ordered)) - 1))
+    return ordered[i]
+
+
+def ms(value):
+    return "-" if value is None else f"{value * 1000:.2f}"
+
+
+class Command(BaseCommand):
+    help = (
+        "ბარათის ტაპების ნაკადის გაშვება listener-ის handle_card-ზე და admission-ის "
+        "დაყოვნების გაზომვა (p50/p95/p99). ბაზაში LG* ბარათიან სატესტო კლიენტებს ქმნის - "
+        "გაუშვით ბაზის ასლზე."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--clients", type=int, default=1000, help="სატესტო კლიენტები თითო ტიპზე")
+        parser.add_argument("--rate", type=float, default=20, help="საშუალო ტაპი წამში (Poisson)")
+        parser.add_argument("--duration", type=float, default=30, help="ხანგრძლივობა წამებში")
+        parser.add_argument("--mix", default=DEFAULT_MIX, help=f"ბარათების განაწილება ({DEFAULT_MIX})")
+        parser.add_argument("--burst", action="append", default=[], type=parse_burst,
+                            help="წამი:ტაპები:ხანგრძლივობა, შეიძლება რამდენჯერმე")
+        parser.add_argument("--writers", type=int, default=0,
+                            help="პარალელური ნაკადები, რომლებიც ბაზაში წერენ (რეცეფცია)")
+        parser.add_argument("--writer-rate", type=float, default=2, help="ჩაწერა წამში თითო ნაკადზე")
+        parser.add_argument("--seed", type=int, default=None)
+        parser.add_argument("--cleanup", action="store_true", help="სატესტო კლიენტების წაშლა და გასვლა")
+
+    # =========================
+    # სატესტო ბაზა
+    # =========================
+    def seed_clients(self, per_kind):
+        membership, _ = Membership.objects.get_or_create(
+            name="loadgen", membership_type="unlimited", defaults={"price": 0, "duration_days": 30}
+        )
+        limited, _ = Membership.objects.get_or_create(
+            name="loadgen limited", membership_type="limited", defaults={"price": 0, "visit_count": 12}
+        )
+
+        today = timezone.localdate()
+        existing = set(
+            Client.objects.filter(card_number__startswith="LG").values_list("card_number", flat=True)
+        )
+
+        clients = []
+        for kind, prefix in PREFIXES.items():
+            for i in range(per_kind):
+                card = f"{prefix}{i:06d}"
+                if card not in existing:
+                    clients.append(Client(first_name=kind, last_name=str(i), phone="0", card_number=card))
+
+        if not clients:
+            return 0
+
+        with transaction.atomic():
+            Client.objects.bulk_create(clients, batch_size=500)
+            created = Client.objects.filter(card_number__in=[c.card_number for c in clients])
+
+            memberships = []
+            for client in created:
+                if client.card_number.startswith(PREFIXES["known"]):
+                    memberships.append(ClientMembership(
+                        client=client, membership=membership, start_date=today,
+                        end_date=today + timedelta(days=30),
+                    ))
+                elif client.card_number.startswith(PREFIXES["expired"]):
+                    memberships.append(ClientMembership(
+                        client=client, membership=membership, start_date=today - timedelta(days=60),
+                        end_date=today - timedelta(days=30), status="expired",
+                    ))
+                else:
+                    memberships.append(ClientMembership(
+                        client=client, membership=limited, start_date=today, remaining_visits=12,
+                    ))
+            ClientMembership.objects.bulk_create(memberships, batch_size=500)
+
+            # bulk_create სიგნალებს არ აგზავნის - Client.current_*, იდენტიფიკატორები
+            # (quick check-in) და ძებნის ინდექსი ხელით
+            for client in created:
+                Client.refresh_current_membership(client.pk)
+                identifiers.sync_client(client)
+                search.index_client(client)
+
+        return len(clients)
+
+    def cleanup(self):
+        clients = Client.objects.filter(card_number__startswith="LG")
+        with transaction.atomic():
+            CheckIn.objects.filter(client__in=clients).delete()
+            ClientSync.objects.filter(client__in=clients).delete()
+            ClientMembership.objects.filter(client__in=clients).delete()
+            deleted, _ = clients.delete()
+            Membership.objects.filter(name__startswith="loadgen").delete()
+        return deleted
+
+    # =========================
+    # ტაპების განრიგი
+    # =========================
+    def schedule(self, rng, rate, duration, bursts, mix, per_kind):
+        times = []
+        t = 0.0
+        while rate > 0:
+            t += rng.expovariate(rate)
+            if t >= duration:
+                break
+            times.append(t)
+
+        for at, count, spread in bursts:
+            times.extend(at + rng.uniform(0, spread) for _ in range(count))
+
+        kinds = list(mix)
+        weights = [mix[k] for k in kinds]
+
+        taps = []
+        for offset in sorted(times):
+            kind = rng.choices(kinds, weights)[0]
+            if kind == "unknown":
+                card = f"{UNKNOWN_PREFIX}{rng.randrange(10 ** 6):06d}"
+            else:
+                card = f"{PREFIXES[kind]}{rng.randrange(per_kind):06d}"
+            taps.append((offset, card))
+        return taps
+
+    # =========================
+    # გაშვება
+    # =========================
+    async def replay(self, taps):
+        channel_layer = get_channel_layer()
+
+        # ერთი "ეკრანი", რომ group_send-ს მიმღები ჰყავდეს და რიგი არ გაივსოს
+        screen = await channel_layer.new_channel()
+        await channel_layer.group_add(LOADGEN_GROUP, screen)
+
+        async def drain():
+            while True:
+                message = await channel_layer.receive(screen)
+                tap_metrics.delivered(message.get("trace"))
+
+        drainer = asyncio.ensure_future(drain())
+
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        service = []
+        admission = []
+
+        # device_worker-ის მსგავსად ერთ ნაკადში, მიმდევრობით
+        for offset, card in taps:
+            delay = started + offset - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+            t = time.perf_counter()
+            await zk_listener.handle_card(card, channel_layer, device="loadgen", door=1,
+                                          polled=time.time(), group=LOADGEN_GROUP, record=False)
+            done = time.perf_counter()
+
+            service.append(done - t)
+            # ტაპიდან პასუხამდე, რიგში ლოდინის ჩათვლით
+            admission.append(loop.time() - (started + offset))
+
+        drainer.cancel()
+        await channel_layer.group_discard(LOADGEN_GROUP, screen)
+        return service, admission, loop.time() - started
+
+    def writer(self, stop, rate, clients, results):
+        rng = random.Random()
+        while not stop.is_set():
+            t = time.perf_counter()
+            try:
+                with transaction.atomic():
+                    Client.objects.filter(id=rng.choice(clients)).update(comment=f"loadgen {time.time()}")
+            except OperationalError:
+                results["errors"] += 1
+            results["waits"].append(time.perf_counter() - t)
+            stop.wait(1 / rate)
+        close_old_connections()
+
+    def handle(self, *args, **options):
+
+        if options["cleanup"]:
+            self.stdout.write(self.style.SUCCESS(f"წაიშალა {self.cleanup()} ჩანაწერი"))
+            return
+
+        per_kind = options["clients"]
+        mix = parse_mix(options["mix"])
+        rng = random.Random(options["seed"])
+
+        created = self.seed_clients(per_kind)
+        self.stdout.write(f"სატესტო კლიენტები: +{created}")
+
+        card_cache.warm()
+
+        taps = self.schedule(rng, options["rate"], options["duration"], options["burst"], mix, per_kind)
+        self.stdout.write(f"{len(taps)} ტაპი {options['duration']} წამში...")
+
+        tap_metrics.reset()
+        checkins_before = checkin_writer.stats["rows"]
+        debounced_before = zk_listener.stats["debounced"]
+        lock_before = checkin_writer.stats["lock_wait_ms"]
+
+        stop = threading.Event()
+        writer_results = {"errors": 0, "waits": []}
+        writer_ids = list(
+            Client.objects.filter(card_number__startswith="LG").values_list("id", flat=True)[:1000]
+        )
+        writers = [
+            threading.Thread(target=self.writer, args=(stop, options["writer_rate"], writer_ids, writer_results))
+            for _ in range(options["writers"])
+        ]
+        for w in writers:
+            w.start()
+
+        # listener ყოველ ტაპზე print-ს აკეთებს - კონსოლი გაზომვას ამახინჯებს
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                service, admission, elapsed = asyncio.run(self.replay(taps))
+        finally:
+            stop.set()
+            for w in writers:
+                w.join()
+
+        flush_started = time.perf_counter()
+        checkin_writer.flush()
+        flush_tail = time.perf_counter() - flush_started
+
+        metrics = tap_metrics.snapshot()
+        busy = sum(service)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"ტაპები: {len(taps)} / {elapsed:.1f} წმ = {len(taps) / elapsed:.1f} წამში "
+            f"(ერთი ნაკადის ტევადობა ≈ {len(taps) / busy:.0f} ტაპი/წმ)" if busy else "ტაპები: 0"
+        ))
+        self.stdout.write(
+            "admission (ტაპი -> პასუხი, რიგის ჩათვლით) ms: "
+            f"p50 {ms(percentile(admission, 0.5))}  p95 {ms(percentile(admission, 0.95))}  "
+            f"p99 {ms(percentile(admission, 0.99))}  max {ms(max(admission, default=None))}"
+        )
+        self.stdout.write(
+            "handle_card ms: "
+            f"p50 {ms(percentile(service, 0.5))}  p95 {ms(percentile(service, 0.95))}  "
+            f"p99 {ms(percentile(service, 0.99))}"
+        )
+        self.stdout.write(
+            f"CheckIn: {checkin_writer.stats['rows'] - checkins_before} ჩაწერა, "
+            f"განმეორებითი ტაპი {zk_listener.stats['debounced'] - debounced_before}, "
+            f"max flush {checkin_writer.stats['max_flush_ms']} ms, "
+            f"ბოლო flush {flush_tail * 1000:.1f} ms, "
+            f"lock-ის ლოდინი {checkin_writer.stats['lock_wait_ms'] - lock_before:.0f} ms, "
+            f"შეცდომები {checkin_writer.stats['errors']}"
+        )
+        if writers:
+            waits = writer_results["waits"]
+            self.stdout.write(
+                f"writers: {len(waits)} ჩაწერა, ms p50 {ms(percentile(waits, 0.5))} "
+                f"p95 {ms(percentile(waits, 0.95))} p99 {ms(percentile(waits, 0.99))}, "
+                f"locked {writer_results['errors']}"
+            )
+        self.stdout.write(f"errors: {metrics['errors']}")
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from gym.services import device_sync
+
+
+class Command(BaseCommand):
+    help = "ბაზის აქტიური კლიენტების შეჯერება კონტროლერის User/UserAuthorize ცხრილებთან"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--device", help="ZK_DEVICES-ის name (ნაგულისხმევად ყველა)")
+        parser.add_argument("--dry-run", action="store_true", help="მხოლოდ სხვაობის ჩვენება")
+
+    def handle(self, *args, **options):
+
+        result = device_sync.reconcile(device=options["device"], dry_run=options["dry_run"])
+
+        for row in result["devices"]:
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"{row['device']}: კონტროლერზე {row['on_device']}, ბაზაში {result['desired']} -> "
+                    f"დამატება {row['adds']}, ბარათის შეცვლა {row['changes']}, წაშლა {row['removes']}"
+                )
+            )
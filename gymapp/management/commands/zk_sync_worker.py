@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from gym.services import sync_worker
+
+
+class Command(BaseCommand):
+    help = "ClientSync რიგის მუდმივი გაგზავნა კონტროლერებზე (retry/backoff-ით)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="ერთი გაშვება და გასვლა")
+        parser.add_argument("--force", action="store_true", help="backoff-ში მყოფი ჩანაწერებიც")
+
+    def handle(self, *args, **options):
+
+        if options["once"]:
+            result = sync_worker.run_once(force=options["force"])
+            self.stdout.write(
+                self.style.SUCCESS(f"გაიგზავნა {result['done']}, შეცდომა {result['errors']}")
+            )
+            return
+
+        self.stdout.write("sync worker started (Ctrl+C - გაჩერება)")
+        if options["force"]:
+            sync_worker.wake(force=True)
+
+        try:
+            sync_worker.run_forever()
+        except KeyboardInterrupt:
+            sync_worker.stop()
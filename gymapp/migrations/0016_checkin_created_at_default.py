@@ -0,0 +1,19 @@
+# Generated by Django 5.2.11 on 2026-10-18 04:06
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gymapp', '0015_cardpayment_method'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='checkin',
+            name='created_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, verbose_name='შესვლის დრო'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.11 on 2026-10-18 04:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gymapp', '0016_checkin_created_at_default'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='checkin',
+            name='device',
+            field=models.CharField(blank=True, default='', max_length=50, verbose_name='მოწყობილობა'),
+        ),
+        migrations.AddField(
+            model_name='checkin',
+            name='door',
+            field=models.PositiveSmallIntegerField(blank=True, null=True, verbose_name='კარი'),
+        ),
+    ]
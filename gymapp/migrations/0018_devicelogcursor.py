@@ -0,0 +1,27 @@
+# Generated by Django 5.2.11 on 2026-10-18 04:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gymapp', '0017_checkin_device_door'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DeviceLogCursor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('device', models.CharField(max_length=50, unique=True, verbose_name='მოწყობილობა')),
+                ('last_time', models.DateTimeField(blank=True, null=True, verbose_name='ბოლო ჩანაწერის დრო')),
+                ('imported', models.PositiveIntegerField(default=0, verbose_name='იმპორტირებული')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='checkin',
+            index=models.Index(fields=['client', 'created_at'], name='gymapp_chec_client__bf9574_idx'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.11 on 2026-10-18 04:11
+
+from django.db import migrations, models
+
+
+def close_duplicate_open_rows(apps, schema_editor):
+    # კლიენტზე რჩება მხოლოდ ბოლო ღია ჩანაწერი, დანარჩენები უქმდება
+    ClientSync = apps.get_model("gymapp", "ClientSync")
+
+    latest = {}
+    duplicates = []
+    for row_id, client_id in (
+        ClientSync.objects.filter(status__in=["pending", "error"])
+        .order_by("-id")
+        .values_list("id", "client_id")
+    ):
+        if client_id in latest:
+            duplicates.append(row_id)
+        else:
+            latest[client_id] = row_id
+
+    ClientSync.objects.filter(id__in=duplicates).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gymapp', '0018_devicelogcursor'),
+    ]
+
+    operations = [
+        migrations.RunPython(close_duplicate_open_rows, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='clientsync',
+            constraint=models.UniqueConstraint(condition=models.Q(('status__in', ['pending', 'error'])), fields=('client',), name='one_open_sync_per_client'),
+        ),
+    ]
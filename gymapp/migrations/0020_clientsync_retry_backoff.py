@@ -0,0 +1,36 @@
+# Generated by Django 5.2.11 on 2026-10-18 04:13
+
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import F
+
+
+def queued_at_from_created_at(apps, schema_editor):
+    ClientSync = apps.get_model("gymapp", "ClientSync")
+    ClientSync.objects.update(queued_at=F("created_at"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gymapp', '0019_clientsync_one_open_per_client'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='clientsync',
+            name='attempts',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='clientsync',
+            name='next_attempt_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='clientsync',
+            name='queued_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.RunPython(queued_at_from_created_at, migrations.RunPython.noop),
+    ]
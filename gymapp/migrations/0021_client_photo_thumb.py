@@ -0,0 +1,18 @@
+# Generated by Django 5.2.11 on 2026-10-18 04:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gymapp', '0020_clientsync_retry_backoff'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='client',
+            name='photo_thumb',
+            field=models.ImageField(blank=True, editable=False, null=True, upload_to='Clients Pictures/thumbs/', verbose_name='ფოტოს ესკიზი'),
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 5.2.11 on 2026-10-18 04:27
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def fill_current_membership(apps, schema_editor):
+    # Client.current_* არსებული status="active" აბონემენტებიდან
+    Client = apps.get_model("gymapp", "Client")
+    ClientMembership = apps.get_model("gymapp", "ClientMembership")
+
+    cms = ClientMembership.objects.select_related("membership").filter(status="active").order_by("-created_at")
+    seen = set()
+    for cm in cms.iterator():
+        if cm.client_id in seen:
+            continue
+        seen.add(cm.client_id)
+        Client.objects.filter(pk=cm.client_id).update(
+            current_membership=cm,
+            current_membership_type=cm.membership.membership_type,
+            current_start_date=cm.start_date,
+            current_end_date=cm.end_date,
+            current_remaining_visits=cm.remaining_visits,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gymapp', '0021_client_photo_thumb'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='client',
+            name='current_end_date',
+            field=models.DateField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='client',
+            name='current_membership',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='gymapp.clientmembership', verbose_name='მიმდინარე აბონემენტი'),
+        ),
+        migrations.AddField(
+            model_name='client',
+            name='current_membership_type',
+            field=models.CharField(blank=True, default='', editable=False, max_length=20),
+        ),
+        migrations.AddField(
+            model_name='client',
+            name='current_remaining_visits',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='client',
+            name='current_start_date',
+            field=models.DateField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(fill_current_membership, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.11 on 2026-10-18 04:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gymapp', '0022_client_current_membership'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='checkin',
+            index=models.Index(fields=['created_at', 'id'], name='gymapp_chec_created_3fb34c_idx'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    # ცხრილს და მის შევსებას post_migrate ასრულებს (gymapp.search.ensure_index),
+    # რომ migration ცოცხალ კოდზე (tokenizer, ნორმალიზაცია) არ იყოს დამოკიდებული
+    pass
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    schema_editor.execute("DROP TABLE IF EXISTS client_search")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gymapp', '0023_checkin_created_at_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,80 @@
+# Generated by Django 5.2.11 on 2026-10-18 04:31
+
+import re
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+# gymapp.identifiers-ის ნორმალიზაციის ასლი: migration ცოცხალ კოდზე არ უნდა იყოს დამოკიდებული
+UNIQUE_KINDS = ("card", "pass")
+
+
+def _strip_excel(value):
+    text = re.sub(r"\s+", "", str(value or ""))
+    if text.endswith(".0"):
+        text = text[:-2]
+    return text
+
+
+def identifiers_for(card_number, pass_id, phone):
+    card = _strip_excel(card_number) if card_number else ""
+    if card.isdigit():
+        card = card.lstrip("0") or "0"
+    else:
+        card = card.upper()
+
+    digits = re.sub(r"\D", "", str(phone or ""))
+
+    values = {
+        "card": card,
+        "pass": _strip_excel(pass_id).upper() if pass_id else "",
+        "phone": digits[-9:] if len(digits) > 9 else digits,
+    }
+    return {kind: value for kind, value in values.items() if value and value != "0"}
+
+
+def fill_identifiers(apps, schema_editor):
+    # ბარათის/პ.ნ. დუბლიკატებიდან პირველი (უფრო ძველი) კლიენტი რჩება,
+    # დანარჩენები იბეჭდება (manage.py resolve_identifier_conflicts)
+    Client = apps.get_model("gymapp", "Client")
+    ClientIdentifier = apps.get_model("gymapp", "ClientIdentifier")
+
+    taken = set()
+    rows = []
+    for client_id, card_number, pass_id, phone in (
+        Client.objects.order_by("id").values_list("id", "card_number", "passId", "phone").iterator()
+    ):
+        for kind, value in identifiers_for(card_number, pass_id, phone).items():
+            if kind in UNIQUE_KINDS:
+                if (kind, value) in taken:
+                    print("identifier conflict:", client_id, kind, value)
+                    continue
+                taken.add((kind, value))
+            rows.append(ClientIdentifier(client_id=client_id, kind=kind, value=value))
+
+    ClientIdentifier.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gymapp', '0024_client_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ClientIdentifier',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('card', 'ბარათი'), ('pass', 'პირადი ნომერი'), ('phone', 'ტელეფონი')], max_length=10)),
+                ('value', models.CharField(max_length=100)),
+                ('client', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='identifiers', to='gymapp.client', verbose_name='კლიენტი')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['kind', 'value'], name='gymapp_clie_kind_a2324d_idx')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('kind__in', ['card', 'pass'])), fields=('kind', 'value'), name='unique_card_pass_identifier')],
+            },
+        ),
+        migrations.RunPython(fill_identifiers, migrations.RunPython.noop),
+    ]
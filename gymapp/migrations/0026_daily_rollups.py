@@ -0,0 +1,115 @@
+# Generated by Django 5.2.11 on 2026-10-18 04:34
+
+from collections import Counter, defaultdict
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+
+def fill_rollups(apps, schema_editor):
+    # gymapp.rollups.rebuild()-ის ასლი ისტორიულ მოდელებზე
+    Payment = apps.get_model("gymapp", "Payment")
+    CardPayment = apps.get_model("gymapp", "CardPayment")
+    CheckIn = apps.get_model("gymapp", "CheckIn")
+    DailyRevenue = apps.get_model("gymapp", "DailyRevenue")
+    DailyAttendance = apps.get_model("gymapp", "DailyAttendance")
+
+    zero = Decimal("0.00")
+    tz = timezone.get_current_timezone()
+
+    revenue = defaultdict(lambda: {"count": 0, "amount": zero, "membership_amount": zero, "trainer_fee": zero})
+
+    payments = (
+        Payment.objects.exclude(operation_date=None)
+        .annotate(day=TruncDate("operation_date", tzinfo=tz))
+        .values("day", "method", "membership_id", "trainer_id")
+        .annotate(c=Count("id"), a=Sum("amount"), ma=Sum("membership_amount"), tf=Sum("trainer_fee"))
+        .order_by()
+    )
+    for r in payments:
+        row = revenue[(r["day"], "payment", r["method"] or "", r["membership_id"] or 0, r["trainer_id"] or 0)]
+        row["count"] += r["c"]
+        row["amount"] += r["a"] or zero
+        row["membership_amount"] += r["ma"] or zero
+        row["trainer_fee"] += r["tf"] or zero
+
+    card_payments = (
+        CardPayment.objects.exclude(operation_date=None)
+        .annotate(day=TruncDate("operation_date", tzinfo=tz))
+        .values("day", "method")
+        .annotate(c=Count("id"), a=Sum("amount"))
+        .order_by()
+    )
+    for r in card_payments:
+        row = revenue[(r["day"], "card_payment", r["method"] or "", 0, 0)]
+        row["count"] += r["c"]
+        row["amount"] += r["a"] or zero
+
+    attendance = Counter()
+    checkins = (
+        CheckIn.objects.annotate(day=TruncDate("created_at", tzinfo=tz))
+        .values("day", "device")
+        .annotate(c=Count("id"))
+        .order_by()
+    )
+    for r in checkins:
+        attendance[(r["day"], r["device"] or "")] += r["c"]
+
+    DailyRevenue.objects.bulk_create(
+        [
+            DailyRevenue(
+                day=day, source=source, method=method, membership_id=membership_id,
+                trainer_id=trainer_id, **values,
+            )
+            for (day, source, method, membership_id, trainer_id), values in revenue.items()
+        ],
+        batch_size=1000,
+    )
+    DailyAttendance.objects.bulk_create(
+        [DailyAttendance(day=day, device=device, count=count) for (day, device), count in attendance.items()],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gymapp', '0025_client_identifier'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyAttendance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(verbose_name='დღე')),
+                ('device', models.CharField(blank=True, default='', max_length=50)),
+                ('count', models.IntegerField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('day', 'device'), name='unique_daily_attendance_key')],
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyRevenue',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(verbose_name='დღე')),
+                ('source', models.CharField(choices=[('payment', 'გადახდა'), ('card_payment', 'ბარათის გადახდა')], max_length=20)),
+                ('method', models.CharField(blank=True, default='', max_length=20)),
+                ('membership_id', models.IntegerField(default=0)),
+                ('trainer_id', models.IntegerField(default=0)),
+                ('count', models.IntegerField(default=0)),
+                ('amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('membership_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('trainer_fee', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('day', 'source', 'method', 'membership_id', 'trainer_id'), name='unique_daily_revenue_key')],
+            },
+        ),
+        migrations.RunPython(fill_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,57 @@
+import re
+from collections import defaultdict
+
+from django.db import migrations
+
+
+# gymapp.identifiers-ის ნორმალიზაციის ასლი (იხ. 0025_client_identifier)
+def _strip_excel(value):
+    text = re.sub(r"\s+", "", str(value or ""))
+    if text.endswith(".0"):
+        text = text[:-2]
+    return text
+
+
+def _card(value):
+    text = _strip_excel(value)
+    if text.isdigit():
+        return text.lstrip("0") or "0"
+    return text.upper()
+
+
+def _pass(value):
+    return _strip_excel(value).upper()
+
+
+def report_duplicates(apps, schema_editor):
+    """
+    0025-მა დუბლიკატი ბარათით/პ.ნ.-ით იდენტიფიკატორი მხოლოდ ყველაზე ძველ
+    კლიენტს მისცა. Client-ის ჩანაწერებს აქ არ ვცვლით - საერთო პ/ნ ერთი
+    ადამიანის დამტკიცება არ არის. სია იბეჭდება, გადაწყვეტა ხელითაა:
+    manage.py resolve_identifier_conflicts.
+    """
+    Client = apps.get_model("gymapp", "Client")
+
+    values = defaultdict(list)
+    for client_id, card_number, pass_id in (
+        Client.objects.order_by("id").values_list("id", "card_number", "passId").iterator()
+    ):
+        if pass_id and _pass(pass_id):
+            values[("pass", _pass(pass_id))].append(client_id)
+        if card_number and _card(card_number) != "0":
+            values[("card", _card(card_number))].append(client_id)
+
+    for (kind, value), ids in values.items():
+        if len(ids) > 1:
+            print("duplicate identifier:", kind, value, ids)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gymapp', '0027_card_cache_change'),
+    ]
+
+    operations = [
+        migrations.RunPython(report_duplicates, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.11 on 2026-10-18 04:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gymapp', '0028_report_duplicate_identifiers'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='devicelogcursor',
+            name='reading',
+            field=models.BooleanField(default=False, verbose_name='წაკითხვა დაუსრულებელია'),
+        ),
+    ]
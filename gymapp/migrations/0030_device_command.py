@@ -0,0 +1,30 @@
+# Generated by Django 5.2.11 on 2026-10-18 04:58
+
+import django.core.serializers.json
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gymapp', '0029_devicelogcursor_reading'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DeviceCommand',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('command', models.CharField(max_length=30)),
+                ('args', models.JSONField(default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('status', models.CharField(choices=[('pending', 'რიგში'), ('running', 'სრულდება'), ('done', 'შესრულდა'), ('failed', 'შეცდომა')], default='pending', max_length=10)),
+                ('result', models.JSONField(blank=True, encoder=django.core.serializers.json.DjangoJSONEncoder, null=True)),
+                ('error', models.TextField(blank=True, default='')),
+                ('expires_at', models.DateTimeField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'expires_at'], name='gymapp_devi_status_d375e5_idx')],
+            },
+        ),
+    ]
@@ -1,3 +1,4 @@
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
 from django.utils.timezone import now
 from django.db.models import Q
@@ -115,19 +116,44 @@ class ClientMembership(models.Model):
         if self.status != "active":
             return False
 
-        today = timezone.localdate()
-        mtype = self.membership.membership_type
+        return membership_active_on(
+            self.membership.membership_type, self.start_date, self.end_date, self.remaining_visits
+        )
 
-        if mtype == "limited":
-            return (self.remaining_visits or 0) > 0
 
-        if mtype == "unlimited":
-            return self.end_date and self.end_date >= today
+def membership_active_on(mtype, start_date, end_date, remaining_visits, today=None):
+    """
+    status="active" აბონემენტი დღეს (today) მოქმედია თუ არა - ტიპის მიხედვით.
+    """
+    today = today or timezone.localdate()
 
-        if mtype == "fixed":
-            return self.start_date <= today <= self.end_date
+    if mtype == "limited":
+        return (remaining_visits or 0) > 0
 
-        return False
+    if mtype == "unlimited":
+        return bool(end_date and end_date >= today)
+
+    if mtype == "fixed":
+        return bool(start_date and end_date and start_date <= today <= end_date)
+
+    return False
+
+
+def membership_active_q(prefix="", today=None):
+    """
+    membership_active_on()-ის იგივე წესი Q ფილტრად, prefix - მაგ. "current_".
+    """
+    today = today or timezone.localdate()
+
+    return (
+        Q(**{f"{prefix}membership_type": "limited", f"{prefix}remaining_visits__gt": 0})
+        | Q(**{f"{prefix}membership_type": "unlimited", f"{prefix}end_date__gte": today})
+        | Q(**{
+            f"{prefix}membership_type": "fixed",
+            f"{prefix}start_date__lte": today,
+            f"{prefix}end_date__gte": today,
+        })
+    )
 
 
 
@@ -154,6 +180,11 @@ class Client(models.Model):
 
     photo = models.ImageField("ფოტოსურათი", upload_to="Clients Pictures/", null=True, blank=True)
 
+    # ბარათის ეკრანისთვის შემცირებული ასლი (gym/services/thumbnails.py)
+    photo_thumb = models.ImageField(
+        "ფოტოს ესკიზი", upload_to="Clients Pictures/thumbs/", null=True, blank=True, editable=False
+    )
+
     comment = models.TextField("კომენტარი", blank=True, default="")  # ✅ დაამატე
 
     # --- აბონემენტის ველები (რაც უკვე გვქონდა)
@@ -163,16 +194,81 @@ class Client(models.Model):
     # )
     created_at = models.DateTimeField("შექმნის დრო", auto_now_add=True)
 
+    # მიმდინარე (status="active") აბონემენტის ასლი - ClientMembership-ის ყოველ
+    # ცვლილებაზე სიგნალი ანახლებს (gymapp/signals.py), ამიტომ კლიენტების სიას
+    # აბონემენტების ცალკე ჩატვირთვა აღარ სჭირდება
+    current_membership = models.ForeignKey(
+        "ClientMembership", on_delete=models.SET_NULL, null=True, blank=True,
+        related_name="+", editable=False, verbose_name="მიმდინარე აბონემენტი",
+    )
+    current_membership_type = models.CharField(max_length=20, blank=True, default="", editable=False)
+    current_start_date = models.DateField(null=True, blank=True, editable=False)
+    current_end_date = models.DateField(null=True, blank=True, editable=False)
+    current_remaining_visits = models.PositiveIntegerField(null=True, blank=True, editable=False)
+
+    CURRENT_FIELDS = (
+        "current_membership",
+        "current_membership_type",
+        "current_start_date",
+        "current_end_date",
+        "current_remaining_visits",
+    )
+
+    @staticmethod
+    def current_values(cm):
+        if cm is None:
+            return {
+                "current_membership": None,
+                "current_membership_type": "",
+                "current_start_date": None,
+                "current_end_date": None,
+                "current_remaining_visits": None,
+            }
+        return {
+            "current_membership": cm,
+            "current_membership_type": cm.membership.membership_type,
+            "current_start_date": cm.start_date,
+            "current_end_date": cm.end_date,
+            "current_remaining_visits": cm.remaining_visits,
+        }
+
+    @classmethod
+    def refresh_current_membership(cls, client_id, client=None):
+        """
+        current_* ველების გადაწერა ბაზიდან (update-ით, Client-ის სიგნალების გარეშე).
+        client - მეხსიერებაში არსებული ობიექტი, რომელიც იმავე მნიშვნელობებს იღებს.
+        """
+        cm = (
+            ClientMembership.objects.select_related("membership")
+            .filter(client_id=client_id, status="active")
+            .first()
+        )
+        values = cls.current_values(cm)
+        cls.objects.filter(pk=client_id).update(**values)
+
+        if client is not None:
+            for field, value in values.items():
+                setattr(client, field, value)
+
     @property
-    def active_membership(self):
+    def current_is_active(self):
+        return self.current_membership_id is not None and membership_active_on(
+            self.current_membership_type,
+            self.current_start_date,
+            self.current_end_date,
+            self.current_remaining_visits,
+        )
 
-        cms = self.memberships.select_related("membership").all()
+    @property
+    def active_membership(self):
 
-        for cm in cms:
-            if cm.is_active():
-                return cm
+        if not self.current_is_active:
+            return None
 
-        return None
+        cm = self.current_membership
+        # cm.save()-ის სიგნალი ამ ობიექტის current_* ველებსაც განაახლებს
+        cm.client = self
+        return cm
 
     @property
     def has_active_membership(self):
@@ -242,12 +338,58 @@ class CheckIn(models.Model):
         Client, on_delete=models.PROTECT,
         related_name="checkins", verbose_name="კლიენტი"
     )
-    created_at = models.DateTimeField("შესვლის დრო", auto_now_add=True)
+    # listener-ის write-behind რიგი tap-ის დროს თვითონ წერს (auto_now_add-ს გადაფარავდა)
+    created_at = models.DateTimeField("შესვლის დრო", default=timezone.now)
+
+    # რომელი კონტროლერიდან/კარიდან შემოვიდა (settings.ZK_DEVICES), ხელით check-in-ზე ცარიელია
+    device = models.CharField("მოწყობილობა", max_length=50, blank=True, default="")
+    door = models.PositiveSmallIntegerField("კარი", null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["client", "created_at"]),
+            # /api/checkins/ გვერდები და თარიღის ფილტრები
+            models.Index(fields=["created_at", "id"]),
+        ]
 
     def __str__(self):
         return f"{self.client} - {self.created_at.strftime('%Y-%m-%d %H:%M')}"
 
 
+class ClientIdentifier(models.Model):
+    """
+    კლიენტის ნორმალიზებული იდენტიფიკატორები ზუსტი ძებნისთვის (gymapp/identifiers.py).
+    ბარათი და პირადი ნომერი უნიკალურია, ტელეფონი - არა (ოჯახის წევრები).
+    """
+
+    KIND_CHOICES = (
+        ("card", "ბარათი"),
+        ("pass", "პირადი ნომერი"),
+        ("phone", "ტელეფონი"),
+    )
+
+    client = models.ForeignKey(
+        "Client", on_delete=models.CASCADE, related_name="identifiers", verbose_name="კლიენტი"
+    )
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    value = models.CharField(max_length=100)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["kind", "value"]),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["kind", "value"],
+                condition=Q(kind__in=["card", "pass"]),
+                name="unique_card_pass_identifier",
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.kind}: {self.value}"
+
+
 class ClientSync(models.Model):
 
     ACTION_CHOICES = (
@@ -284,5 +426,146 @@ class ClientSync(models.Model):
 
     synced_at = models.DateTimeField(null=True, blank=True)
 
+    # როდის გახდა ბოლოს გასაგზავნი (lag-ისთვის, იხ. /sync/status/)
+    queued_at = models.DateTimeField(default=timezone.now)
+
+    # წარუმატებელი მცდელობები და შემდეგი მცდელობის დრო (exponential backoff)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            # outbox: კლიენტზე მაქსიმუმ ერთი გასაგზავნი მდგომარეობა (gymapp/sync_outbox.py)
+            models.UniqueConstraint(
+                fields=["client"],
+                condition=Q(status__in=["pending", "error"]),
+                name="one_open_sync_per_client"
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.client} • {self.action} • {self.status}"
+
+
+class DeviceLogCursor(models.Model):
+    """
+    კონტროლერის Transaction ცხრილიდან ბოლოს იმპორტირებული ჩანაწერის დრო
+    (იხ. gym/services/transaction_backfill.py).
+    """
+    device = models.CharField("მოწყობილობა", max_length=50, unique=True)
+    last_time = models.DateTimeField("ბოლო ჩანაწერის დრო", null=True, blank=True)
+    imported = models.PositiveIntegerField("იმპორტირებული", default=0)
+    # unread-ით წაკითხვა დაიწყო და commit ჯერ არ მომხდარა
+    reading = models.BooleanField("წაკითხვა დაუსრულებელია", default=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.device} • {self.last_time}"
+
+
+class DeviceCommand(models.Model):
+    """
+    კონტროლერის ბრძანება worker-იდან, რომელიც listener-ის lock-ს არ ფლობს.
+    მფლობელი პროცესი ასრულებს და შედეგს აქვე წერს (gym/services/device_commands.py).
+    """
+
+    STATUS_CHOICES = (
+        ("pending", "რიგში"),
+        ("running", "სრულდება"),
+        ("done", "შესრულდა"),
+        ("failed", "შეცდომა"),
+    )
+
+    command = models.CharField(max_length=30)
+    args = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="pending")
+    result = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    error = models.TextField(blank=True, default="")
+    # ვადაგასულ ბრძანებას (მაგ. კარის გაღება) მფლობელი აღარ ასრულებს
+    expires_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["status", "expires_at"])]
+
+    def __str__(self):
+        return f"{self.command} • {self.status}"
+
+
+class ReportCacheVersion(models.Model):
+    """
+    ცხრილის ვერსია ანგარიშების cache-ისთვის (gymapp/report_cache.py) - ბაზაში,
+    რომ ერთ worker-ში ჩაწერამ სხვა worker-ების cache-იც გააუქმოს.
+    """
+    table = models.CharField(max_length=50, unique=True)
+    version = models.PositiveBigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.table} • {self.version}"
+
+
+class CardCacheChange(models.Model):
+    """
+    listener-ის ბარათების ინდექსის (gym/services/card_cache.py) ცვლილებების
+    ჟურნალი: Client/ClientMembership-ის ჩაწერა ნებისმიერ worker-ში აქ
+    ემატება, listener-ის პროცესი კი ახალ ჩანაწერებს ყოველ წამს კითხულობს.
+    """
+    client_id = models.IntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.client_id} • {self.created_at}"
+
+
+class DailyRevenue(models.Model):
+    """
+    შემოსავლის დღიური ჯამი (ადგილობრივი დღე): წყარო × მეთოდი × აბონემენტი × ტრენერი.
+    membership_id/trainer_id - 0, თუ არ არის; method - "", თუ არ არის.
+    Payment/CardPayment-ის სიგნალები ანახლებს (gymapp/rollups.py), სრულად -
+    manage.py rebuild_rollups.
+    """
+
+    SOURCE_CHOICES = (
+        ("payment", "გადახდა"),
+        ("card_payment", "ბარათის გადახდა"),
+    )
+
+    day = models.DateField("დღე")
+    source = models.CharField(max_length=20, choices=SOURCE_CHOICES)
+    method = models.CharField(max_length=20, blank=True, default="")
+    membership_id = models.IntegerField(default=0)
+    trainer_id = models.IntegerField(default=0)
+
+    count = models.IntegerField(default=0)
+    amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    membership_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    trainer_fee = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["day", "source", "method", "membership_id", "trainer_id"],
+                name="unique_daily_revenue_key",
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.day} {self.source} {self.method} {self.amount}"
+
+
+class DailyAttendance(models.Model):
+    """
+    CheckIn-ების დღიური რაოდენობა მოწყობილობის მიხედვით ("" - ხელით).
+    """
+
+    day = models.DateField("დღე")
+    device = models.CharField(max_length=50, blank=True, default="")
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["day", "device"], name="unique_daily_attendance_key")
+        ]
+
     def __str__(self):
-        return f"{self.client} • {self.action} • {self.status}"
\ No newline at end of file
+        return f"{self.day} {self.device or '-'} {self.count}"
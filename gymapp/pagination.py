@@ -0,0 +1,54 @@
+"""
+სიების API-ის cursor (keyset) pagination.
+
+გვერდი ბოლო ჩანაწერის მნიშვნელობიდან იწყება (WHERE id < ... LIMIT),
+ამიტომ პასუხის ზომა და query-ის ფასი ცხრილის ზრდასთან არ იცვლება.
+
+    ?page_size=N    - გვერდის ზომა (მაქსიმუმ API_MAX_PAGE_SIZE)
+    ?cursor=...     - next/previous ბმულიდან
+    ?count=0|1      - ჯამური რაოდენობა (COUNT(*)), ნაგულისხმევად API_PAGE_COUNT
+"""
+from collections import OrderedDict
+
+from django.conf import settings
+from rest_framework.pagination import CursorPagination
+from rest_framework.response import Response
+
+
+class KeysetPagination(CursorPagination):
+    page_size = getattr(settings, "API_PAGE_SIZE", 50)
+    page_size_query_param = "page_size"
+    max_page_size = getattr(settings, "API_MAX_PAGE_SIZE", 500)
+    ordering = ("-id",)
+
+    count_query_param = "count"
+
+    def include_count(self, request):
+        value = request.query_params.get(self.count_query_param)
+        if value is None:
+            return getattr(settings, "API_PAGE_COUNT", True)
+        return value.lower() not in ("0", "false", "no", "off")
+
+    def paginate_queryset(self, queryset, request, view=None):
+        # filter/search-ის შემდეგ, გვერდად დაჭრამდე
+        self.count = queryset.count() if self.include_count(request) else None
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        payload = OrderedDict()
+        if self.count is not None:
+            payload["count"] = self.count
+        payload["next"] = self.get_next_link()
+        payload["previous"] = self.get_previous_link()
+        payload["results"] = data
+        return Response(payload)
+
+    def get_paginated_response_schema(self, schema):
+        response = super().get_paginated_response_schema(schema)
+        response["properties"]["count"] = {"type": "integer", "example": 123}
+        return response
+
+
+class CheckInPagination(KeysetPagination):
+    # შესვლები დროით (backfill-ით შემოტანილი ძველი CheckIn-ები id-ით ბოლოშია)
+    ordering = ("-created_at", "-id")
@@ -0,0 +1,168 @@
+"""
+ანგარიშების შედეგების in-process cache.
+
+თითო ცხრილს (Payment, CardPayment, CheckIn, ClientMembership, Client,
+Membership, Trainer) ვერსია აქვს, რომელიც ჩაწერის commit-ზე იზრდება (gymapp/signals.py; bulk_create-ის
+შემდეგ - bump() ხელით). ჩანაწერის გასაღებში გამოყენებული ცხრილების
+ვერსიებია, ამიტომ ნებისმიერი ცვლილება მას აუქმებს. ვერსიები ბაზაშია
+(ReportCacheVersion), ამიტომ სხვა worker-ის ჩაწერაც მაშინვე ჩანს.
+
+ერთსა და იმავე გასაღებზე პარალელური მოთხოვნები ერთ გამოთვლას ელოდება
+(single-flight), ნაცვლად იმისა, რომ ყველამ ბაზას მიმართოს.
+
+ჩანაწერები LRU-ა: REPORT_CACHE_SIZE-ზე მეტისას ყველაზე დიდხანს
+გამოუყენებელი იშლება. hit/miss/eviction - stats() (/api/reports/cache_stats/).
+"""
+import threading
+import time
+from collections import Counter, OrderedDict
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+
+_lock = threading.Lock()
+
+# name -> (გასაღები, ვადა, შედეგი), ძველიდან ახლისკენ
+_entries = OrderedDict()
+
+# (ანგარიში, hit/miss/eviction) -> რაოდენობა
+_counters = Counter()
+
+# გასაღები -> გამოთვლის lock
+_flights = {}
+
+
+def bump(*tables):
+    """
+    ცხრილების ვერსიის გაზრდა commit-ის შემდეგ (ტრანზაქციის გარეთ - მაშინვე).
+    """
+    def _bump():
+        from gymapp.models import ReportCacheVersion
+
+        try:
+            for table in tables:
+                if ReportCacheVersion.objects.filter(table=table).update(version=F("version") + 1):
+                    continue
+                try:
+                    with transaction.atomic():
+                        ReportCacheVersion.objects.create(table=table, version=1)
+                except IntegrityError:
+                    # პარალელურმა bump()-მა უკვე შექმნა
+                    ReportCacheVersion.objects.filter(table=table).update(version=F("version") + 1)
+        except Exception as ex:
+            # ჩაწერა უკვე commit-ია - cache-ს ttl გააუქმებს
+            print("report cache bump error:", tables, ex)
+
+    transaction.on_commit(_bump)
+
+
+def versions(tables):
+    from gymapp.models import ReportCacheVersion
+
+    current = dict(ReportCacheVersion.objects.filter(table__in=tables).values_list("table", "version"))
+    return tuple(current.get(table, 0) for table in tables)
+
+
+def normalize(params, ignore=("_",)):
+    """
+    query string -> გასაღები: პარამეტრების და მნიშვნელობების რიგი და ცარიელი
+    მნიშვნელობები არ მოქმედებს.
+    """
+    return tuple(
+        (name, tuple(sorted(values)))
+        for name in sorted(params)
+        if name not in ignore
+        for values in [[v.strip() for v in params.getlist(name) if v.strip()]]
+        if values
+    )
+
+
+def _report(name):
+    return name[0] if isinstance(name, tuple) else name
+
+
+def _lookup(name, key):
+    entry = _entries.get(name)
+    if entry is not None and entry[0] == key and entry[1] > time.monotonic():
+        _entries.move_to_end(name)
+        return True, entry[2]
+    return False, None
+
+
+def _store(name, key, ttl, value):
+    _entries[name] = (key, time.monotonic() + ttl, value)
+    _entries.move_to_end(name)
+
+    size = getattr(settings, "REPORT_CACHE_SIZE", 128)
+    while len(_entries) > size:
+        evicted, _ = _entries.popitem(last=False)
+        _counters[(_report(evicted), "evictions")] += 1
+
+
+def get_or_compute(name, tables, compute, ttl, extra=()):
+    """
+    name-ის შედეგი cache-დან, ან compute() (ერთ ნაკადში გასაღებზე).
+    name - სტრიქონი ან (ანგარიში, ფილტრები), მაგ. ("payments", normalize(...)).
+    extra - გასაღების დამატებითი ნაწილი (მაგ. დღევანდელი თარიღი).
+    """
+    # ვერსია გამოთვლამდე იკითხება: თუ გამოთვლისას ჩაწერა მოხდა, შედეგი
+    # ძველი ვერსიით შეინახება და შემდეგი მოთხოვნა თავიდან დათვლის
+    key = (tuple(extra), versions(tables))
+
+    report = _report(name)
+
+    with _lock:
+        found, value = _lookup(name, key)
+        if found:
+            _counters[(report, "hits")] += 1
+            return value
+        flight = _flights.setdefault((name, key), threading.Lock())
+
+    with flight:
+        with _lock:
+            found, value = _lookup(name, key)
+            # სხვა ნაკადმა დაითვალა, სანამ ველოდით
+            _counters[(report, "hits" if found else "misses")] += 1
+        if found:
+            return value
+
+        try:
+            value = compute()
+            with _lock:
+                _store(name, key, ttl, value)
+        finally:
+            with _lock:
+                _flights.pop((name, key), None)
+
+    return value
+
+
+def clear():
+    with _lock:
+        _entries.clear()
+
+
+def stats():
+    from gymapp.models import ReportCacheVersion
+
+    current = dict(ReportCacheVersion.objects.values_list("table", "version"))
+
+    with _lock:
+        reports = {}
+        for (report, kind), n in _counters.items():
+            reports.setdefault(report, {"hits": 0, "misses": 0, "evictions": 0})[kind] = n
+
+        hits = sum(r["hits"] for r in reports.values())
+        misses = sum(r["misses"] for r in reports.values())
+
+        return {
+            "size": len(_entries),
+            "max_size": getattr(settings, "REPORT_CACHE_SIZE", 128),
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / (hits + misses), 3) if hits + misses else None,
+            "versions": current,
+            "reports": reports,
+        }
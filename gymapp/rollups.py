@@ -0,0 +1,269 @@
+"""
+შემოსავლისა და დასწრების დღიური ჯამები (DailyRevenue, DailyAttendance).
+
+Payment/CardPayment/CheckIn-ის ყოველი ჩაწერა ჯამს იმავე ტრანზაქციაში
+ცვლის: ძველი მნიშვნელობა (pre_save) აკლდება, ახალი ემატება (იხ.
+gymapp/signals.py). bulk_create სიგნალებს არ აგზავნის, ამიტომ listener-ის
+checkin_writer და transaction_backfill add_checkins()-ს თვითონ იძახებენ.
+
+დღე ადგილობრივია (TIME_ZONE), ისევე როგორც operation_date__date ფილტრში.
+operation_date-ის გარეშე გადახდები ჯამებში არ შედის.
+
+სრული გადათვლა: manage.py rebuild_rollups.
+"""
+from collections import Counter, defaultdict
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import CardPayment, CheckIn, DailyAttendance, DailyRevenue, Payment
+
+
+ZERO = Decimal("0.00")
+REVENUE_FIELDS = ("count", "amount", "membership_amount", "trainer_fee")
+
+
+def local_day(moment):
+    if moment is None:
+        return None
+    if timezone.is_aware(moment):
+        moment = timezone.localtime(moment)
+    return moment.date()
+
+
+def _decimal(value):
+    return Decimal(str(value)) if value not in (None, "") else ZERO
+
+
+def contribution(instance):
+    """
+    (მოდელი, გასაღები, მნიშვნელობები) - ერთი ჩანაწერის წვლილი ჯამში, ან None.
+    """
+    if isinstance(instance, Payment):
+        day = local_day(instance.operation_date)
+        if day is None:
+            return None
+        return DailyRevenue, {
+            "day": day,
+            "source": "payment",
+            "method": instance.method or "",
+            "membership_id": instance.membership_id or 0,
+            "trainer_id": instance.trainer_id or 0,
+        }, {
+            "count": 1,
+            "amount": _decimal(instance.amount),
+            "membership_amount": _decimal(instance.membership_amount),
+            "trainer_fee": _decimal(instance.trainer_fee),
+        }
+
+    if isinstance(instance, CardPayment):
+        day = local_day(instance.operation_date)
+        if day is None:
+            return None
+        return DailyRevenue, {
+            "day": day,
+            "source": "card_payment",
+            "method": instance.method or "",
+            "membership_id": 0,
+            "trainer_id": 0,
+        }, {
+            "count": 1,
+            "amount": _decimal(instance.amount),
+            "membership_amount": ZERO,
+            "trainer_fee": ZERO,
+        }
+
+    if isinstance(instance, CheckIn):
+        day = local_day(instance.created_at)
+        if day is None:
+            return None
+        return DailyAttendance, {"day": day, "device": instance.device or ""}, {"count": 1}
+
+    return None
+
+
+def _apply(model, key, values, sign=1):
+    deltas = {field: value * sign for field, value in values.items()}
+    update = {field: F(field) + delta for field, delta in deltas.items()}
+
+    if not model.objects.filter(**key).update(**update):
+        try:
+            with transaction.atomic():
+                model.objects.create(**key, **deltas)
+        except IntegrityError:
+            # პარალელურმა ჩაწერამ უკვე შექმნა
+            model.objects.filter(**key).update(**update)
+
+    if sign < 0:
+        model.objects.filter(**key, count__lte=0).delete()
+
+
+def capture(instance):
+    """
+    pre_save: ბაზაში არსებული (ძველი) წვლილი, რომ post_save-მა გამოაკლოს.
+    """
+    old = None
+    if instance.pk is not None:
+        previous = type(instance).objects.filter(pk=instance.pk).first()
+        if previous is not None:
+            old = contribution(previous)
+    instance._rollup_old = old
+
+
+def saved(instance):
+    old = getattr(instance, "_rollup_old", None)
+    new = contribution(instance)
+    instance._rollup_old = new
+
+    if old == new:
+        return
+    if old is not None:
+        _apply(*old, sign=-1)
+    if new is not None:
+        _apply(*new)
+
+
+def deleted(instance):
+    old = contribution(instance)
+    if old is not None:
+        _apply(*old, sign=-1)
+
+
+def add_checkins(checkins):
+    """
+    bulk_create-ით ჩაწერილი CheckIn-ები (ობიექტები) - თითო (დღე, მოწყობილობა)-ზე ერთი update.
+    """
+    counts = Counter(
+        (local_day(c.created_at), c.device or "") for c in checkins if c.created_at is not None
+    )
+    for (day, device), count in counts.items():
+        _apply(DailyAttendance, {"day": day, "device": device}, {"count": count})
+
+
+# =========================
+# სრული გადათვლა
+# =========================
+def rebuild():
+    """
+    ჯამების თავიდან დათვლა (migration 0026-ს საკუთარი ასლი აქვს).
+    """
+    tz = timezone.get_current_timezone()
+
+    revenue = defaultdict(lambda: dict.fromkeys(REVENUE_FIELDS, 0))
+
+    payments = (
+        Payment.objects.exclude(operation_date=None)
+        .annotate(day=TruncDate("operation_date", tzinfo=tz))
+        .values("day", "method", "membership_id", "trainer_id")
+        .annotate(
+            c=Count("id"),
+            a=Sum("amount"),
+            ma=Sum("membership_amount"),
+            tf=Sum("trainer_fee"),
+        )
+        .order_by()
+    )
+    for r in payments:
+        row = revenue[(r["day"], "payment", r["method"] or "", r["membership_id"] or 0, r["trainer_id"] or 0)]
+        row["count"] += r["c"]
+        row["amount"] += r["a"] or ZERO
+        row["membership_amount"] += r["ma"] or ZERO
+        row["trainer_fee"] += r["tf"] or ZERO
+
+    card_payments = (
+        CardPayment.objects.exclude(operation_date=None)
+        .annotate(day=TruncDate("operation_date", tzinfo=tz))
+        .values("day", "method")
+        .annotate(c=Count("id"), a=Sum("amount"))
+        .order_by()
+    )
+    for r in card_payments:
+        row = revenue[(r["day"], "card_payment", r["method"] or "", 0, 0)]
+        row["count"] += r["c"]
+        row["amount"] += r["a"] or ZERO
+
+    attendance = Counter()
+    checkins = (
+        CheckIn.objects.annotate(day=TruncDate("created_at", tzinfo=tz))
+        .values("day", "device")
+        .annotate(c=Count("id"))
+        .order_by()
+    )
+    for r in checkins:
+        attendance[(r["day"], r["device"] or "")] += r["c"]
+
+    with transaction.atomic():
+        DailyRevenue.objects.all().delete()
+        DailyAttendance.objects.all().delete()
+
+        DailyRevenue.objects.bulk_create(
+            [
+                DailyRevenue(
+                    day=day, source=source, method=method, membership_id=membership_id,
+                    trainer_id=trainer_id, **values,
+                )
+                for (day, source, method, membership_id, trainer_id), values in revenue.items()
+            ],
+            batch_size=1000,
+        )
+        DailyAttendance.objects.bulk_create(
+            [DailyAttendance(day=day, device=device, count=count) for (day, device), count in attendance.items()],
+            batch_size=1000,
+        )
+
+    return len(revenue), len(attendance)
+
+
+# =========================
+# წაკითხვა
+# =========================
+def _ids(values):
+    # "null" - აბონემენტის/ტრენერის გარეშე (0)
+    return [0 if str(v).lower() == "null" else int(v) for v in values]
+
+
+def revenue(source, date_from=None, date_to=None, methods=None, memberships=None,
+            trainers=None, memberships_only=False, group=()):
+    """
+    DailyRevenue-ის ჯამები ფილტრებით: [{...group ველები, count, amount, membership_amount, trainer_fee}].
+    """
+    qs = DailyRevenue.objects.filter(source=source)
+    if date_from:
+        qs = qs.filter(day__gte=date_from)
+    if date_to:
+        qs = qs.filter(day__lte=date_to)
+    if methods:
+        qs = qs.filter(method__in=methods)
+    if memberships:
+        qs = qs.filter(membership_id__in=_ids(memberships))
+    if trainers:
+        qs = qs.filter(trainer_id__in=_ids(trainers))
+    if memberships_only:
+        qs = qs.exclude(membership_id=0)
+
+    sums = {f"total_{field}": Sum(field) for field in REVENUE_FIELDS}
+    if group:
+        rows = qs.values(*group).annotate(**sums).order_by(*group)
+    else:
+        rows = [qs.aggregate(**sums)]
+
+    return [
+        {
+            **{field: r[field] for field in group},
+            **{field: r[f"total_{field}"] or 0 for field in REVENUE_FIELDS},
+        }
+        for r in rows
+    ]
+
+
+def totals(rows, field="amount", **match):
+    """
+    revenue()-ის მწკრივების ჯამი, მაგ. totals(rows, method="cash").
+    """
+    return sum(
+        (r[field] for r in rows if all(r.get(k) == v for k, v in match.items())),
+        ZERO if field != "count" else 0,
+    )
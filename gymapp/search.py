@@ -0,0 +1,235 @@
+"""
+კლიენტების ძებნა SQLite FTS5 ინდექსით (client_search ცხრილი, rowid = Client.id).
+
+ინდექსში ტექსტი translit.fold()-ით ნორმალიზებულია, ამიტომ "bochorishvili"
+და "ბოჭორიშვილი" ერთმანეთს ემთხვევა. tokenizer - trigram: ძებნის ყოველი
+სიტყვა სახელის, ტელეფონის, ბარათის ან პირადი ნომრის ნებისმიერ ნაწილს
+ემთხვევა (როგორც ძველი icontains - მაგ. "შვილი" გვარის ბოლოს). 3 ასოზე
+მოკლე სიტყვას trigram ინდექსი ვერ ეძებს - ის ცხრილის სტრიქონებში instr()-ით
+მოწმდება. ტელეფონი ციფრებად ინახება.
+
+ინდექსს Client-ის სიგნალები ანახლებს (gymapp/signals.py); ცხრილს migrate-ის
+შემდეგ ensure_index() ქმნის/განაახლებს (gymapp/apps.py), bulk_create-ის
+შემდეგ - manage.py rebuild_search_index. სხვა ბაზაზე (ან ინდექსის გარეშე)
+ძებნა ძველებურად icontains-ით მუშაობს.
+"""
+import re
+
+from django.db import OperationalError, connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+from rest_framework.filters import SearchFilter
+
+from .translit import fold
+
+
+TABLE = "client_search"
+
+CREATE_SQL = f"CREATE VIRTUAL TABLE IF NOT EXISTS {TABLE} USING fts5(name, phone, card, tokenize = 'trigram')"
+
+COLUMNS = ("name", "phone", "card")
+
+FALLBACK_FIELDS = ("first_name", "last_name", "phone", "card_number", "passId")
+
+_available = None
+
+
+def available():
+    global _available
+    if _available is None:
+        _available = (
+            connection.vendor == "sqlite"
+            and TABLE in connection.introspection.table_names(include_views=True)
+        )
+    return _available
+
+
+def _digits(value):
+    return re.sub(r"\D", "", value or "")
+
+
+def document(first_name, last_name, phone, card_number, pass_id):
+    """
+    (name, phone, card) - ინდექსის სვეტები.
+    """
+    return (
+        fold(f"{first_name or ''} {last_name or ''}"),
+        _digits(phone),
+        fold(f"{card_number or ''} {pass_id or ''}"),
+    )
+
+
+def search_tokens(q):
+    """
+    ძებნის სტრიქონი -> ნორმალიზებული სიტყვები (ყველა უნდა დაემთხვეს).
+    """
+    q = (q or "").strip()
+
+    # "+995 555 12-34" - ერთი ნომერი (ბოლო 9 ციფრი, როგორც identifiers.normalize_phone)
+    if re.fullmatch(r"[\d\s+()\-]+", q):
+        digits = _digits(q)
+        return [digits[-9:] if len(digits) > 9 else digits] if digits else []
+
+    return [token for token in re.findall(r"\w+", fold(q)) if token]
+
+
+def _condition(tokens):
+    """
+    (SQL, params) client_search-ის rowid-ებისთვის.
+    """
+    long_tokens = [token for token in tokens if len(token) >= 3]
+    short_tokens = [token for token in tokens if len(token) < 3]
+
+    where = []
+    params = []
+    if long_tokens:
+        where.append(f"{TABLE} MATCH %s")
+        params.append(" ".join('"' + token.replace('"', '""') + '"' for token in long_tokens))
+    for token in short_tokens:
+        where.append("(" + " OR ".join(f"instr({column}, %s) > 0" for column in COLUMNS) + ")")
+        params += [token] * len(COLUMNS)
+
+    return f"SELECT rowid FROM {TABLE} WHERE " + " AND ".join(where), params
+
+
+def client_q(q, prefix=""):
+    """
+    Q ფილტრი კლიენტის ძებნისთვის. prefix - "client__" CheckIn/Payment-ისთვის.
+    """
+    tokens = search_tokens(q) if available() else []
+
+    if not tokens:
+        q = (q or "").strip()
+        condition = Q()
+        for field in FALLBACK_FIELDS:
+            condition |= Q(**{f"{prefix}{field}__icontains": q})
+        return condition
+
+    sql, params = _condition(tokens)
+    return Q(**{f"{prefix}id__in": RawSQL(sql, params)})
+
+
+# =========================
+# ინდექსის განახლება
+# =========================
+def index_client(client):
+    if not available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {TABLE} WHERE rowid = %s", [client.pk])
+        cursor.execute(
+            f"INSERT INTO {TABLE} (rowid, name, phone, card) VALUES (%s, %s, %s, %s)",
+            [client.pk, *document(
+                client.first_name, client.last_name, client.phone, client.card_number, client.passId
+            )],
+        )
+
+
+def remove_client(client_id):
+    if not available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {TABLE} WHERE rowid = %s", [client_id])
+
+
+def rebuild(clients):
+    """
+    clients - (id, first_name, last_name, phone, card_number, passId) მწკრივები.
+    """
+    global _available
+
+    with connection.cursor() as cursor:
+        # DROP - ძველი tokenizer-ით შექმნილი ცხრილიც ახლით იცვლება
+        cursor.execute(f"DROP TABLE IF EXISTS {TABLE}")
+        cursor.execute(CREATE_SQL)
+        count = 0
+        for client_id, first_name, last_name, phone, card_number, pass_id in clients:
+            cursor.execute(
+                f"INSERT INTO {TABLE} (rowid, name, phone, card) VALUES (%s, %s, %s, %s)",
+                [client_id, *document(first_name, last_name, phone, card_number, pass_id)],
+            )
+            count += 1
+
+    _available = None
+    return count
+
+
+def ensure_index(using="default", **kwargs):
+    """
+    post_migrate: ცხრილი (ან ძველი tokenizer-ით შექმნილი) -> თავიდან აგება.
+    """
+    from django.db import connections, transaction
+
+    from .models import Client
+
+    global _available
+
+    db = connections[using]
+    if db.vendor != "sqlite":
+        return
+
+    with db.cursor() as cursor:
+        cursor.execute("SELECT sql FROM sqlite_master WHERE name = %s", [TABLE])
+        row = cursor.fetchone()
+    if row is not None and "trigram" in row[0]:
+        return
+
+    try:
+        with transaction.atomic(using=using):
+            count = rebuild(
+                Client.objects.using(using)
+                .values_list("id", "first_name", "last_name", "phone", "card_number", "passId")
+                .iterator()
+            )
+    except OperationalError as ex:
+        # SQLite 3.34-ზე ძველს trigram არ აქვს - ძებნა icontains-ით
+        print("client search index:", ex)
+        _available = None
+        return
+
+    print("client search index:", count)
+
+
+class ClientSearchFilter(SearchFilter):
+    """
+    ?search= view.search_fields-ით: კლიენტის ველები (first_name, client__phone, ...)
+    ინდექსით, დანარჩენი ველები - ჩვეულებრივ (icontains).
+    """
+
+    def _split(self, fields):
+        prefixes = []
+        other = []
+        for field in fields:
+            path, _, name = str(field).rpartition("__")
+            if name in FALLBACK_FIELDS and str(field)[:1] not in self.lookup_prefixes:
+                prefix = f"{path}__" if path else ""
+                if prefix not in prefixes:
+                    prefixes.append(prefix)
+            else:
+                other.append(field)
+        return prefixes, other
+
+    def filter_queryset(self, request, queryset, view):
+        fields = self.get_search_fields(view, request)
+        terms = self.get_search_terms(request)
+        if not fields or not terms:
+            return queryset
+
+        prefixes, other = self._split(fields)
+
+        condition = Q()
+        for prefix in prefixes:
+            condition |= client_q(" ".join(terms), prefix)
+
+        if other:
+            # SearchFilter-ის წესი: ყველა სიტყვა რომელიმე ველში
+            lookups = [self.construct_search(str(field), queryset) for field in other]
+            every_term = Q()
+            for term in terms:
+                any_field = Q()
+                for lookup in lookups:
+                    any_field |= Q(**{lookup: term})
+                every_term &= any_field
+            condition |= every_term
+
+        return queryset.filter(condition)
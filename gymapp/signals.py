@@ -1,27 +1,146 @@
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, pre_save
 from django.dispatch import receiver
 
-from .models import ClientMembership, ClientSync
+from gym.services import card_cache, thumbnails
+
+from . import identifiers, report_cache, rollups, search, sync_outbox
+from .models import (
+    CardPayment, CheckIn, Client, ClientMembership, Membership, Payment, Trainer,
+)
+
+
+# Client.current_* (მიმდინარე აბონემენტის ასლი) - ტრანზაქციის შიგნით, რომ
+# იმავე მოთხოვნის შემდეგი წაკითხვაც ახალ მნიშვნელობას ხედავდეს
+@receiver(post_save, sender=ClientMembership)
+@receiver(post_delete, sender=ClientMembership)
+def client_current_membership(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    client = instance.client if ClientMembership.client.is_cached(instance) else None
+    Client.refresh_current_membership(instance.client_id, client)
+
+
+@receiver(post_save, sender=Membership)
+def client_current_membership_type(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    Client.objects.filter(current_membership__membership=instance).update(
+        current_membership_type=instance.membership_type
+    )
 
 
 @receiver(post_save, sender=ClientMembership)
 def membership_status_sync(sender, instance, created, **kwargs):
 
-    client = instance.client
+    # კლიენტი მხოლოდ ინიშნება, ClientSync ტრანზაქციის commit-ზე ერთხელ იწერება
+    sync_outbox.enqueue(instance.client_id)
+
+
+# ფოტოს thumbnail (gym/services/thumbnails.py). card_cache_refresh-ზე ადრეა
+# რეგისტრირებული, ამიტომ მისი on_commit ინდექსის განახლებამდე სრულდება.
+@receiver(post_save, sender=Client)
+def client_thumbnail(sender, instance, raw=False, **kwargs):
+    if raw or thumbnails.is_current(instance):
+        return
+
+    client_id = instance.pk
+
+    def build():
+        client = Client.objects.filter(pk=client_id).first()
+        if client is None:
+            return
+        try:
+            name = thumbnails.make_thumbnail(client)
+        except Exception as ex:
+            print("thumbnail error:", client_id, ex)
+            return
+        Client.objects.filter(pk=client_id).update(photo_thumb=name or None)
+
+    transaction.on_commit(build)
+
+
+# listener-ის ბარათების ინდექსი (gym/services/card_cache.py)
+# ბარათის ნომრის შეცვლაც (მაგ. nc_card CardPaymentViewSet-ში) აქედან ახლდება
+@receiver(post_save, sender=Client)
+@receiver(post_save, sender=ClientMembership)
+@receiver(post_delete, sender=ClientMembership)
+def card_cache_refresh(sender, instance, raw=False, **kwargs):
+    client_id = instance.pk if sender is Client else instance.client_id
+    # listener სხვა პროცესშიც შეიძლება იყოს - ჟურნალი იმავე ტრანზაქციაში
+    if not raw:
+        card_cache.record_change(client_id)
+    transaction.on_commit(lambda: card_cache.refresh_client(client_id))
+
+
+# ძებნის FTS ინდექსი (gymapp/search.py) - იმავე ტრანზაქციაში
+@receiver(post_save, sender=Client)
+def client_search_index(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    search.index_client(instance)
+
+
+@receiver(post_delete, sender=Client)
+def client_search_remove(sender, instance, **kwargs):
+    search.remove_client(instance.pk)
+
+
+# ბარათის/პ.ნ./ტელეფონის ზუსტი ძებნის ცხრილი (gymapp/identifiers.py)
+@receiver(post_save, sender=Client)
+def client_identifiers(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    identifiers.sync_client(instance)
+
 
-    # კლიენტზე არსებული ყველა pending ჩანაწერი წავშალოთ
-    ClientSync.objects.filter(client=client).delete()
+@receiver(post_delete, sender=Client)
+def card_cache_forget(sender, instance, **kwargs):
+    client_id = instance.pk
+    card_cache.record_change(client_id)
+    transaction.on_commit(lambda: card_cache.forget_client(client_id))
 
-    # არის თუ არა კლიენტი აქტიური მთლიანობაში
-    is_active = client.has_active_membership
 
-    if is_active:
-        ClientSync.objects.create(
-            client=client,
-            action="add"
-        )
-    else:
-        ClientSync.objects.create(
-            client=client,
-            action="delete"
-        )
\ No newline at end of file
+# დღიური ჯამები (gymapp/rollups.py) - იმავე ტრანზაქციაში
+@receiver(pre_save, sender=Payment)
+@receiver(pre_save, sender=CardPayment)
+@receiver(pre_save, sender=CheckIn)
+def rollup_capture(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    rollups.capture(instance)
+
+
+@receiver(post_save, sender=Payment)
+@receiver(post_save, sender=CardPayment)
+@receiver(post_save, sender=CheckIn)
+def rollup_saved(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    rollups.saved(instance)
+
+
+@receiver(post_delete, sender=Payment)
+@receiver(post_delete, sender=CardPayment)
+@receiver(post_delete, sender=CheckIn)
+def rollup_deleted(sender, instance, **kwargs):
+    rollups.deleted(instance)
+
+
+# ანგარიშების cache-ის ვერსიები (gymapp/report_cache.py) - commit-ზე
+@receiver(post_save, sender=Payment)
+@receiver(post_save, sender=CardPayment)
+@receiver(post_save, sender=CheckIn)
+@receiver(post_save, sender=ClientMembership)
+@receiver(post_save, sender=Client)
+@receiver(post_save, sender=Membership)
+@receiver(post_save, sender=Trainer)
+@receiver(post_delete, sender=Payment)
+@receiver(post_delete, sender=CardPayment)
+@receiver(post_delete, sender=CheckIn)
+@receiver(post_delete, sender=ClientMembership)
+@receiver(post_delete, sender=Client)
+@receiver(post_delete, sender=Membership)
+@receiver(post_delete, sender=Trainer)
+def report_cache_bump(sender, instance, **kwargs):
+    report_cache.bump(sender._meta.model_name)
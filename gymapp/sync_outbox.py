@@ -0,0 +1,188 @@
+"""
+ClientSync-ის outbox: თითო კლიენტზე მაქსიმუმ ერთი ღია (pending/error) ჩანაწერი.
+
+ClientMembership-ის ყოველი შენახვა მხოლოდ კლიენტს ნიშნავს "შეცვლილად".
+ტრანზაქციის commit-ზე (on_commit) ყველა მონიშნული კლიენტის სასურველი
+მდგომარეობა (add/delete) ერთად გამოითვლება და იწერება, ამიტომ
+გადახდის დროს რამდენჯერმე შენახული აბონემენტი ერთ ჩანაწერად იკვრება.
+
+"add" მხოლოდ მოქმედ აბონემენტზე (ClientMembership.is_active()-ის წესი,
+Client.current_*-დან): status="active", მაგრამ ვადაგასული ან ვიზიტებამოწურული
+აბონემენტი კონტროლერიდან იშლება. დროით ცვლილებებს (ვადის გასვლა, fixed-ის
+დაწყება) manage.py update_status ამოწმებს - ის resync()-ს იძახებს.
+"""
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from gym.services import sync_worker
+
+
+OPEN_STATUSES = ("pending", "error")
+
+
+# ტრანზაქციაში მონიშნული კლიენტები: კავშირის alias -> set (ნაკადის ლოკალური)
+_pending = threading.local()
+
+
+def _pending_clients(using):
+    clients = getattr(_pending, "clients", None)
+    if clients is None:
+        clients = _pending.clients = {}
+    return clients.setdefault(using, set())
+
+
+def enqueue(client_id, using=None):
+    conn = transaction.get_connection(using)
+
+    if not conn.in_atomic_block:
+        apply({client_id})
+        return
+
+    _pending_clients(conn.alias).add(client_id)
+
+    # callback ყოველ გამოძახებაზე: Django rollback-ისას savepoint-ის callback-ებს
+    # თვითონ შლის, დარჩენილი კი commit-ზე ერთხელ ჩაწერს ყველა მონიშნულს -
+    # პირველი ცარიელებს სიას, დანარჩენები არაფერს აკეთებენ
+    transaction.on_commit(lambda: flush(conn.alias), using=conn.alias)
+
+
+def flush(using=None):
+    clients = _pending_clients(using or transaction.get_connection().alias)
+    if not clients:
+        return
+
+    # rollback-ით გაუქმებული ცვლილების კლიენტიც შეიძლება აქ მოხვდეს -
+    # apply() მდგომარეობას ბაზიდან ითვლის, ამიტომ ზედმეტი კლიენტი უვნებელია
+    client_ids = set(clients)
+    clients.clear()
+    apply(client_ids)
+
+
+def apply(client_ids):
+    """
+    კლიენტების სასურველი მდგომარეობის ჩაწერა რამდენიმე query-თ.
+    """
+    from .models import ClientSync
+
+    client_ids = set(client_ids)
+    if not client_ids:
+        return
+
+    active = entitled(client_ids)
+
+    open_rows = {
+        row.client_id: row
+        for row in ClientSync.objects.filter(client_id__in=client_ids, status__in=OPEN_STATUSES)
+    }
+
+    # ბოლოს გაგზავნილი მდგომარეობა - თუ არ შეცვლილა, ახალი ჩანაწერი არ გვჭირდება
+    last_done = {}
+    for client_id, action in (
+        ClientSync.objects.filter(client_id__in=client_ids - set(open_rows), status="done")
+        .order_by("id")
+        .values_list("client_id", "action")
+    ):
+        last_done[client_id] = action
+
+    now = timezone.now()
+    to_update = []
+    to_create = []
+    for client_id in client_ids:
+        action = "add" if client_id in active else "delete"
+
+        row = open_rows.get(client_id)
+        if row is not None:
+            # იგივე action-ის error ჩანაწერი თავის backoff-ს ინარჩუნებს
+            if row.action != action:
+                row.action = action
+                row.status = "pending"
+                row.error = ""
+                row.queued_at = now
+                row.attempts = 0
+                row.next_attempt_at = None
+                to_update.append(row)
+        elif last_done.get(client_id) != action:
+            to_create.append(ClientSync(client_id=client_id, action=action, queued_at=now))
+
+    if to_update:
+        ClientSync.objects.bulk_update(
+            to_update, ["action", "status", "error", "queued_at", "attempts", "next_attempt_at"]
+        )
+    if to_create:
+        _create(to_create, now)
+
+    if to_update or to_create:
+        sync_worker.wake()
+
+
+def _create(rows, now):
+    """
+    ახალი ღია ჩანაწერები. სხვა პროცესმა შეიძლება იმავე კლიენტზე უკვე შექმნა
+    (one_open_sync_per_client) - მაშინ მის ჩანაწერს ვაახლებთ. ეს on_commit-ში
+    სრულდება, ანუ შეცდომა მომხმარებლის (უკვე დასრულებულ) მოთხოვნამდე არ უნდა ავიდეს.
+    """
+    from .models import ClientSync
+
+    try:
+        with transaction.atomic():
+            ClientSync.objects.bulk_create(rows)
+        return
+    except IntegrityError:
+        pass
+
+    for row in rows:
+        try:
+            with transaction.atomic():
+                row.save(force_insert=True)
+        except IntegrityError:
+            ClientSync.objects.filter(
+                client_id=row.client_id, status__in=OPEN_STATUSES
+            ).exclude(action=row.action).update(
+                action=row.action, status="pending", error="", queued_at=now,
+                attempts=0, next_attempt_at=None,
+            )
+
+
+def entitled(client_ids, today=None):
+    """
+    კლიენტები, რომლებსაც კარი უნდა გაეღოთ: მიმდინარე აბონემენტი დღეს მოქმედია.
+    """
+    from .models import Client, membership_active_on
+
+    today = today or timezone.localdate()
+    rows = Client.objects.filter(id__in=client_ids, current_membership__isnull=False).values_list(
+        "id", "current_membership_type", "current_start_date", "current_end_date", "current_remaining_visits"
+    )
+    return {
+        client_id
+        for client_id, mtype, start_date, end_date, remaining in rows
+        if membership_active_on(mtype, start_date, end_date, remaining, today=today)
+    }
+
+
+def resync(client_ids, chunk=500):
+    """
+    სასურველი მდგომარეობის ხელახლა შემოწმება (მაგ. ვადის გასვლის ან fixed-ის
+    დაწყების დღეს) - ჩანაწერი მხოლოდ შეცვლილ კლიენტზე იქმნება.
+    """
+    client_ids = list(client_ids)
+    for i in range(0, len(client_ids), chunk):
+        apply(client_ids[i:i + chunk])
+
+
+def prune_history():
+    """
+    done ჩანაწერები CLIENT_SYNC_HISTORY_DAYS დღეზე მეტხანს არ ინახება.
+    """
+    from .models import ClientSync
+
+    days = getattr(settings, "CLIENT_SYNC_HISTORY_DAYS", 30)
+    deleted, _ = ClientSync.objects.filter(
+        status="done",
+        synced_at__lt=timezone.now() - timedelta(days=days),
+    ).delete()
+    return deleted
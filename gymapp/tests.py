@@ -1,3 +1,138 @@
-from django.test import TestCase
+from datetime import date, timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from gym.services import checkin_writer, device_sync
+
+from . import identifiers, rollups
+from .models import CheckIn, Client, ClientMembership, ClientSync, DailyAttendance, Membership
+from .translit import fold
+
+
+class IdentifierNormalizeTests(SimpleTestCase):
+
+    def test_card(self):
+        # Excel-ის ".0", ჰარები და წინა ნულები
+        self.assertEqual(identifiers.normalize_card("000123.0"), "123")
+        self.assertEqual(identifiers.normalize_card(" 12 34 "), "1234")
+        self.assertEqual(identifiers.normalize_card("ab12"), "AB12")
+        self.assertEqual(identifiers.normalize_card("000"), "0")
+
+    def test_pass(self):
+        self.assertEqual(identifiers.normalize_pass("01001012345.0"), "01001012345")
+        self.assertEqual(identifiers.normalize_pass(" ab 123 "), "AB123")
+
+    def test_phone(self):
+        for value in ("+995 555 12-34-56", "995555123456", "0555123456", "555 123 456"):
+            self.assertEqual(identifiers.normalize_phone(value), "555123456")
+        self.assertEqual(identifiers.normalize_phone("1234"), "1234")
+
+    def test_identifiers_for_skips_empty(self):
+        # "0" - ცარიელი ბარათი
+        self.assertEqual(identifiers.identifiers_for("0", "", "599000111"), {"phone": "599000111"})
+        self.assertEqual(
+            identifiers.identifiers_for("0759", "01001", None),
+            {"card": "759", "pass": "01001"},
+        )
+
+
+class FoldTests(SimpleTestCase):
+
+    def test_latin_and_georgian_match(self):
+        self.assertEqual(fold("bochorishvili"), fold("ბოჭორიშვილი"))
+        self.assertEqual(fold("Natsvlishvili"), fold("ნაწვლიშვილი"))
+        self.assertEqual(fold("Tamar"), fold("თამარ"))
+
+    def test_digraphs(self):
+        self.assertEqual(fold("sh"), "შ")
+        self.assertEqual(fold("tch"), fold("ჭ"))
+        self.assertEqual(fold("kh"), "ხ")
+
+    def test_empty_and_digits(self):
+        self.assertEqual(fold(None), "")
+        self.assertEqual(fold("A-100"), fold("a-100"))
+        self.assertTrue(fold("0555").endswith("555"))
+
+
+class RetryDelayTests(SimpleTestCase):
+
+    @override_settings(ZK_SYNC_RETRY_BASE=5, ZK_SYNC_RETRY_MAX=300)
+    def test_schedule(self):
+        seconds = [device_sync.retry_delay(n).total_seconds() for n in range(0, 9)]
+        self.assertEqual(seconds, [5, 5, 10, 20, 40, 80, 160, 300, 300])
+
+
+class RollupTests(TestCase):
+
+    def setUp(self):
+        self.client_obj = Client.objects.create(first_name="a", last_name="b", phone="1", card_number="1")
+        self.day = timezone.make_aware(timezone.datetime(2026, 3, 10, 12, 0))
+
+    def counts(self):
+        return dict(DailyAttendance.objects.values_list("day", "count"))
+
+    def test_save_move_and_delete(self):
+        first = CheckIn.objects.create(client=self.client_obj, created_at=self.day, device="main")
+        CheckIn.objects.create(client=self.client_obj, created_at=self.day, device="main")
+        self.assertEqual(self.counts(), {date(2026, 3, 10): 2})
+
+        # სხვა დღეზე გადატანა: ძველს აკლდება, ახალს ემატება
+        first.created_at = self.day + timedelta(days=1)
+        first.save()
+        self.assertEqual(self.counts(), {date(2026, 3, 10): 1, date(2026, 3, 11): 1})
+
+        # ნულამდე ჩამოსული მწკრივი იშლება
+        first.delete()
+        self.assertEqual(self.counts(), {date(2026, 3, 10): 1})
+
+    def test_add_checkins_matches_rebuild(self):
+        rows = CheckIn.objects.bulk_create([
+            CheckIn(client=self.client_obj, created_at=self.day + timedelta(hours=i), device="main")
+            for i in range(3)
+        ])
+        rollups.add_checkins(rows)
+        incremental = sorted(DailyAttendance.objects.values_list("day", "device", "count"))
+
+        rollups.rebuild()
+        self.assertEqual(incremental, sorted(DailyAttendance.objects.values_list("day", "device", "count")))
+
+
+class CheckinWriterTests(TestCase):
+
+    def test_queued_checkin_keeps_tap_time(self):
+        client = Client.objects.create(first_name="a", last_name="b", phone="1", card_number="1")
+        tapped = timezone.now() - timedelta(minutes=3)
+
+        # ნაკადის გარეშე - flush() იმავე კავშირით წერს
+        with mock.patch.object(checkin_writer, "_ensure_thread"):
+            checkin_writer.enqueue(client.pk, created_at=tapped, device="main", door=1)
+            checkin_writer.flush()
+
+        checkin = CheckIn.objects.get(client=client)
+        self.assertEqual(checkin.created_at, tapped)
+        self.assertEqual((checkin.device, checkin.door), ("main", 1))
+        self.assertEqual(checkin_writer.pending(), 0)
+
+
+class SyncOutboxTests(TestCase):
+
+    def test_changes_in_one_transaction_coalesce(self):
+        membership = Membership.objects.create(
+            name="m", membership_type="unlimited", price=10, duration_days=30
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            client = Client.objects.create(first_name="a", last_name="b", phone="1", card_number="1")
+            cm = ClientMembership.objects.create(
+                client=client, membership=membership,
+                start_date=date.today(), end_date=date.today() + timedelta(days=30),
+            )
+            cm.save()
+            client.save()
+
+        self.assertEqual(
+            list(ClientSync.objects.filter(client=client).values_list("action", "status")),
+            [("add", "pending")],
+        )
@@ -0,0 +1,71 @@
+"""
+ლათინური -> ქართული (ძველი ბაზის და ძებნისთვის).
+
+translit_to_georgian - ძველი პროგრამის (AcadNusx-ის განლაგება) ტექსტი:
+დიდი T/S/Z/W/R ცალკე ასოებია (თ, შ, ძ, ჭ, ღ). იმპორტი (import_clients) ამას იყენებს.
+
+fold - ძებნის ნორმალიზაცია. ქართულიც და ლათინურიც ("bochorishvili",
+"natsvlishvili") ერთსა და იმავე ფორმამდე დაიყვანება: ორასოიანი
+ბგერები (sh, ch, ts, ...) ერთ ასოდ, მსგავსი ასოები (თ/ტ, ქ/კ/ყ,
+ფ/პ, წ/ც, ჭ/ჩ) ერთად - ლათინურით მათ ერთნაირად წერენ.
+"""
+import re
+
+
+TRANSLIT_SINGLE = {
+    "a": "ა", "b": "ბ", "g": "გ", "d": "დ", "e": "ე", "v": "ვ", "z": "ზ",
+    "i": "ი", "k": "კ", "l": "ლ", "m": "მ", "n": "ნ", "o": "ო", "p": "პ",
+    "r": "რ", "s": "ს", "t": "ტ", "u": "უ", "f": "ფ", "q": "ქ", "y": "ყ",
+    "c": "კ", "w": "ვ", "x": "ხ", "h": "ჰ",
+    "T": "თ", "S": "შ", "Z": "ძ", "W": "ჭ", "R": "ღ",
+}
+
+
+def translit_to_georgian(text):
+    if not text:
+        return ""
+
+    s = str(text).strip()
+    result = ""
+
+    for ch in s:
+        if ch == "'":
+            continue
+        result += TRANSLIT_SINGLE.get(ch, ch)
+
+    return result
+
+
+# ძებნისას ჩვეულებრივი ლათინური ("shota", "khachapuri"), არა AcadNusx
+DIGRAPHS = {
+    "tch": "ჭ",
+    "sh": "შ", "ch": "ჩ", "kh": "ხ", "gh": "ღ", "zh": "ჟ",
+    "ts": "ც", "dz": "ძ", "th": "თ", "ph": "ფ",
+}
+SEARCH_EXTRA = {"j": "ჯ"}
+
+FOLD = {
+    "თ": "ტ",
+    "ქ": "კ", "ყ": "კ",
+    "ფ": "პ",
+    "წ": "ც",
+    "ჭ": "ჩ",
+}
+
+_digraph_re = re.compile("|".join(sorted(DIGRAPHS, key=len, reverse=True)))
+
+
+def fold(text):
+    if not text:
+        return ""
+
+    s = _digraph_re.sub(lambda m: DIGRAPHS[m.group(0)], str(text).lower())
+
+    result = []
+    for ch in s:
+        if ch == "'":
+            continue
+        ch = TRANSLIT_SINGLE.get(ch) or SEARCH_EXTRA.get(ch) or ch
+        result.append(FOLD.get(ch, ch))
+
+    return "".join(result)
@@ -36,6 +36,8 @@ urlpatterns = [
     path("zk/start/", zk_start),
     path("zk/stop/", zk_stop),
     path("zk/imitate/", zk_imitate),
+    path("zk/stats/", zk_stats),
+    path("zk/metrics/", zk_metrics),
 
 
 
@@ -15,25 +15,22 @@ from django.http import JsonResponse
 from django.db import transaction
 from django.db.models import Max
 from django.http import JsonResponse
-from  gym.services.zk_listener    import start, stop, imitate
-from pyzkaccess import ZKAccess, ZK200, ZK100, ZK400
-from pyzkaccess.tables import *
+from  gym.services.zk_listener    import start, stop, imitate, get_stats
+from gym.services import device_commands, sync_worker, tap_metrics
 from datetime import datetime
 import time
 from decimal import Decimal
 from django.db.models import DecimalField
-from pyzkaccess.common import ZKDatetimeUtils
-from pyzkaccess.enums import VerifyMode, PassageDirection
 import asyncio
-from gym.settings import ipSettings
 from django.db.models import Prefetch
 from django.shortcuts import render, redirect
 from django.contrib.auth import authenticate, login, logout
+from django.conf import settings
 
 from .models import *
-
-
-zktIp =  ipSettings
+from .pagination import CheckInPagination, KeysetPagination
+from .search import ClientSearchFilter, client_q
+from . import identifiers, report_cache, rollups
 
 
 # =========================
@@ -138,15 +135,32 @@ class ClientSerializer(serializers.ModelSerializer):
             "comment",
             "active_membership_id",
             "is_active",
+            "current_membership_type",
+            "current_start_date",
+            "current_end_date",
+            "current_remaining_visits",
             "created_at",
         ]
 
+    def _check_unique_identifier(self, kind, value, message):
+        if not value:
+            return value
+        other = identifiers.owner(kind, value, exclude=self.instance.pk if self.instance else None)
+        if other is not None:
+            raise serializers.ValidationError(f"{message} (კლიენტი #{other})")
+        return value
+
+    def validate_card_number(self, value):
+        return self._check_unique_identifier("card", value, "ეს ბარათი სხვა კლიენტს ეკუთვნის")
+
+    def validate_passId(self, value):
+        return self._check_unique_identifier("pass", value, "ეს პირადი ნომერი სხვა კლიენტს ეკუთვნის")
+
     def get_active_membership_id(self, obj):
-        cm = obj.active_membership
-        return cm.id if cm else None
+        return obj.current_membership_id if obj.current_is_active else None
 
     def get_is_active(self, obj):
-        return obj.active_membership is not None
+        return obj.current_is_active
 
 
 class ClientMembershipSerializer(serializers.ModelSerializer):
@@ -216,7 +230,8 @@ class CheckInSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = CheckIn
-        fields = ["id", "client", "client_name", "created_at"]
+        fields = ["id", "client", "client_name", "created_at", "device", "door"]
+        read_only_fields = ["created_at", "device", "door"]
 
     def get_client_name(self, obj):
         return str(obj.client)
@@ -244,10 +259,23 @@ class MembershipViewSet(viewsets.ModelViewSet):
 class ClientViewSet(viewsets.ModelViewSet):
     queryset = Client.objects.all().order_by("-id")
     serializer_class = ClientSerializer
-    filter_backends = [SearchFilter, OrderingFilter]
-    search_fields = ["first_name", "last_name", "card_number"]
+    pagination_class = KeysetPagination
+    filter_backends = [ClientSearchFilter, OrderingFilter]
+    search_fields = ["first_name", "last_name", "phone", "card_number", "passId"]
     ordering_fields = ["id", "created_at", "first_name", "last_name"]
 
+    def get_queryset(self):
+        qs = super().get_queryset()
+
+        # ?active=1 - მოქმედი აბონემენტით, ?active=0 - ვადაგასული / აბონემენტის გარეშე
+        active = (self.request.query_params.get("active") or "").strip().lower()
+        if active in ("1", "true", "yes"):
+            qs = qs.filter(membership_active_q("current_"), current_membership__isnull=False)
+        elif active in ("0", "false", "no"):
+            qs = qs.exclude(membership_active_q("current_"), current_membership__isnull=False)
+
+        return qs
+
     @action(detail=True, methods=["get"])
     def memberships(self, request, pk=None):
         client = self.get_object()
@@ -274,6 +302,42 @@ class ReportsViewSet(viewsets.ViewSet):
         except Exception:
             return None
 
+    def _filter_q(self, request, qs):
+        # ?q= - კლიენტის ძებნა (სახელი ლათინურითაც, ტელეფონი, ბარათი, პირადი ნომერი)
+        q = (request.query_params.get("q") or "").strip()
+        if q:
+            qs = qs.filter(client_q(q, "client__"))
+        return qs
+
+    def _cached(self, request, name, tables, compute, extra=()):
+        # შედეგი ფილტრების მიხედვით (gymapp/report_cache.py); ცხრილის ჩაწერა აუქმებს
+        data = report_cache.get_or_compute(
+            (name, report_cache.normalize(request.query_params)),
+            tables,
+            lambda: compute(request),
+            ttl=getattr(settings, "REPORT_CACHE_TTL", 300),
+            extra=extra,
+        )
+        return Response(data)
+
+    @action(detail=False, methods=["get"])
+    def cache_stats(self, request):
+        return Response(report_cache.stats())
+
+    def _rollup_ok(self, request, dfrom, dto):
+        # დღიური ჯამები (DailyRevenue) საკმარისია, თუ ფილტრი მხოლოდ თარიღზე,
+        # მეთოდზე, აბონემენტსა და ტრენერზეა. თარიღის გარეშე operation_date=None
+        # გადახდებიც ითვლება, ისინი კი ჯამებში არ არის.
+        if not (dfrom or dto):
+            return False
+        params = request.query_params
+        return not (
+            params.getlist("client")
+            or (params.get("q") or "").strip()
+            or params.get("min_amount") not in (None, "")
+            or params.get("max_amount") not in (None, "")
+        )
+
     @action(detail=False, methods=["get"])
     def active_members_by_trainer(self, request):
         today = timezone.localdate()
@@ -321,66 +385,121 @@ class ReportsViewSet(viewsets.ViewSet):
     @action(detail=False, methods=["get"])
     def summary(self, request):
         today = timezone.localdate()
+
+        data = report_cache.get_or_compute(
+            "summary",
+            ("payment", "cardpayment", "checkin", "clientmembership"),
+            lambda: self._summary(today),
+            ttl=getattr(settings, "SUMMARY_CACHE_TTL", 10),
+            extra=(today,),
+        )
+        return Response(data)
+
+    def _summary(self, today):
         month_start = today.replace(day=1)
+        zero = Decimal("0.00")
 
-        today_checkins = CheckIn.objects.filter(created_at__date=today).count()
+        # თითო ცხრილზე ერთი query (პირობითი აგრეგაცია) დღიური ჯამებიდან (gymapp/rollups.py)
+        def amount(**condition):
+            return Coalesce(Sum("amount", filter=Q(**condition)), zero)
 
-        payments_today = Payment.objects.filter(operation_date__date=today)
-        payments_month = Payment.objects.filter(operation_date__date__gte=month_start)
+        def count(**condition):
+            return Coalesce(Sum("count", filter=Q(**condition)), 0)
 
-        memberships_sold_today_qs = payments_today.filter(membership__isnull=False)
-        memberships_sold_today_count = memberships_sold_today_qs.count()
-        memberships_sold_today_amount = memberships_sold_today_qs.aggregate(
-            s=Coalesce(Sum("amount"), Decimal("0.00"))
-        )["s"]
+        revenue = DailyRevenue.objects.filter(day__gte=month_start).aggregate(
+            today_income=amount(source="payment", day=today),
+            month_income=amount(source="payment"),
 
-        card_payments_today_qs = CardPayment.objects.filter(operation_date__date=today)
-        card_payments_today_count = card_payments_today_qs.count()
-        card_payments_today_amount = card_payments_today_qs.aggregate(
-            s=Coalesce(Sum("amount"), Decimal("0.00"))
-        )["s"]
+            today_cash=amount(source="payment", day=today, method="cash"),
+            today_card=amount(source="payment", day=today, method="card"),
+            today_transfer=amount(source="payment", day=today, method="transfer"),
 
-        today_income = payments_today.aggregate(
-            s=Coalesce(Sum("amount"), Decimal("0.00"))
-        )["s"]
+            month_cash=amount(source="payment", method="cash"),
+            month_card=amount(source="payment", method="card"),
+            month_transfer=amount(source="payment", method="transfer"),
 
-        month_income = payments_month.aggregate(
-            s=Coalesce(Sum("amount"), Decimal("0.00"))
-        )["s"]
+            memberships_sold_today_count=count(source="payment", day=today, membership_id__gt=0),
+            memberships_sold_today_amount=amount(source="payment", day=today, membership_id__gt=0),
 
-        def by_method(qs, method):
-            return qs.filter(method=method).aggregate(
-                s=Coalesce(Sum("amount"), Decimal("0.00"))
-            )["s"]
+            card_payments_today_count=count(source="card_payment", day=today),
+            card_payments_today_amount=amount(source="card_payment", day=today),
+        )
 
-        active_memberships = ClientMembership.objects.filter(status="active").count()
-        expired_memberships = ClientMembership.objects.filter(status="expired").count()
+        today_checkins = DailyAttendance.objects.filter(day=today).aggregate(
+            s=Coalesce(Sum("count"), 0)
+        )["s"]
 
-        return Response({
+        memberships = ClientMembership.objects.aggregate(
+            active_memberships=Count("id", filter=Q(status="active")),
+            expired_memberships=Count("id", filter=Q(status="expired")),
+        )
+
+        return {
             "today_checkins": today_checkins,
-            "today_income": float(today_income or 0),
-            "month_income": float(month_income or 0),
+            "today_income": float(revenue["today_income"]),
+            "month_income": float(revenue["month_income"]),
 
-            "today_cash": float(by_method(payments_today, "cash") or 0),
-            "today_card": float(by_method(payments_today, "card") or 0),
-            "today_transfer": float(by_method(payments_today, "transfer") or 0),
+            "today_cash": float(revenue["today_cash"]),
+            "today_card": float(revenue["today_card"]),
+            "today_transfer": float(revenue["today_transfer"]),
 
-            "month_cash": float(by_method(payments_month, "cash") or 0),
-            "month_card": float(by_method(payments_month, "card") or 0),
-            "month_transfer": float(by_method(payments_month, "transfer") or 0),
+            "month_cash": float(revenue["month_cash"]),
+            "month_card": float(revenue["month_card"]),
+            "month_transfer": float(revenue["month_transfer"]),
 
-            "active_memberships": active_memberships,
-            "expired_memberships": expired_memberships,
+            "active_memberships": memberships["active_memberships"],
+            "expired_memberships": memberships["expired_memberships"],
 
-            "memberships_sold_today_count": memberships_sold_today_count,
-            "memberships_sold_today_amount": float(memberships_sold_today_amount or 0),
+            "memberships_sold_today_count": revenue["memberships_sold_today_count"],
+            "memberships_sold_today_amount": float(revenue["memberships_sold_today_amount"]),
 
-            "card_payments_today_count": card_payments_today_count,
-            "card_payments_today_amount": float(card_payments_today_amount or 0),
-        })
+            "card_payments_today_count": revenue["card_payments_today_count"],
+            "card_payments_today_amount": float(revenue["card_payments_today_amount"]),
+        }
+
+    @action(detail=False, methods=["get"])
+    def revenue_series(self, request):
+        # შემოსავალი პერიოდებად (?period=day|month|year) - წლების შედარებისთვის
+        period = request.query_params.get("period") or "month"
+        if period not in ("day", "month", "year"):
+            return Response({"detail": "period: day, month ან year"}, status=400)
+
+        dfrom = self._parse_date(request.query_params.get("date_from"))
+        dto = self._parse_date(request.query_params.get("date_to"))
+        method_vals = request.query_params.getlist("method")
+
+        buckets = {}
+        for source in ("payment", "card_payment"):
+            for r in rollups.revenue(source, dfrom, dto, methods=method_vals, group=("day",)):
+                day = r["day"]
+                key = str(day) if period == "day" else f"{day:%Y-%m}" if period == "month" else str(day.year)
+                row = buckets.setdefault(key, {
+                    "period": key, "payments_count": 0, "payments_amount": Decimal("0.00"),
+                    "card_payments_count": 0, "card_payments_amount": Decimal("0.00"),
+                })
+                row[f"{source}s_count"] += r["count"]
+                row[f"{source}s_amount"] += r["amount"]
+
+        rows = [
+            {
+                **row,
+                "payments_amount": float(row["payments_amount"]),
+                "card_payments_amount": float(row["card_payments_amount"]),
+                "total_amount": float(row["payments_amount"] + row["card_payments_amount"]),
+            }
+            for _, row in sorted(buckets.items())
+        ]
+
+        return Response({"period": period, "rows": rows})
 
     @action(detail=False, methods=["get"])
     def payments(self, request):
+        return self._cached(
+            request, "payments", ("payment", "client", "clientmembership", "membership", "trainer"),
+            self._payments,
+        )
+
+    def _payments(self, request):
         qs = Payment.objects.select_related("client", "membership", "trainer").all()
 
         dfrom = self._parse_date(request.query_params.get("date_from"))
@@ -418,15 +537,7 @@ class ReportsViewSet(viewsets.ViewSet):
         if client_vals:
             qs = qs.filter(client_id__in=[int(x) for x in client_vals])
 
-        q = (request.query_params.get("q") or "").strip()
-        if q:
-            qs = qs.filter(
-                Q(client__first_name__icontains=q) |
-                Q(client__last_name__icontains=q) |
-                Q(client__phone__icontains=q) |
-                Q(client__card_number__icontains=q) |
-                Q(client__passId__icontains=q)
-            )
+        qs = self._filter_q(request, qs)
 
         min_amount = request.query_params.get("min_amount")
         max_amount = request.query_params.get("max_amount")
@@ -437,19 +548,46 @@ class ReportsViewSet(viewsets.ViewSet):
 
         membership_sold_qs = qs.filter(membership__isnull=False)
 
-        stats = {
-            "payments_count": qs.count(),
-            "total_amount": float(qs.aggregate(s=Sum("amount"))["s"] or 0),
-            "memberships_sold_count": membership_sold_qs.count(),
-            "memberships_sold_amount": float(membership_sold_qs.aggregate(s=Sum("amount"))["s"] or 0),
-        }
+        if self._rollup_ok(request, dfrom, dto):
+            filters = dict(
+                date_from=dfrom, date_to=dto, methods=method_vals,
+                memberships=membership_vals, trainers=trainer_vals,
+            )
+            total = rollups.revenue("payment", **filters)[0]
+            sold_rows = rollups.revenue("payment", memberships_only=True, group=("trainer_id",), **filters)
+            trainers = Trainer.objects.in_bulk([r["trainer_id"] for r in sold_rows if r["trainer_id"]])
+
+            stats = {
+                "payments_count": total["count"],
+                "total_amount": float(total["amount"]),
+                "memberships_sold_count": rollups.totals(sold_rows, "count"),
+                "memberships_sold_amount": float(rollups.totals(sold_rows)),
+            }
 
-        by_trainer = (
-            membership_sold_qs
-            .values("trainer_id", "trainer__first_name", "trainer__last_name")
-            .annotate(cnt=Count("id"), total=Sum("amount"))
-            .order_by("-cnt")
-        )
+            by_trainer = [
+                {
+                    "trainer_id": r["trainer_id"] or None,
+                    "trainer__first_name": trainers[r["trainer_id"]].first_name if r["trainer_id"] in trainers else None,
+                    "trainer__last_name": trainers[r["trainer_id"]].last_name if r["trainer_id"] in trainers else None,
+                    "cnt": r["count"],
+                    "total": r["amount"],
+                }
+                for r in sorted(sold_rows, key=lambda r: r["count"], reverse=True)
+            ]
+        else:
+            stats = {
+                "payments_count": qs.count(),
+                "total_amount": float(qs.aggregate(s=Sum("amount"))["s"] or 0),
+                "memberships_sold_count": membership_sold_qs.count(),
+                "memberships_sold_amount": float(membership_sold_qs.aggregate(s=Sum("amount"))["s"] or 0),
+            }
+
+            by_trainer = (
+                membership_sold_qs
+                .values("trainer_id", "trainer__first_name", "trainer__last_name")
+                .annotate(cnt=Count("id"), total=Sum("amount"))
+                .order_by("-cnt")
+            )
 
         stats["by_trainer"] = [
             {
@@ -463,9 +601,9 @@ class ReportsViewSet(viewsets.ViewSet):
             for r in by_trainer
         ]
 
-        wt = membership_sold_qs.filter(trainer__isnull=True)
-        stats["without_trainer_count"] = wt.count()
-        stats["without_trainer_total"] = float(wt.aggregate(s=Sum("amount"))["s"] or 0)
+        wt = [r for r in stats["by_trainer"] if r["is_without_trainer"]]
+        stats["without_trainer_count"] = sum(r["count"] for r in wt)
+        stats["without_trainer_total"] = sum(r["total"] for r in wt)
 
         rows = PaymentSerializer(qs.order_by("-operation_date", "-id")[:2000], many=True).data
 
@@ -475,7 +613,7 @@ class ReportsViewSet(viewsets.ViewSet):
             many=True
         ).data
 
-        return Response({
+        return {
             "filters": {
                 "date_from": str(dfrom) if dfrom else None,
                 "date_to": str(dto) if dto else None,
@@ -483,17 +621,23 @@ class ReportsViewSet(viewsets.ViewSet):
                 "method": method_vals,
                 "membership": membership_vals,
                 "client": client_vals,
-                "q": q,
+                "q": (request.query_params.get("q") or "").strip(),
                 "min_amount": min_amount,
                 "max_amount": max_amount,
             },
             "stats": stats,
             "rows": rows,
             "clients": clients,
-        })
+        }
 
     @action(detail=False, methods=["get"])
     def membership_sales(self, request):
+        return self._cached(
+            request, "membership_sales", ("payment", "client", "membership", "trainer"),
+            self._membership_sales,
+        )
+
+    def _membership_sales(self, request):
         qs = Payment.objects.select_related("client", "trainer", "membership").filter(
             membership__isnull=False
         )
@@ -527,15 +671,7 @@ class ReportsViewSet(viewsets.ViewSet):
         if client_vals:
             qs = qs.filter(client_id__in=[int(x) for x in client_vals])
 
-        q = (request.query_params.get("q") or "").strip()
-        if q:
-            qs = qs.filter(
-                Q(client__first_name__icontains=q) |
-                Q(client__last_name__icontains=q) |
-                Q(client__phone__icontains=q) |
-                Q(client__card_number__icontains=q) |
-                Q(client__passId__icontains=q)
-            )
+        qs = self._filter_q(request, qs)
 
         rows = [
             {
@@ -553,24 +689,42 @@ class ReportsViewSet(viewsets.ViewSet):
             for p in qs.order_by("-operation_date", "-id")[:3000]
         ]
 
-        total = qs.aggregate(s=Coalesce(Sum("membership_amount"), Decimal("0.00")))["s"]
+        if self._rollup_ok(request, dfrom, dto):
+            method_rows = rollups.revenue(
+                "payment", dfrom, dto, methods=method_vals, memberships=membership_vals,
+                trainers=trainer_vals, memberships_only=True, group=("method",),
+            )
+            count = rollups.totals(method_rows, "count")
+            total = rollups.totals(method_rows, "membership_amount")
 
-        def by_method(method):
-            return qs.filter(method=method).aggregate(
-                s=Coalesce(Sum("membership_amount"), Decimal("0.00"))
-            )["s"]
+            def by_method(method):
+                return rollups.totals(method_rows, "membership_amount", method=method)
+        else:
+            count = qs.count()
+            total = qs.aggregate(s=Coalesce(Sum("membership_amount"), Decimal("0.00")))["s"]
 
-        return Response({
-            "count": qs.count(),
+            def by_method(method):
+                return qs.filter(method=method).aggregate(
+                    s=Coalesce(Sum("membership_amount"), Decimal("0.00"))
+                )["s"]
+
+        return {
+            "count": count,
             "total_membership_amount": float(total or 0),
             "cash_amount": float(by_method("cash") or 0),
             "card_amount": float(by_method("card") or 0),
             "transfer_amount": float(by_method("transfer") or 0),
             "rows": rows,
-        })
+        }
 
     @action(detail=False, methods=["get"])
     def card_payments_report(self, request):
+        return self._cached(
+            request, "card_payments_report", ("cardpayment", "client"),
+            self._card_payments_report,
+        )
+
+    def _card_payments_report(self, request):
         qs = CardPayment.objects.select_related("client").all()
 
         dfrom = self._parse_date(request.query_params.get("date_from"))
@@ -584,15 +738,7 @@ class ReportsViewSet(viewsets.ViewSet):
         if client_vals:
             qs = qs.filter(client_id__in=[int(x) for x in client_vals])
 
-        q = (request.query_params.get("q") or "").strip()
-        if q:
-            qs = qs.filter(
-                Q(client__first_name__icontains=q) |
-                Q(client__last_name__icontains=q) |
-                Q(client__phone__icontains=q) |
-                Q(client__card_number__icontains=q) |
-                Q(client__passId__icontains=q)
-            )
+        qs = self._filter_q(request, qs)
 
         min_amount = request.query_params.get("min_amount")
         max_amount = request.query_params.get("max_amount")
@@ -613,24 +759,39 @@ class ReportsViewSet(viewsets.ViewSet):
             for r in qs.order_by("-operation_date", "-id")[:3000]
         ]
 
-        total = qs.aggregate(s=Coalesce(Sum("amount"), Decimal("0.00")))["s"]
+        if self._rollup_ok(request, dfrom, dto):
+            method_rows = rollups.revenue("card_payment", dfrom, dto, group=("method",))
+            count = rollups.totals(method_rows, "count")
+            total = rollups.totals(method_rows)
 
-        def by_method(method):
-            return qs.filter(method=method).aggregate(
-                s=Coalesce(Sum("amount"), Decimal("0.00"))
-            )["s"]
+            def by_method(method):
+                return rollups.totals(method_rows, method=method)
+        else:
+            count = qs.count()
+            total = qs.aggregate(s=Coalesce(Sum("amount"), Decimal("0.00")))["s"]
 
-        return Response({
-            "count": qs.count(),
+            def by_method(method):
+                return qs.filter(method=method).aggregate(
+                    s=Coalesce(Sum("amount"), Decimal("0.00"))
+                )["s"]
+
+        return {
+            "count": count,
             "total_amount": float(total or 0),
             "cash_amount": float(by_method("cash") or 0),
             "card_amount": float(by_method("card") or 0),
             "transfer_amount": float(by_method("transfer") or 0),
             "rows": rows,
-        })
+        }
 
     @action(detail=False, methods=["get"])
     def active_clients_report(self, request):
+        return self._cached(
+            request, "active_clients_report", ("clientmembership", "client", "membership"),
+            self._active_clients_report, extra=(timezone.localdate(),),
+        )
+
+    def _active_clients_report(self, request):
         today = timezone.localdate()
 
         qs = ClientMembership.objects.select_related("client", "membership").filter(
@@ -649,15 +810,7 @@ class ReportsViewSet(viewsets.ViewSet):
         if client_vals:
             qs = qs.filter(client_id__in=[int(x) for x in client_vals])
 
-        q = (request.query_params.get("q") or "").strip()
-        if q:
-            qs = qs.filter(
-                Q(client__first_name__icontains=q) |
-                Q(client__last_name__icontains=q) |
-                Q(client__phone__icontains=q) |
-                Q(client__card_number__icontains=q) |
-                Q(client__passId__icontains=q)
-            )
+        qs = self._filter_q(request, qs)
 
         rows = [
             {
@@ -674,162 +827,80 @@ class ReportsViewSet(viewsets.ViewSet):
             for cm in qs.order_by("client__last_name", "client__first_name")[:3000]
         ]
 
-        return Response({
+        return {
             "count": qs.values("client_id").distinct().count(),
             "rows": rows,
-        })
+        }
 
 
-def OpenDoor(request):
-    stop()
-    # asyncio.sleep(1)
-    time.sleep(1)
-    connstr = f"protocol=TCP,ipaddress={zktIp},port=4370,timeout=4000,passwd="
+def OpenDoor(request=None):
+    # listener-ის პროცესის საერთო სესიით (device_commands), listener-ის გაჩერების გარეშე
+    # ?device=<ZK_DEVICES name>&door=<N>, ნაგულისხმევად პირველი მოწყობილობის პირველი კარი
+    device = request.GET.get("device") if request else None
+    door = request.GET.get("door") if request else None
     try:
-        with ZKAccess(connstr=connstr, device_model=ZK200) as zk:
-            zk.doors[0].relays.switch_on(4)
-            print('opened')
+        device_commands.run(
+            "open_door", timeout=getattr(settings, "ZK_DOOR_TIMEOUT", 5),
+            device=device or None, door=int(door) if door else None,
+        )
+        print('opened')
     except Exception as ex:
         print(str(ex))
-        stop()
         return JsonResponse({"status": "error"})
-    # asyncio.sleep(1)
-    time.sleep(1)
-    start()
     return JsonResponse({"status": "ok"})
 
 
 def sync(request):
-    clients = Client.objects.filter(
-        memberships__status="active"
-    ).distinct()
-    for client in clients:
-        print(client.id, client.card_number)
-        insertor_update_new_user(pin=str(client.id),card=client.card_number)
-    return JsonResponse({"status": "ok"})
+    # მხოლოდ სხვაობა ბაზასა და კონტროლერის User/UserAuthorize ცხრილებს შორის
+    try:
+        result = device_commands.run("reconcile")
+    except device_commands.DeviceCommandError as ex:
+        return JsonResponse({"status": "error", "error": str(ex)})
+    return JsonResponse({"status": "ok", **result})
 
 
 def syncpartial(request):
-    stop()
-    # asyncio.sleep(2)
-    time.sleep(2)
     print("partial sync")
-    rows = ClientSync.objects.select_related("client").filter(
-        status__in=["pending", "error"]
-    )
-    for row in rows:
-        try:
-            if row.action == "add":
-                insertor_update_new_user(
-                    pin=str(row.client.id),
-                    card=row.client.card_number
-                )
-            elif row.action == "delete":
-                delete_user(
-                    pin=str(row.client.id)
-                )
-
-            row.status = "done"
-            row.synced_at = timezone.now()
-            row.error = ""
 
+    # worker-ი ფონზე გაგზავნის (backoff-ის მიუხედავად), მოთხოვნა კონტროლერს არ ელოდება.
+    # ჩანაწერები უკვე ბაზაშია - თუ worker სხვა პროცესშია, შემდეგ poll-ზე აიღებს
+    sync_worker.request_run()
+    return JsonResponse({"status": "queued", **sync_worker.queue_status()})
 
-        except Exception as e:
 
-            row.status = "error"
-            row.error = str(e)
-
-        row.save(update_fields=["status", "error", "synced_at"])
-    # asyncio.sleep(3)
-    time.sleep(2)
-    start()
-    return JsonResponse({"status": "ok"})
+def insertor_update_new_user(device=None, pin="123", card='123456'):
+    print("insertor_update_new_user")
+    device_commands.run("push", upserts=[(pin, card)], device=device)
 
 
-def insertor_update_new_user(ip=zktIp, pin="123", card='123456', password='3467'):
-    print("insertor_update_new_user")
-    zk = ZKAccess(f"protocol=TCP,ipaddress={ip},port=4370,timeout=4000,passwd=")
-    my_user = User(card=card, pin=pin, password=password, super_authorize=False)
-    print("added",my_user)
-    zk.table(User).upsert(my_user)
-    access = UserAuthorize(
-        pin=pin,
-        doors=(True, True, True, True),
-        timezone_id=1
-    )
-    zk.table(UserAuthorize).upsert(access)
-
-
-def get_logs_users(ip=zktIp):
-    stop()
+def get_logs_users(device=None):
     print("get_logs")
-    zk = ZKAccess(f"protocol=TCP,ipaddress={ip},port=4370,timeout=4000,passwd=")
-    records = zk.table('User')
+    records = device_commands.run("read_table", table="User", device=device)
     for record in records:
         print(record)  # prints all users from the table
-    start()
 
 
-def get_logs_UserAuthorize(ip=zktIp):
-    stop()
+def get_logs_UserAuthorize(device=None):
     print("get_logs")
-    zk = ZKAccess(f"protocol=TCP,ipaddress={ip},port=4370,timeout=4000,passwd=")
     # records = zk.table('User')
     # records = zk.table('Transaction')
-    records = zk.table('UserAuthorize')
+    records = device_commands.run("read_table", table="UserAuthorize", device=device)
     for record in records:
         print(record)  # prints all users from the table
-    start()
 
 
-def get_transaction_logs(ip=zktIp):
-    stop()
+def get_transaction_logs(device=None):
     print("get_logs")
-    zk = ZKAccess(f"protocol=TCP,ipaddress={ip},port=4370,timeout=4000,passwd=")
-    events = zk.table('Transaction')
-    for e in events:
-        epin = e.pin
-        etime = e.time
-        print(epin, etime)
-        if ord(epin) != 4:
-            try:
-                client = Client.objects.get(id=int(epin))
-                CheckIn.objects.get_or_create(
-                    client=client,
-                    created_at=etime
-                )
-            except Client.DoesNotExist:
-                print("client not found")
-            # events.delete(e)
-    start()
+    return device_commands.run("backfill", device=device)
 
 
-def del_logs(ip=zktIp):
-    stop()
-    zk = ZKAccess(f"protocol=TCP,ipaddress={ip},port=4370,timeout=4000,passwd=")
-    events = zk.table("Transaction")
-    # zk.table('Transaction').delete_all()
-    for e in events:
-        epin = e.pin
-        etime = e.time
-        print(epin, etime)
-        try:
-            client = Client.objects.get(id=int(epin))
-            CheckIn.objects.get_or_create(
-                client=client,
-                created_at=etime
-            )
-        except Client.DoesNotExist:
-            print("client not found")
-        events.delete(e)
-    start()
-        # print(e,"deleted")
+def del_logs(device=None):
+    # იმპორტი + კონტროლერიდან წაშლა
+    return device_commands.run("backfill", device=device, trim=True)
 
 
-def delete_user(pin, ip=zktIp):
-    zk = ZKAccess(f"protocol=TCP,ipaddress={ip},port=4370,timeout=4000,passwd=")
-    zk.table('User').where(pin=pin).delete_all()
-    zk.table("UserAuthorize").where(pin=pin).delete_all()
+def delete_user(pin, device=None):
+    device_commands.run("push", deletes=[pin], device=device)
     print("delete_user", pin)
 
 
@@ -852,6 +923,20 @@ def zk_imitate(request):
     return JsonResponse({"status": "stopped"})
 
 
+def zk_stats(request):
+
+    return JsonResponse(get_stats())
+
+
+def zk_metrics(request):
+    # მხოლოდ ლოკალურად ან ავტორიზებულ მომხმარებელზე
+    local = request.META.get("REMOTE_ADDR") in ("127.0.0.1", "::1")
+    if not local and not request.user.is_authenticated:
+        return JsonResponse({"detail": "forbidden"}, status=403)
+
+    return JsonResponse(tap_metrics.snapshot())
+
+
 class PaymentViewSet(viewsets.ModelViewSet):
 
     queryset = Payment.objects.select_related(
@@ -862,6 +947,7 @@ class PaymentViewSet(viewsets.ModelViewSet):
     ).all().order_by("-id")
 
     serializer_class = PaymentSerializer
+    pagination_class = KeysetPagination
 
     # ----------------------------------------------------
     # HELPERS
@@ -1185,7 +1271,8 @@ class PaymentViewSet(viewsets.ModelViewSet):
 class CheckInViewSet(viewsets.ModelViewSet):
     queryset = CheckIn.objects.select_related("client").all().order_by("-id")
     serializer_class = CheckInSerializer
-    filter_backends = [SearchFilter, OrderingFilter]
+    pagination_class = CheckInPagination
+    filter_backends = [ClientSearchFilter, OrderingFilter]
     search_fields = ["client__first_name", "client__last_name", "client__phone", "client__card_number"]
     ordering_fields = ["id", "created_at"]
 
@@ -1234,17 +1321,18 @@ class CheckInViewSet(viewsets.ModelViewSet):
         if not card and not phone:
             return Response({"detail": "მიუთითე card_number ან phone"}, status=400)
 
-        qs = Client.objects.all()
+        # ზუსტი დამთხვევა ინდექსით, თუ არა - დასაწყისით (gymapp/identifiers.py)
+        client, candidates = identifiers.find(card=card, phone=phone)
 
-        if card:
-            qs = qs.filter(
-                Q(card_number__icontains=card) |
-                Q(passId__icontains=card)
-            )
-        elif phone:
-            qs = qs.filter(phone__icontains=phone)
+        if client is None and candidates:
+            return Response({
+                "detail": "რამდენიმე კლიენტი ემთხვევა - დააზუსტე",
+                "candidates": [
+                    {"id": c.id, "name": str(c), "phone": c.phone, "card_number": c.card_number}
+                    for c in candidates
+                ],
+            }, status=409)
 
-        client = qs.first()
         if not client:
             return Response({"detail": "კლიენტი ვერ მოიძებნა"}, status=404)
 
@@ -1270,14 +1358,8 @@ class CheckInViewSet(viewsets.ModelViewSet):
 
 
 def sync_status(request):
-
-    pending = ClientSync.objects.filter(status="pending").count()
-    error = ClientSync.objects.filter(status="error").count()
-
-    return JsonResponse({
-        "pending": pending,
-        "error": error
-    })
+    # pending/error + რიგის სიღრმე, lag და worker-ის მდგომარეობა
+    return JsonResponse(sync_worker.queue_status())
 
 
 
@@ -1318,7 +1400,7 @@ class CardPaymentSerializer(serializers.ModelSerializer):
 
 class CardPaymentViewSet(viewsets.ModelViewSet):
     serializer_class = CardPaymentSerializer
-    filter_backends = [SearchFilter, OrderingFilter]
+    filter_backends = [ClientSearchFilter, OrderingFilter]
     search_fields = [
         "client__first_name",
         "client__last_name",